@@ -68,6 +68,11 @@ def main(filepath=None):
 
     GlobalInfo.gui_thread = threading.get_ident()
 
+    from .config import Conf
+    from .logic.profiler import profiler
+    if Conf.profiler_enabled:
+        profiler.enable(threshold=Conf.profiler_threshold / 1000.0)
+
     # apply the CSS
     app.setStyleSheet(CSS.global_css())
 
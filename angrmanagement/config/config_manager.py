@@ -57,6 +57,16 @@ ENTRIES = [
     CE('feature_map_color_unknown', QColor, QColor(0xa, 0xa, 0xa)),
     CE('feature_map_color_delimiter', QColor, QColor(0, 0, 0)),
     CE('feature_map_color_data', QColor, QColor(0xc0, 0xc0, 0xc0)),
+    # symbolic execution
+    CE('symexec_explore_update_interval', float, 0.5),
+    # out-of-process decompilation. other analyses, e.g., VFG and DDG generation, still run in the GUI process.
+    CE('decompilation_server_enabled', bool, False),
+    CE('decompilation_server_memory_limit', int, 0),  # in MB. 0 means no limit.
+    # GUI profiler
+    CE('profiler_enabled', bool, False),
+    CE('profiler_threshold', int, 50),  # in ms. slower paints, handlers, and scheduled calls are logged.
+    # memory manager
+    CE('memory_budget', int, 2048),  # in MB. caches are evicted from once they take more. 0 means no limit.
 ]
 
 
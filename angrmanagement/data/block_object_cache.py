@@ -0,0 +1,102 @@
+import weakref
+import threading
+
+from ..utils import get_block_objects, build_function_block_objects
+
+
+class BlockObjectCache:
+    """
+    Per-function tables of what the blocks of the disassembly views display. A table is built from the Disassembly of a
+    function the first time one of its blocks is displayed, and only serves that Disassembly, since another Disassembly
+    of the same function, e.g., of a CFG that has grown since, may have different blocks. Tables are dropped when a
+    label, a comment, the variables of their function, or the CFG change. Tables can be built from any thread.
+    """
+
+    def __init__(self, instance):
+        self._lock = threading.Lock()
+        self._tables = weakref.WeakKeyDictionary()  # Disassembly -> FunctionBlockObjects
+        # increased whenever tables are dropped, so that tables that were being built at the time are not kept
+        self._generation = 0
+
+        instance.kb_changes.am_subscribe(self._on_kb_change)
+        instance.cfg_container.am_subscribe(self._on_cfg_change)
+
+    #
+    # Public methods
+    #
+
+    def get_block_objects(self, disasm, nodes, func_addr):
+        """
+        Get the objects to display in a block. See utils.get_block_objects().
+
+        :param angr.analyses.Disassembly disasm:    The angr Disassembly Analysis instance.
+        :param iterable nodes:                      A collection of CFG nodes.
+        :param int func_addr:                       The function address of the current block.
+        :return:                                    A list of objects.
+        :rtype:                                     list
+        """
+
+        return get_block_objects(disasm, nodes, func_addr, table=self.table(disasm, func_addr))
+
+    def table(self, disasm, func_addr):
+        """
+        Get the table of a function, and build it if necessary.
+
+        :param angr.analyses.Disassembly disasm:    The angr Disassembly Analysis instance of the function.
+        :param int func_addr:                       The function address.
+        :rtype:                                     FunctionBlockObjects
+        """
+
+        with self._lock:
+            table = self._tables.get(disasm, None)
+            generation = self._generation
+        if table is not None and table.func_addr == func_addr:
+            return table
+
+        table = build_function_block_objects(disasm, func_addr)
+        with self._lock:
+            if generation == self._generation:
+                self._tables[disasm] = table
+        return table
+
+    def invalidate(self, func_addr=None):
+        """
+        Drop the table of a function, or all tables.
+
+        :param int func_addr:   The function address, or None to drop all tables.
+        :return:                None
+        """
+
+        with self._lock:
+            if func_addr is None:
+                self._tables.clear()
+            else:
+                for disasm in [ disasm for disasm, table in list(self._tables.items()) if table.func_addr == func_addr ]:
+                    del self._tables[disasm]
+            self._generation += 1
+
+    def invalidate_addr(self, addr):
+        """
+        Drop the tables of all functions that contain an address.
+
+        :param int addr:    The address.
+        :return:            None
+        """
+
+        with self._lock:
+            for disasm in [ disasm for disasm, table in list(self._tables.items()) if table.contains(addr) ]:
+                del self._tables[disasm]
+            self._generation += 1
+
+    #
+    # Event handlers
+    #
+
+    def _on_kb_change(self, kind=None, addr=None, **kwargs):  # pylint:disable=unused-argument
+        if addr is None:
+            self.invalidate()
+        else:
+            self.invalidate_addr(addr)
+
+    def _on_cfg_change(self, **kwargs):  # pylint:disable=unused-argument
+        self.invalidate()
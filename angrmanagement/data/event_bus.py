@@ -0,0 +1,230 @@
+import time
+import weakref
+import threading
+from collections import OrderedDict
+
+from PySide2.QtCore import QCoreApplication, QTimer
+
+from ..logic import GlobalInfo
+from ..logic.threads import is_gui_thread, gui_thread_schedule_async
+from ..logic.profiler import profiler, PROFILE_HANDLER
+
+
+class Subscription:
+    """
+    A listener of an EventSentinel.
+
+    Bound methods are referenced weakly, so that subscribing does not keep views alive after they are closed. Their
+    subscriptions are dropped once the object dies. Other callables (functions, lambdas, closures) are referenced
+    strongly, since nothing else might be holding on to them.
+    """
+
+    __slots__ = ('_ref', 'key', 'name', 'priority', 'coalesce', )
+
+    def __init__(self, listener, priority=0, coalesce=False):
+        if getattr(listener, '__self__', None) is not None and hasattr(listener, '__func__'):
+            self._ref = weakref.WeakMethod(listener)
+            # identifies the listener without keeping it alive
+            self.key = (id(listener.__self__), listener.__func__)
+        else:
+            self._ref = lambda: listener
+            self.key = listener
+        self.name = getattr(listener, '__qualname__', None) or repr(listener)
+        self.priority = priority
+        self.coalesce = coalesce
+
+    @property
+    def listener(self):
+        """
+        The listener, or None if it has been garbage collected.
+        """
+        return self._ref()
+
+    @property
+    def alive(self):
+        return self._ref() is not None
+
+
+class EventStats:
+    """
+    How often something has happened, and how long handling it took.
+    """
+
+    __slots__ = ('count', 'coalesced', 'time', )
+
+    def __init__(self):
+        self.count = 0
+        self.coalesced = 0  # events that were merged into an earlier, not yet delivered event
+        self.time = 0.0  # in seconds
+
+    def __repr__(self):
+        return "<EventStats %d events, %d coalesced, %.3f s>" % (self.count, self.coalesced, self.time)
+
+
+class EventBus:
+    """
+    Delivers the events of all EventSentinels.
+
+    Subscribers are called in the order of decreasing priority, and in the order they have subscribed in if their
+    priorities are equal. Regular subscribers are called synchronously from am_event(). Coalescing subscribers are called
+    once per frame on the GUI thread instead: all events that reach them before then are merged into one call, with the
+    keyword arguments of later events taking precedence.
+
+    If collect_stats is set, the bus counts how many events every sentinel has published and how many calls every
+    handler has received, along with the time spent in handlers. It is off by default, since it costs every handler
+    call, and the profiler turns it on while it is enabled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # listener key -> (Subscription, kwargs). a listener that is subscribed to several sentinels is only called once.
+        self._pending = OrderedDict()
+        self._flush_scheduled = False
+
+        self.collect_stats = False
+        self.source_stats = { }  # sentinel name -> EventStats
+        self.handler_stats = { }  # handler name -> EventStats
+        self.stats_start = time.time()
+
+    #
+    # Public methods
+    #
+
+    def publish(self, sentinel, kwargs):
+        """
+        Deliver an event to all subscribers of a sentinel.
+
+        :param EventSentinel sentinel:  The sentinel that the event has been fired on.
+        :param dict kwargs:             Arguments of the event.
+        :return:                        None
+        """
+
+        if self.collect_stats:
+            name = getattr(sentinel, 'am_name', None) or type(sentinel).__name__
+            self._stats(self.source_stats, name).count += 1
+
+        subscriptions = sentinel.am_subscribers
+        if not subscriptions:
+            return
+
+        dead = False
+        coalesced = [ ]
+        # subscribers may subscribe or unsubscribe while the event is being delivered
+        for sub in tuple(subscriptions):
+            listener = sub.listener
+            if listener is None:
+                dead = True
+            elif sub.coalesce:
+                coalesced.append(sub)
+            else:
+                self._call(sub, listener, kwargs)
+
+        if coalesced:
+            self._defer(coalesced, kwargs)
+
+        if dead:
+            sentinel.am_subscribers[:] = [ sub for sub in sentinel.am_subscribers if sub.alive ]
+
+    def flush(self):
+        """
+        Deliver all events that are waiting for coalescing subscribers.
+
+        :return:    None
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            self._flush_scheduled = False
+
+        # higher priorities first. sorted() is stable, so the order of arrival is kept otherwise.
+        for sub, kwargs in sorted(pending.values(), key=lambda item: -item[0].priority):
+            listener = sub.listener
+            if listener is not None:
+                self._call(sub, listener, kwargs)
+
+    def reset_stats(self):
+        self.source_stats = { }
+        self.handler_stats = { }
+        self.stats_start = time.time()
+
+    def report(self, limit=20):
+        """
+        Describe the busiest event sources and the most expensive handlers.
+
+        :param int limit:   Maximum number of entries in each list.
+        :return:            A human-readable report.
+        :rtype:             str
+        """
+
+        elapsed = max(time.time() - self.stats_start, 1e-9)
+
+        lines = [ "Events in the last %.1f seconds:" % elapsed ]
+        sources = sorted(self.source_stats.items(), key=lambda item: -item[1].count)[:limit]
+        for name, stats in sources:
+            lines.append("  %-60s %8d events  %8.1f/s" % (name, stats.count, stats.count / elapsed))
+
+        lines.append("Handlers:")
+        handlers = sorted(self.handler_stats.items(), key=lambda item: -item[1].time)[:limit]
+        for name, stats in handlers:
+            lines.append("  %-60s %8d calls  %8d coalesced  %10.3f ms" % (name, stats.count, stats.coalesced,
+                                                                           stats.time * 1000))
+        return "\n".join(lines)
+
+    #
+    # Private methods
+    #
+
+    @staticmethod
+    def _stats(table, name):
+        try:
+            return table[name]
+        except KeyError:
+            stats = table[name] = EventStats()
+            return stats
+
+    def _call(self, sub, listener, kwargs):
+        if not self.collect_stats and not profiler.enabled:
+            listener(**kwargs)
+            return
+
+        section = profiler.begin(PROFILE_HANDLER, sub.name)
+        start = time.perf_counter()
+        try:
+            listener(**kwargs)
+        finally:
+            if self.collect_stats:
+                stats = self._stats(self.handler_stats, sub.name)
+                stats.count += 1
+                stats.time += time.perf_counter() - start
+            profiler.end(section)
+
+    def _defer(self, subscriptions, kwargs):
+        if GlobalInfo.main_window is None or QCoreApplication.instance() is None:
+            # there is no event loop to deliver them later
+            for sub in subscriptions:
+                listener = sub.listener
+                if listener is not None:
+                    self._call(sub, listener, kwargs)
+            return
+
+        with self._lock:
+            for sub in subscriptions:
+                entry = self._pending.get(sub.key, None)
+                if entry is None:
+                    self._pending[sub.key] = (sub, dict(kwargs))
+                else:
+                    entry[1].update(kwargs)
+                    if self.collect_stats:
+                        self._stats(self.handler_stats, sub.name).coalesced += 1
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        if is_gui_thread():
+            # in the next iteration of the event loop
+            QTimer.singleShot(0, self.flush)
+        else:
+            gui_thread_schedule_async(self.flush)
+
+
+event_bus = EventBus()
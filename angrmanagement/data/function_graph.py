@@ -1,5 +1,5 @@
 
-from ..utils.graph import to_supergraph
+from ..utils.graph import get_supergraph
 
 def edge_qualifies(data):
     return data['type'] not in ('call', 'return_from_call')
@@ -17,7 +17,7 @@ class FunctionGraph:
         if self._supergraph is not None:
             return self._supergraph
 
-        self._supergraph = to_supergraph(self.function.transition_graph)
+        self._supergraph = get_supergraph(self.function)
         self.edges = [(str(from_.addr), str(to.addr)) for (from_, to, data) in self._supergraph.edges(data=True) if
                       edge_qualifies(data)
                       ]
@@ -7,8 +7,12 @@ import traceback
 from .jobs import CFGGenerationJob
 from .object_container import ObjectContainer
 from .sync_ctrl import SyncControl
+from .block_object_cache import BlockObjectCache
+from .memory_manager import MemoryManager, ManagedCache
+from ..config import Conf
 from ..logic import GlobalInfo
 from ..logic.threads import gui_thread_schedule_async
+from ..logic.analysis_server import AnalysisServer
 
 
 class Instance:
@@ -19,17 +23,51 @@ class Instance:
         self.workspace = None
 
         self.jobs = []
+        # JobRecords of all jobs that have been queued. fired whenever a job is queued, started, or finished.
+        self.job_records = ObjectContainer([], name='Records of all jobs')
         self._jobs_queue = Queue()
         self.simgrs = ObjectContainer([], name='Global simulation managers list')
         self.states = ObjectContainer([], name='Global states list')
         self.patches = ObjectContainer(None, name='Global patches update notifier')
+        # fired with the addresses of newly tagged functions
+        self.code_tags = ObjectContainer(None, name='Global code tags update notifier')
+        # function address -> (version, tags), see CodeTaggingJob
+        self.function_tags = { }
         self._project_container = ObjectContainer(project, "the current angr project")
         self._project_container.am_subscribe(self.initialize)
         self.cfg_container = ObjectContainer(None, "the current CFG")
         self.cfb_container = ObjectContainer(None, "the current CFBlanket")
+        # functions that demand-driven CFG generation recovered ahead of the CFG of the whole binary, by the address
+        # they were recovered for. fired with addr and func.
+        self.cfg_focus = ObjectContainer({ }, "functions recovered around navigated addresses")
+        self._cfg_job = None  # type: CFGGenerationJob
         self.interactions = ObjectContainer([], name='Saved program interactions')
         self.interaction_protocols = ObjectContainer([PlainTextProtocol], name='Available interaction protocols')
+        # fired with kind=('label' | 'comment'), addr, and value whenever the user edits the knowledge base
+        self.kb_changes = ObjectContainer(None, name='Knowledge base update notifier')
         self.sync = SyncControl(self)
+        # what the blocks of each function display in the disassembly views
+        self.block_objects = BlockObjectCache(self)
+
+        # caches register with the memory manager, which evicts from them once they take more than the budget
+        self.memory = MemoryManager(budget=Conf.memory_budget * 1024 * 1024, shared_objects=self._shared_objects)
+        # results of VFGGenerationJob and DDGGenerationJob, by function address
+        self.vfgs = ManagedCache(self.memory, 'VFGs')
+        self.ddgs = ManagedCache(self.memory, 'DDGs')
+        # variable managers of functions in the knowledge base that the disassembly views have displayed. evicted
+        # entries are removed from the knowledge base, and recovered again when their function is displayed.
+        self.variable_managers = ManagedCache(self.memory, 'Variable managers',
+                                              on_evict=self._on_variable_manager_evicted)
+        # states belong to the user, so they are accounted for but never evicted
+        self._state_sizes = ManagedCache(self.memory, 'States', evictable=False)
+        self.states.am_subscribe(self._on_states_changed)
+
+        # decompiles functions in a separate process. None unless it is enabled in the configuration.
+        self.analysis_server = None  # type: AnalysisServer
+        # the CFG of the whole binary, as it is sent to the analysis server. None until it has been generated.
+        self._analysis_server_cfg = None
+        self.kb_changes.am_subscribe(self._forward_kb_change)
+        self.cfg_container.am_subscribe(self._on_cfg_changed)
 
         self.cfg_args = None
 
@@ -42,6 +80,9 @@ class Instance:
 
         # The image name when loading image
         self.img_name = None
+        # where the project has been loaded from, if it has been loaded from a file
+        self.binary_path = None
+        self.load_options = None
 
     #
     # Properties
@@ -94,7 +135,8 @@ class Instance:
 
     def async_set_cfb(self, cfb):
         self.cfb_container.am_obj = cfb
-        # should not trigger a signal
+        # the CFB is still being filled in. listeners that only care about the final CFB should skip partial events.
+        self.cfb_container.am_event(partial=True)
 
     def set_project(self, project, cfg_args=None):
         self._project_container.am_obj = project
@@ -109,6 +151,13 @@ class Instance:
         # save cfg_args
         self.cfg_args = cfg_args
 
+        # tables of the previous project
+        self.block_objects.invalidate()
+        self.function_tags = { }
+        self.vfgs.clear()
+        self.ddgs.clear()
+        self.variable_managers.clear()
+
         # generate CFG
         cfg_job = self.generate_cfg()
 
@@ -120,13 +169,71 @@ class Instance:
             on_finish=self.workspace.on_cfg_generated,
             **self.cfg_args
         )
+        self._cfg_job = cfg_job
+        self.cfg_focus.am_obj = { }
         self.add_job(cfg_job)
         return cfg_job
 
+    def focus_cfg(self, addr):
+        """
+        Prioritize the CFG recovery of the code around an address, if the CFG is being generated in demand-driven mode.
+
+        :param int addr:    The address that the user navigated to.
+        :return:            True if the code around the address will be recovered next.
+        :rtype:             bool
+        """
+        if self._cfg_job is None or self._cfg_job not in self.jobs:
+            return False
+        return self._cfg_job.focus(addr)
+
+    def on_cfg_focused(self, addr, func):
+        if self._cfg_job not in self.jobs:
+            # the CFG of the whole binary is done already
+            return
+        self.cfg_focus.am_obj[addr] = func
+        self.cfg_focus.am_event(addr=addr, func=func)
+
+    def start_analysis_server(self, binary_path, load_options=None, cfg_args=None):
+        """
+        Load the binary into a separate process that decompiles functions for the code view, replacing the process of
+        the previous project.
+
+        :param str binary_path:     Path of the binary.
+        :param dict load_options:   Options that the project has been loaded with.
+        :param dict cfg_args:       Arguments that the CFG has been generated with.
+        :return:                    None
+        """
+
+        self.stop_analysis_server()
+        if cfg_args is not None:
+            # the analysis process generates the CFG of the whole binary in one go
+            cfg_args = { k: v for k, v in cfg_args.items() if k not in CFGGenerationJob.JOB_ARGS }
+        # the CFG of the previous project, if any, is not sent
+        self._analysis_server_cfg = None
+        self.analysis_server = AnalysisServer(binary_path, load_options=load_options, cfg_args=cfg_args,
+                                              memory_limit=Conf.decompilation_server_memory_limit * 1024 * 1024,
+                                              on_crash=self._on_analysis_server_crash,
+                                              seed=self._seed_analysis_server)
+        self.analysis_server.start()
+
+    def stop_analysis_server(self):
+        if self.analysis_server is not None:
+            self.analysis_server.stop()
+            self.analysis_server = None
+
     def add_job(self, job):
+        job.record.queued()
         self.jobs.append(job)
+        self.job_records.am_obj.append(job.record)
+        # jobs are also added from the worker thread
+        gui_thread_schedule_async(self.job_records.am_event)
         self._jobs_queue.put(job)
 
+    def remove_job(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.job_records.am_event()
+
     #
     # Private methods
     #
@@ -147,17 +254,89 @@ class Instance:
             job = self._jobs_queue.get()
             gui_thread_schedule_async(self._set_status, args=("Working...",))
 
+            job.record.started()
+            gui_thread_schedule_async(self.job_records.am_event)
             try:
                 result = job.run(self)
             except:
+                job.record.ended(failed=True)
                 self.workspace.log('Exception while running job "%s":\n' % job.name)
                 self.workspace.log(traceback.format_exc())
+                gui_thread_schedule_async(self.remove_job, args=(job,))
             else:
+                job.record.ended()
                 gui_thread_schedule_async(job.finish, args=(self, result))
 
+    def _forward_kb_change(self, kind=None, addr=None, value=None, **kwargs):
+        # keep names and comments in the analysis process up to date, so that they show up in its results
+        if self.analysis_server is None:
+            return
+        if kind == 'label':
+            self.analysis_server.call('set_label', addr, value)
+        elif kind == 'comment':
+            self.analysis_server.call('set_comment', addr, value)
+
+    def _seed_analysis_server(self):
+        # labels and comments that were edited before the analysis process started, and the CFG, if it is done
+        calls = [ ]
+        if self.project is not None:
+            kb = self.project.kb
+            labels = dict((addr, kb.labels[addr]) for addr in list(kb.labels))
+            calls.append(('set_kb', (labels, dict(kb.comments))))
+        if self._analysis_server_cfg is not None:
+            calls.append(('set_cfg', (self._analysis_server_cfg, )))
+        return calls
+
+    def _on_cfg_changed(self, **kwargs):  # pylint:disable=unused-argument
+        if self.analysis_server is not None and self.cfg is not None:
+            # serializing the CFG of a large binary takes a while
+            self._start_daemon_thread(self._send_cfg_to_analysis_server, 'Sending the CFG to the analysis server',
+                                      args=(self.analysis_server, self.cfg))
+
+    def _send_cfg_to_analysis_server(self, server, cfg):
+        functions = [ (func.addr, func.returning) for func in list(cfg.kb.functions.values()) ]
+        chunk = (cfg.model.serialize(), functions, [ ], cfg.kb.xrefs.serialize())
+        if server is not self.analysis_server:
+            # the project has been replaced in the meantime
+            return
+        self._analysis_server_cfg = chunk
+        server.call('set_cfg', chunk)
+
+    def _on_analysis_server_crash(self, exitcode):
+        # called from a background thread
+        if self.workspace is not None:
+            gui_thread_schedule_async(self.workspace.log, args=(
+                "The analysis server exited unexpectedly with exit code %s. It will be restarted with the next "
+                "request." % exitcode,))
+
     def _set_status(self, status_text):
         GlobalInfo.main_window.status = status_text
 
+    def _shared_objects(self):
+        # referenced by the entries of most caches, but owned by none of them
+        objects = [ self.cfg, self.cfb ]
+        project = self.project
+        if project is not None:
+            kb = project.kb
+            objects += [ project, project.loader, project.factory, kb ]
+            objects += list(kb._plugins.values())  # pylint:disable=protected-access
+        return [ obj for obj in objects if obj is not None ]
+
+    def _on_states_changed(self, **kwargs):  # pylint:disable=unused-argument
+        self._state_sizes.sync((id(state), state) for state in self.states)
+
+    def _on_variable_manager_evicted(self, func_addr, variable_manager):
+        # called on the thread of the memory manager
+        gui_thread_schedule_async(self._drop_variable_manager, args=(func_addr, variable_manager))
+
+    def _drop_variable_manager(self, func_addr, variable_manager):
+        if self.project is None or func_addr in self.variable_managers:
+            # displayed again in the meantime
+            return
+        function_managers = self.project.kb.variables.function_managers
+        if function_managers.get(func_addr, None) is variable_manager:
+            del function_managers[func_addr]
+
     def _refresh_cfg(self, cfg_job):
         time.sleep(1.0)
         while True:
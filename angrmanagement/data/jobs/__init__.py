@@ -5,3 +5,4 @@ from .ddg_generation import DDGGenerationJob
 from .simgr_explore import SimgrExploreJob
 from .simgr_step import SimgrStepJob
 from .vfg_generation import VFGGenerationJob
+from .telemetry import JobRecord, records_to_json, records_to_chrome_trace
@@ -1,22 +1,44 @@
 
 import time
 import logging
+import threading
+
+from angr import KnowledgeBase
 
 from ...logic import GlobalInfo
 from ...logic.threads import gui_thread_schedule_async
+from ...logic.parallel_cfg import recover_cfg_parallel
 from .job import Job
 
 _l = logging.getLogger(name=__name__)
 
 
 class CFGGenerationJob(Job):
+    """
+    Generate the CFG of the whole binary.
+
+    In demand-driven mode, the code around main (or the entry point) is recovered first, and whenever focus() is called
+    while the CFG is being generated, the code around the given address is recovered before the CFG of the whole binary
+    continues. These scoped passes are small CFGFast analyses with their own knowledge base; the functions they recover
+    are handed to Instance.on_cfg_focused() and are shown until the CFG of the whole binary is done.
+
+    In parallel mode, the executable regions are split into chunks whose CFGs are recovered in worker processes and
+    merged (see recover_cfg_parallel()). This needs the path and load options of the binary, so projects that have not
+    been loaded from a file are analyzed serially. The CFG is not shown until it is merged.
+
+    :cvar int FOCUS_WINDOW: How many bytes before and after the address a scoped pass covers.
+    """
 
     DEFAULT_CFG_ARGS = {
         'normalize': True,  # this is what people naturally expect
         'resolve_indirect_jumps': True,
     }
 
-    def __init__(self, on_finish=None, **kwargs):
+    FOCUS_WINDOW = 0x4000
+    # arguments of the job itself, which are not passed on to CFGFast
+    JOB_ARGS = {'demand_driven', 'parallel', }
+
+    def __init__(self, on_finish=None, demand_driven=False, parallel=False, **kwargs):
         super().__init__(name='CFG generation', on_finish=on_finish)
 
         # TODO: sanitize arguments
@@ -29,19 +51,59 @@ class CFGGenerationJob(Job):
 
         self.cfg_args = cfg_args
 
+        self.demand_driven = demand_driven
+        self.parallel = parallel
+
+        self._inst = None
         self._cfb = None
         self._last_progress_callback_triggered = None
 
+        # addresses to recover the CFG around, the most recent last
+        self._focus_lock = threading.Lock()
+        self._focus_queue = [ ]
+        self._focused = set()
+
+    def focus(self, addr):
+        """
+        Recover the CFG around an address before the rest of the binary. Thread-safe.
+
+        :param int addr:    The address that the user navigated to.
+        :return:            True if the address will be recovered, False if it has been or demand-driven mode is off.
+        :rtype:             bool
+        """
+        if not self.demand_driven:
+            return False
+        with self._focus_lock:
+            if addr in self._focused:
+                return False
+            if addr in self._focus_queue:
+                self._focus_queue.remove(addr)
+            self._focus_queue.append(addr)
+        return True
+
     def run(self, inst):
-        temp_cfb = inst.project.analyses.CFB()
-        self._cfb = temp_cfb
-        cfg = inst.project.analyses.CFG(progress_callback=self._progress_callback,
-                                        low_priority=True,
-                                        cfb=temp_cfb,
-                                        use_patches=True,
-                                        **self.cfg_args
-                                        )
-        self._cfb = None
+        self._inst = inst
+        if self.demand_driven:
+            # the fast initial scan
+            self.focus(self._initial_focus(inst.project))
+            self._recover_focus()
+
+        if self.parallel and inst.binary_path is not None:
+            cfg = recover_cfg_parallel(inst.project, inst.binary_path,
+                                       load_options=inst.load_options,
+                                       cfg_args=dict(self.cfg_args, use_patches=True),
+                                       progress_callback=self._progress_callback,
+                                       )
+        else:
+            temp_cfb = inst.project.analyses.CFB()
+            self._cfb = temp_cfb
+            cfg = inst.project.analyses.CFG(progress_callback=self._progress_callback,
+                                            low_priority=True,
+                                            cfb=temp_cfb,
+                                            use_patches=True,
+                                            **self.cfg_args
+                                            )
+            self._cfb = None
         # Build the real one
         cfb = inst.project.analyses.CFB(cfg=cfg)
 
@@ -52,6 +114,8 @@ class CFGGenerationJob(Job):
             cfg, cfb = result
             inst.cfb = cfb
             inst.cfg = cfg
+            # the CFG of the whole binary replaces all scoped passes
+            inst.cfg_focus.am_obj = { }
             super(CFGGenerationJob, self).finish(inst, result)
         except Exception:
             _l.error("Exception occurred in CFGGenerationJob.finish().", exc_info=True)
@@ -65,8 +129,13 @@ class CFGGenerationJob(Job):
 
     def _progress_callback(self, percentage, text=None, cfg=None):
 
+        # the CFG of the whole binary pauses while the code around the addresses the user navigated to is recovered
+        self._recover_focus()
+
         t = time.time()
         if self._last_progress_callback_triggered is not None and t - self._last_progress_callback_triggered < 0.2:
+            # Job._progress_callback() counts the reports that are not dropped here
+            self.record.progress_callbacks += 1
             return
         self._last_progress_callback_triggered = t
 
@@ -81,3 +150,57 @@ class CFGGenerationJob(Job):
     def _refresh(self, cfg, cfb):
         GlobalInfo.main_window.workspace.instance.async_set_cfg(cfg)
         GlobalInfo.main_window.workspace.instance.async_set_cfb(cfb)
+
+    @staticmethod
+    def _initial_focus(project):
+        main = project.loader.find_symbol('main')
+        if main is not None:
+            return main.rebased_addr
+        return project.entry
+
+    def _recover_focus(self):
+        while True:
+            with self._focus_lock:
+                if not self._focus_queue:
+                    return
+                # the address the user navigated to most recently
+                addr = self._focus_queue.pop()
+                self._focused.add(addr)
+
+            try:
+                func = self._recover_around(addr)
+            except Exception:  # pylint:disable=broad-except
+                _l.warning("Failed to recover the CFG around %#x.", addr, exc_info=True)
+                continue
+            if func is not None:
+                gui_thread_schedule_async(self._inst.on_cfg_focused, args=(addr, func))
+
+    def _recover_around(self, addr):
+        project = self._inst.project
+        start = max(addr - self.FOCUS_WINDOW, project.loader.min_addr)
+        end = min(addr + self.FOCUS_WINDOW, project.loader.max_addr)
+
+        function_starts = [ addr ]
+        # the address is more likely to be inside a function that the CFG of the whole binary has started on
+        # than at the start of a function
+        floor_func = project.kb.functions.floor_func(addr)
+        if floor_func is not None and start <= floor_func.addr < addr:
+            function_starts.insert(0, floor_func.addr)
+
+        cfg = project.analyses.CFGFast(kb=KnowledgeBase(project),
+                                       regions=[ (start, end) ],
+                                       function_starts=function_starts,
+                                       start_at_entry=False,
+                                       symbols=False,
+                                       function_prologues=False,
+                                       force_complete_scan=False,
+                                       use_patches=True,
+                                       normalize=self.cfg_args['normalize'],
+                                       resolve_indirect_jumps=self.cfg_args['resolve_indirect_jumps'],
+                                       )
+
+        for start_addr in function_starts:
+            func = cfg.kb.functions.function(addr=start_addr)
+            if func is not None and any(node.addr <= addr < node.addr + node.size for node in func.graph):
+                return func
+        return cfg.kb.functions.function(addr=addr)
@@ -1,19 +1,120 @@
+import logging
+import threading
+from functools import partial
 
+from ...logic.threads import gui_thread_schedule_async
 from .job import Job
 
+_l = logging.getLogger(__name__)
+
+
+def function_version(func):
+    """
+    Get what the tags of a function depend on. Tags that were computed for a function with the same address and version
+    are still valid.
+
+    :param angr.knowledge_plugins.Function func:    The function.
+    :return:                                        A hashable version of the function.
+    """
+    return frozenset(func.block_addrs_set)
+
 
 class CodeTaggingJob(Job):
+    """
+    Tag all functions of the CFG.
+
+    Functions are tagged in chunks. The tags of each chunk are set on its functions as soon as the chunk is done, and
+    Instance.code_tags fires with the addresses of these functions.
 
-    def __init__(self, on_finish=None):
+    Chunks are tagged one after the other on the thread of the job. Tagging is dominated by lifting blocks, which pyvex
+    serializes with a global lock, and the lifter and block caches of the project are not safe to share between threads.
+
+    Tags are remembered in Instance.function_tags, so functions whose version has not changed since they were tagged
+    are skipped. A cancelled job is resumed by adding a new CodeTaggingJob, which only tags the functions that the
+    cancelled one did not reach.
+    """
+
+    CHUNK_SIZE = 32
+
+    def __init__(self, on_finish=None, chunk_size=None):
         super(CodeTaggingJob, self).__init__(name="Code tagging", on_finish=on_finish)
+        self.chunk_size = chunk_size if chunk_size is not None else self.CHUNK_SIZE
+
+        self._cancelled = threading.Event()
+        self._tagged = 0  # functions that have been tagged so far
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """
+        Stop tagging. Chunks that are being tagged stop after their current function, and the tags of all functions
+        that have been tagged so far are kept.
+
+        :return:    None
+        """
+        self._cancelled.set()
 
     def run(self, inst):
-        for func in inst.cfg.functions.values():
-            ct = inst.project.analyses.CodeTagging(func)
-            func.tags = tuple(ct.tags)
+        if self.cancelled or inst.cfg is None:
+            return 0
+
+        cache = inst.function_tags
+        pending = [ ]
+        reused = [ ]
+        for func in list(inst.cfg.functions.values()):
+            version = function_version(func)
+            known = cache.get(func.addr, None)
+            if known is not None and known[0] == version:
+                func.tags = known[1]
+                reused.append(func.addr)
+            else:
+                pending.append((func, version))
+
+        if reused:
+            self._publish(inst, reused)
+        if not pending:
+            return 0
 
-    def finish(self, inst, result):
-        super(CodeTaggingJob, self).finish(inst, result)
+        chunks = [ pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size) ]
+        self._tagged = 0
+        for chunk in chunks:
+            self._set_tags(inst, cache, self._tag_chunk(inst.project, chunk), len(pending))
+            if self.cancelled:
+                break
+        return self._tagged
 
     def __repr__(self):
-        return "Tagging Code"
\ No newline at end of file
+        return "Tagging Code"
+
+    #
+    # Private methods
+    #
+
+    def _set_tags(self, inst, cache, results, total):
+        for func, version, tags in results:
+            func.tags = tags
+            cache[func.addr] = (version, tags)
+        self._tagged += len(results)
+        self._publish(inst, [ func.addr for func, _, _ in results ])
+        self._progress_callback(self._tagged * 100.0 / total, text="%d/%d" % (self._tagged, total))
+
+    def _tag_chunk(self, project, chunk):
+        results = [ ]
+        for func, version in chunk:
+            if self.cancelled:
+                break
+            try:
+                tags = tuple(project.analyses.CodeTagging(func).tags)
+            except Exception:  # pylint:disable=broad-except
+                # remembered without tags, so that it is not tried again until it changes
+                _l.warning("Failed to tag function %#x.", func.addr, exc_info=True)
+                tags = ()
+            results.append((func, version, tags))
+        return results
+
+    @staticmethod
+    def _publish(inst, addrs):
+        if addrs:
+            gui_thread_schedule_async(partial(inst.code_tags.am_event, addrs=addrs))
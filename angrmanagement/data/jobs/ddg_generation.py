@@ -10,7 +10,11 @@ class DDGGenerationJob(Job):
         self._addr = addr
 
     def run(self, inst):
-        ddg = inst.project.analyses.VSA_DDG(vfg=inst.vfgs[self._addr], start_addr=self._addr)
+        vfg = inst.vfgs.get(self._addr, None)
+        if vfg is None:
+            # never generated, or evicted by the memory manager
+            vfg = inst.project.analyses.VFG(function_start=self._addr)
+        ddg = inst.project.analyses.VSA_DDG(vfg=vfg, start_addr=self._addr)
         return ddg, networkx.relabel_nodes(ddg.graph, lambda n: n.insn_addr)
 
     def finish(self, inst, result):
@@ -1,12 +1,15 @@
 
 from ...logic import GlobalInfo
 from ...logic.threads import gui_thread_schedule_async
+from .telemetry import JobRecord
 
 
 class Job:
     def __init__(self, name, on_finish=None):
         self.name = name
         self.progress_percentage = 0.
+        # what the job cost, see Instance.job_records
+        self.record = JobRecord(name)
 
         # callbacks
         self._on_finish = on_finish
@@ -15,13 +18,16 @@ class Job:
         raise NotImplementedError()
 
     def finish(self, inst, result):
-        inst.jobs = inst.jobs[1:]
+        self.record.finished()
+        # jobs do not necessarily finish in the order they were queued in
+        inst.remove_job(self)
 
         gui_thread_schedule_async(self._finish_progress)
         if self._on_finish:
             gui_thread_schedule_async(self._on_finish)
 
     def _progress_callback(self, percentage, text=None):
+        self.record.progress_callbacks += 1
         delta = percentage - self.progress_percentage
 
         if delta > 1.0:
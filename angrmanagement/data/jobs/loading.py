@@ -7,6 +7,7 @@ except ImportError:
     archr = None
 
 from .job import Job
+from ...config import Conf
 from ...logic.threads import gui_thread_schedule
 from ...ui.dialogs import LoadBinary
 
@@ -33,6 +34,8 @@ class LoadTargetJob(Job):
             # Create the project, load it, then record the image name on success
             proj = apb.fire(use_sim_procedures=True, load_options=load_options)
             self._progress_callback(95)
+            inst.binary_path = None
+            inst.load_options = None
             inst.set_project(proj, cfg_args=cfg_args)
 
 
@@ -43,13 +46,29 @@ class LoadBinaryJob(Job):
 
     def run(self, inst):
         self._progress_callback(5)
-        partial_ld = cle.Loader(self.fname, perform_relocations=False)
+        # only the main object. the options dialog lists the libraries that it depends on, which are loaded once the
+        # user has picked the ones to load.
+        partial_ld = cle.Loader(self.fname, auto_load_libs=False)
         self._progress_callback(50)
         load_options, cfg_args = gui_thread_schedule(LoadBinary.run, (partial_ld, ))
-        partial_ld.close()
         if cfg_args is None:
+            partial_ld.close()
             return
 
-        proj = angr.Project(self.fname, load_options=load_options)
+        if self._loads_libraries(load_options):
+            partial_ld.close()
+            proj = angr.Project(self.fname, load_options=load_options)
+        else:
+            # the partial loader holds everything that the project needs already
+            proj = angr.Project(partial_ld)
         self._progress_callback(95)
+        inst.binary_path = self.fname
+        inst.load_options = load_options
         inst.set_project(proj, cfg_args)
+
+        if Conf.decompilation_server_enabled:
+            inst.start_analysis_server(self.fname, load_options=load_options, cfg_args=cfg_args)
+
+    @staticmethod
+    def _loads_libraries(load_options):
+        return bool(load_options.get('auto_load_libs', True) or load_options.get('force_load_libs', None))
@@ -1,18 +1,29 @@
+import time
 
+from ...config import Conf
+from ...logic.threads import gui_thread_schedule_async
 from .job import Job
 
 
 class SimgrExploreJob(Job):
-    def __init__(self, simgr, find=None, avoid=None, step_callback=None, callback=None):
+    def __init__(self, simgr, find=None, avoid=None, step_callback=None, callback=None, on_progress=None,
+                 update_interval=None):
         super(SimgrExploreJob, self).__init__('Simulation manager exploring')
         self._simgr = simgr
         self._find = find
         self._avoid = avoid
         self._callback = callback
         self._step_callback = step_callback
+        self._on_progress = on_progress
+        self._update_interval = Conf.symexec_explore_update_interval if update_interval is None else update_interval
+
+        # coalescing of progress updates: at most one update is in flight to the GUI thread at any time, and updates
+        # are sampled no more often than every _update_interval seconds
+        self._last_update = 0.
+        self._update_pending = False
 
     def run(self, inst):
-        self._simgr.explore(find=self._find, avoid=self._avoid, step_func=self._step_callback)
+        self._simgr.explore(find=self._find, avoid=self._avoid, step_func=self._step)
 
         return self._simgr
 
@@ -27,4 +38,35 @@ class SimgrExploreJob(Job):
     def create(cls, simgr, **kwargs):
         def callback(result):
             simgr.am_event(src='job_done', job='explore', result=result)
-        return cls(simgr, callback=callback, **kwargs)
+        def on_progress(stashes):
+            simgr.am_event(src='explore_progress', stashes=stashes)
+        return cls(simgr, callback=callback, on_progress=on_progress, **kwargs)
+
+    #
+    # Private methods
+    #
+
+    def _step(self, simgr):
+        if self._step_callback is not None:
+            simgr = self._step_callback(simgr)
+
+        if self._on_progress is None or self._update_pending:
+            return simgr
+
+        now = time.monotonic()
+        if now - self._last_update >= self._update_interval:
+            self._last_update = now
+            self._update_pending = True
+            # take a snapshot of all stashes so that the GUI thread never iterates over lists that are being mutated
+            stashes = dict((stash_name, list(stash)) for stash_name, stash in simgr.stashes.items())
+            gui_thread_schedule_async(self._post_progress, args=(stashes,))
+
+        return simgr
+
+    def _post_progress(self, stashes):
+        try:
+            self._on_progress(stashes)
+        finally:
+            # only now, so that no further snapshot is taken while the GUI is still busy with this one. a handler that
+            # raises must not suppress all later updates.
+            self._update_pending = False
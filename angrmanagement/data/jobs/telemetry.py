@@ -0,0 +1,185 @@
+import sys
+import time
+import json
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _max_rss():
+    """
+    Get the peak resident set size of the process so far, in bytes, or None where it is unknown.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS, and in kilobytes everywhere else
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class JobRecord:
+    """
+    What a job cost. Every job has one, which Instance fills in as the job is queued, run, and finished.
+
+    CPU time is that of the worker thread; work that a job hands to other threads or processes is only included in the
+    CPU time of the process. Memory is the peak resident set size of the whole process, which never decreases, so a job
+    that raises it is one that needed more memory than any job before it.
+
+    :ivar str name:                 Name of the job.
+    :ivar str status:               One of the STATUS_* constants.
+    :ivar float queued_at:          When the job was queued, from time.time().
+    :ivar float started_at:         When the worker thread started the job.
+    :ivar float ended_at:           When Job.run() returned or raised.
+    :ivar float finished_at:        When Job.finish() was called on the GUI thread.
+    :ivar float cpu_time:           CPU time of the worker thread in Job.run(), in seconds.
+    :ivar float process_cpu_time:   CPU time of the process during Job.run(), in seconds.
+    :ivar int peak_memory:          Peak resident set size of the process when the job ended, in bytes.
+    :ivar int memory_growth:        How many bytes the peak resident set size grew by during the job.
+    :ivar int progress_callbacks:   How often the job reported progress.
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    __slots__ = ('name', 'status', 'queued_at', 'started_at', 'ended_at', 'finished_at', 'cpu_time',
+                 'process_cpu_time', 'peak_memory', 'memory_growth', 'progress_callbacks',
+                 '_thread_time', '_process_time', '_max_rss', )
+
+    def __init__(self, name):
+        self.name = name
+        self.status = self.STATUS_QUEUED
+        self.queued_at = None
+        self.started_at = None
+        self.ended_at = None
+        self.finished_at = None
+        self.cpu_time = None
+        self.process_cpu_time = None
+        self.peak_memory = None
+        self.memory_growth = None
+        self.progress_callbacks = 0
+
+        self._thread_time = None
+        self._process_time = None
+        self._max_rss = None
+
+    #
+    # Properties
+    #
+
+    @property
+    def queue_wait(self):
+        if self.queued_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def wall_time(self):
+        if self.started_at is None:
+            return None
+        return (self.ended_at if self.ended_at is not None else time.time()) - self.started_at
+
+    @property
+    def progress_rate(self):
+        """
+        Progress reports per second of wall time.
+        """
+        wall_time = self.wall_time
+        if not wall_time:
+            return None
+        return self.progress_callbacks / wall_time
+
+    #
+    # Public methods
+    #
+
+    def queued(self):
+        self.queued_at = time.time()
+
+    def started(self):
+        """
+        Must be called on the thread that runs the job.
+        """
+        self.status = self.STATUS_RUNNING
+        self.started_at = time.time()
+        self._thread_time = time.thread_time()
+        self._process_time = time.process_time()
+        self._max_rss = _max_rss()
+
+    def ended(self, failed=False):
+        """
+        Must be called on the thread that runs the job.
+        """
+        self.ended_at = time.time()
+        self.cpu_time = time.thread_time() - self._thread_time
+        self.process_cpu_time = time.process_time() - self._process_time
+        self.peak_memory = _max_rss()
+        if self.peak_memory is not None:
+            self.memory_growth = self.peak_memory - self._max_rss
+        self.status = self.STATUS_FAILED if failed else self.STATUS_DONE
+
+    def finished(self):
+        self.finished_at = time.time()
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'status': self.status,
+            'queued_at': self.queued_at,
+            'started_at': self.started_at,
+            'ended_at': self.ended_at,
+            'finished_at': self.finished_at,
+            'queue_wait': self.queue_wait,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'process_cpu_time': self.process_cpu_time,
+            'peak_memory': self.peak_memory,
+            'memory_growth': self.memory_growth,
+            'progress_callbacks': self.progress_callbacks,
+            'progress_rate': self.progress_rate,
+        }
+
+
+def records_to_json(records):
+    """
+    Export job records as JSON.
+
+    :param list records:    JobRecords.
+    :return:                A JSON document with one object per job.
+    :rtype:                 str
+    """
+    return json.dumps([ record.to_dict() for record in records ], indent=2)
+
+
+def records_to_chrome_trace(records):
+    """
+    Export job records in the trace event format, which chrome://tracing and Perfetto open. Every job is a span on the
+    worker thread, preceded by an async span for the time it waited in the queue. Jobs wait in the queue at the same
+    time, so their waits are async events with the index of the job as id, which viewers put on tracks of their own
+    instead of nesting them.
+
+    :param list records:    JobRecords.
+    :return:                A JSON document.
+    :rtype:                 str
+    """
+
+    def us(t):
+        return int(t * 1000000)
+
+    events = [
+        {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'Worker thread'}},
+    ]
+    for idx, record in enumerate(records):
+        if record.queued_at is not None and record.started_at is not None:
+            events.append({'name': record.name, 'cat': 'queue', 'ph': 'b', 'id': idx, 'pid': 1, 'tid': 1,
+                           'ts': us(record.queued_at)})
+            events.append({'name': record.name, 'cat': 'queue', 'ph': 'e', 'id': idx, 'pid': 1, 'tid': 1,
+                           'ts': us(record.started_at)})
+        if record.started_at is not None and record.ended_at is not None:
+            events.append({'name': record.name, 'cat': 'job', 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': us(record.started_at), 'dur': us(record.ended_at - record.started_at),
+                           'args': record.to_dict()})
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
@@ -0,0 +1,430 @@
+import gc
+import sys
+import types
+import queue
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+
+_l = logging.getLogger(__name__)
+
+# objects of these types are part of the program rather than of the data that a cache holds
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                  types.CodeType, types.FrameType, )
+
+
+def estimate_size(obj, shared=(), max_objects=100000):
+    """
+    Estimate how many bytes an object takes, together with everything that it references. Modules, classes, functions,
+    and the shared objects, e.g., the project or the knowledge base, are not counted, and neither is anything that is
+    only referenced through them.
+
+    :param obj:                 The object.
+    :param iterable shared:     Objects that are not counted.
+    :param int max_objects:     The walk stops after this many objects, so the size of larger objects is underestimated.
+    :return:                    The estimated size in bytes.
+    :rtype:                     int
+    """
+
+    seen = set(id(o) for o in shared)
+    stack = [ obj ]
+    size = 0
+    count = 0
+    while stack and count < max_objects:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _SKIPPED_TYPES):
+            continue
+        seen.add(id(o))
+        count += 1
+        try:
+            size += sys.getsizeof(o)
+        except TypeError:
+            pass
+        stack.extend(gc.get_referents(o))
+    return size
+
+
+class _Entry:
+
+    __slots__ = ('value', 'size', 'last_used', )
+
+    def __init__(self, value, last_used):
+        self.value = value
+        self.size = None  # unknown until it has been estimated
+        self.last_used = last_used
+
+
+class ManagedCache:
+    """
+    A dict-like cache whose entries MemoryManager accounts for. Entries are estimated on a background thread after they
+    are added, and the least recently used entries of all caches are evicted once the evictable caches take more memory
+    than the budget. Pinned entries are accounted for but never evicted. Caches that are not evictable are only
+    accounted for, and do not count towards the budget.
+
+    Reading an entry with [] or get() counts as using it. All methods can be called from any thread.
+
+    :ivar str name:         Name of the cache in the breakdown of the memory manager.
+    :ivar bool evictable:   Whether entries may be evicted.
+    """
+
+    def __init__(self, manager, name, estimate=None, on_evict=None, evictable=True):
+        """
+        :param MemoryManager manager:   The memory manager to register with.
+        :param str name:                Name of the cache.
+        :param estimate:                Called with a value and the objects that are not counted, returns the size of
+                                        the value in bytes. Defaults to estimate_size().
+        :param on_evict:                Called with the key and the value of every evicted entry, on the thread of the
+                                        memory manager.
+        :param bool evictable:          Whether entries may be evicted.
+        """
+
+        self.name = name
+        self.evictable = evictable
+        self._manager = manager
+        self._estimate = estimate if estimate is not None else estimate_size
+        self._on_evict = on_evict
+
+        self._entries = OrderedDict()  # key -> _Entry, the least recently used first
+        self._pins = { }  # key -> number of times it has been pinned
+        self._size = 0
+
+        manager.register(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getitem__(self, key):
+        with self._manager.lock:
+            entry = self._entries[key]
+            self._touch(key, entry)
+            return entry.value
+
+    def __setitem__(self, key, value):
+        with self._manager.lock:
+            old = self._entries.pop(key, None)
+            if old is not None and old.size is not None:
+                self._size -= old.size
+            self._entries[key] = _Entry(value, self._manager.tick())
+        self._manager.estimate_later(self, key)
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    #
+    # Properties
+    #
+
+    @property
+    def size(self):
+        """
+        Estimated size of all entries in bytes. Entries that have yet to be estimated are not included.
+        """
+        return self._size
+
+    @property
+    def pinned(self):
+        return len(self._pins)
+
+    #
+    # Public methods
+    #
+
+    def get(self, key, default=None):
+        with self._manager.lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return default
+            self._touch(key, entry)
+            return entry.value
+
+    def pop(self, key, *args):
+        with self._manager.lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                if args:
+                    return args[0]
+                raise KeyError(key)
+            if entry.size is not None:
+                self._size -= entry.size
+            return entry.value
+
+    def clear(self):
+        with self._manager.lock:
+            self._entries.clear()
+            self._size = 0
+
+    def release(self):
+        """
+        Remove all entries and pins, and unregister from the memory manager, e.g., because the owner of the cache is
+        gone. The cache must not be used afterwards.
+
+        :return:    None
+        """
+        with self._manager.lock:
+            self.clear()
+            self._pins.clear()
+            self._manager.unregister(self)
+
+    def keys(self):
+        with self._manager.lock:
+            return list(self._entries)
+
+    def values(self):
+        with self._manager.lock:
+            return [ entry.value for entry in self._entries.values() ]
+
+    def items(self):
+        with self._manager.lock:
+            return [ (key, entry.value) for key, entry in self._entries.items() ]
+
+    def touch(self, key):
+        """
+        Mark an entry as used, without reading it.
+        """
+        with self._manager.lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                self._touch(key, entry)
+
+    def pin(self, key):
+        """
+        Keep an entry from being evicted, e.g., because a view displays it. An entry can be pinned before it is added,
+        and must be unpinned as often as it has been pinned.
+        """
+        with self._manager.lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key):
+        with self._manager.lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def sync(self, items):
+        """
+        Make the cache hold exactly the given entries. Entries that the cache holds already keep their sizes, so that
+        only new entries are estimated. This is how collections that the cache does not own, e.g., a list of states, are
+        accounted for.
+
+        :param iterable items:  (key, value) tuples.
+        :return:                None
+        """
+
+        items = dict(items)
+        with self._manager.lock:
+            for key in [ key for key, entry in self._entries.items()
+                         if key not in items or items[key] is not entry.value ]:
+                self.pop(key)
+            added = [ key for key in items if key not in self._entries ]
+            for key in added:
+                self._entries[key] = _Entry(items[key], self._manager.tick())
+        for key in added:
+            self._manager.estimate_later(self, key)
+
+    #
+    # Private methods
+    #
+
+    def _touch(self, key, entry):
+        entry.last_used = self._manager.tick()
+        self._entries.move_to_end(key)
+
+    def _oldest(self):
+        """
+        The least recently used entry that may be evicted, as a (key, entry) tuple, or None.
+        """
+        if not self.evictable:
+            return None
+        for key, entry in self._entries.items():
+            if key not in self._pins:
+                return key, entry
+        return None
+
+    def _set_size(self, key, value, size):
+        entry = self._entries.get(key, None)
+        # the entry may have been replaced or removed while it was being estimated
+        if entry is None or entry.value is not value or entry.size is not None:
+            return
+        entry.size = size
+        self._size += size
+
+
+class MemoryManager:
+    """
+    Accounts for the memory that caches take, and keeps them within a global budget. Components register their caches
+    by creating ManagedCaches. Once the evictable caches take more than the budget, the least recently used entries are
+    evicted, whichever cache they are in, until the caches fit again. Caches that are not evictable, e.g., the states
+    of the user, are accounted for but do not count towards the budget, since evicting other entries would not make
+    them any smaller.
+
+    Sizes are estimated on a background thread, so adding an entry is as cheap as adding it to a dict, and the caches
+    may exceed the budget until their new entries have been estimated.
+
+    :ivar int budget:       Budget in bytes, or 0 for no limit.
+    :ivar int evictions:    How many entries have been evicted so far.
+    :ivar int evicted_size: How many bytes the evicted entries took.
+    """
+
+    def __init__(self, budget=0, shared_objects=None):
+        """
+        :param int budget:      Budget in bytes, or 0 for no limit.
+        :param shared_objects:  Called without arguments, returns the objects that sizes of entries must not include,
+                                because entries merely reference them.
+        """
+
+        self.budget = budget
+        self.evictions = 0
+        self.evicted_size = 0
+        self.lock = threading.RLock()
+
+        self._caches = [ ]
+        self._shared_objects = shared_objects
+        self._clock = itertools.count()
+        self._pending = queue.Queue()  # (ManagedCache, key) of entries to estimate
+        self._estimator = None
+        self._over_budget = False  # whether pinned entries alone have been found to take more than the budget
+
+    #
+    # Properties
+    #
+
+    @property
+    def caches(self):
+        with self.lock:
+            return list(self._caches)
+
+    @property
+    def total_size(self):
+        with self.lock:
+            return sum(cache.size for cache in self._caches)
+
+    @property
+    def evictable_size(self):
+        """
+        Estimated size of all evictable caches in bytes, which is what the budget applies to.
+        """
+        with self.lock:
+            return sum(cache.size for cache in self._caches if cache.evictable)
+
+    #
+    # Public methods
+    #
+
+    def register(self, cache):
+        with self.lock:
+            self._caches.append(cache)
+
+    def unregister(self, cache):
+        with self.lock:
+            if cache in self._caches:
+                self._caches.remove(cache)
+
+    def tick(self):
+        return next(self._clock)
+
+    def set_budget(self, budget):
+        """
+        Change the budget, and evict entries if the caches no longer fit.
+
+        :param int budget:  Budget in bytes, or 0 for no limit.
+        :return:            None
+        """
+
+        self.budget = budget
+        self.enforce()
+
+    def estimate_later(self, cache, key):
+        self._pending.put((cache, key))
+        if self._estimator is None:
+            self._estimator = threading.Thread(target=self._estimate_routine, name='Memory manager', daemon=True)
+            self._estimator.start()
+
+    def enforce(self, budget=None):
+        """
+        Evict the least recently used entries until the evictable caches fit into the budget.
+
+        :param int budget:  Budget in bytes to enforce instead of the configured one, e.g., 0 to evict everything that
+                            can be evicted.
+        :return:            How many entries have been evicted.
+        :rtype:             int
+        """
+
+        configured = budget is None
+        if configured:
+            if not self.budget:
+                return 0
+            budget = self.budget
+
+        evicted = [ ]
+        with self.lock:
+            total = sum(cache.size for cache in self._caches if cache.evictable)
+            over_budget = False
+            while total > budget:
+                candidates = [ (cache, oldest) for cache, oldest in ((cache, cache._oldest()) for cache in self._caches)
+                               if oldest is not None ]
+                if not candidates:
+                    # only pinned entries are left
+                    over_budget = True
+                    break
+                cache, (key, entry) = min(candidates, key=lambda c: c[1][1].last_used)
+                cache.pop(key)
+                total -= entry.size or 0
+                self.evictions += 1
+                self.evicted_size += entry.size or 0
+                evicted.append((cache, key, entry))
+
+        for cache, key, entry in evicted:
+            if cache._on_evict is not None:  # pylint:disable=protected-access
+                try:
+                    cache._on_evict(key, entry.value)  # pylint:disable=protected-access
+                except Exception:  # pylint:disable=broad-except
+                    _l.warning("Failed to evict an entry of cache %s.", cache.name, exc_info=True)
+        if evicted:
+            _l.debug("Evicted %d entries to fit into the budget of %d bytes.", len(evicted), budget)
+        if configured:
+            if over_budget and not self._over_budget:
+                _l.warning("Pinned cache entries take %d bytes, which is more than the budget of %d bytes.", total,
+                           budget)
+            self._over_budget = over_budget
+        return len(evicted)
+
+    def breakdown(self):
+        """
+        Get how much memory each cache takes.
+
+        :return:    A list of (name, entries, pinned entries, size in bytes, evictable) tuples.
+        :rtype:     list
+        """
+
+        with self.lock:
+            return [ (cache.name, len(cache), cache.pinned, cache.size, cache.evictable) for cache in self._caches ]
+
+    #
+    # Private methods
+    #
+
+    def _estimate_routine(self):
+        while True:
+            cache, key = self._pending.get()
+            with self.lock:
+                entry = cache._entries.get(key, None)  # pylint:disable=protected-access
+                if entry is None or entry.size is not None:
+                    continue
+                value = entry.value
+
+            shared = self._shared_objects() if self._shared_objects is not None else ()
+            try:
+                size = cache._estimate(value, shared)  # pylint:disable=protected-access
+            except Exception:  # pylint:disable=broad-except
+                _l.debug("Failed to estimate the size of an entry of cache %s.", cache.name, exc_info=True)
+                size = 0
+
+            with self.lock:
+                cache._set_size(key, value, size)  # pylint:disable=protected-access
+            self.enforce()
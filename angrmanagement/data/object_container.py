@@ -1,22 +1,44 @@
 
 from ..utils.namegen import NameGenerator
+from .event_bus import event_bus, Subscription
 
 
 class EventSentinel:
-    def __init__(self):
-        self.am_subscribers = []
+    """
+    Something that can be subscribed to. Events are delivered through the event bus, see EventBus for how subscribers
+    are called.
+    """
 
-    def am_subscribe(self, listener):
+    def __init__(self):
+        self.am_subscribers = []  # Subscription objects, in the order they are called
+
+    def am_subscribe(self, listener, priority=0, coalesce=False):
+        """
+        Subscribe to events.
+
+        :param listener:        A callable that takes the keyword arguments of events. Bound methods are only
+                                referenced weakly.
+        :param int priority:    Listeners with higher priorities are called first.
+        :param bool coalesce:   Call the listener at most once per frame, with all events since the last call merged.
+        :return:                None
+        """
         if listener is not None:
-            self.am_subscribers.append(listener)
+            sub = Subscription(listener, priority=priority, coalesce=coalesce)
+            idx = len(self.am_subscribers)
+            while idx > 0 and self.am_subscribers[idx - 1].priority < priority:
+                idx -= 1
+            self.am_subscribers.insert(idx, sub)
 
     def am_unsubscribe(self, listener):
         if listener is not None:
-            self.am_subscribers.remove(listener)
+            for idx, sub in enumerate(self.am_subscribers):
+                if sub.listener == listener:
+                    del self.am_subscribers[idx]
+                    return
+            raise ValueError("%r is not subscribed." % (listener, ))
 
     def am_event(self, **kwargs):
-        for listener in self.am_subscribers:
-            listener(**kwargs)
+        event_bus.publish(self, kwargs)
 
 
 class ObjectContainer(EventSentinel):
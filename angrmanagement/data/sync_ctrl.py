@@ -1,8 +1,9 @@
-
 import time
 import threading
+import logging
 
 from .object_container import ObjectContainer
+from ..logic.threads import gui_thread_schedule_async
 
 
 try:
@@ -10,6 +11,8 @@ try:
 except ImportError:
     binsync = None
 
+_l = logging.getLogger(__name__)
+
 
 class SyncControlStatus:
     NO_PROJECT = 0
@@ -29,7 +32,11 @@ STATUS_TEXT = {
 class SyncControl:
     """
     Interfaces with project.kb.sync (so, please avoid duplicated logic). Provide properties with subscribable events.
-    Routinely pulls updates and pushes new changes at a user-controllable interval.
+
+    Local changes to the knowledge base (reported through instance.kb_changes) are collected and pushed together shortly
+    after they are made. Remote changes are pulled at a user-controllable interval, and subscribers of users_container
+    are only notified when the revision of at least one user has changed. The names of those users are passed as
+    changed_users.
     """
     def __init__(self, instance):
         self.instance = instance
@@ -40,15 +47,27 @@ class SyncControl:
 
         # Subscribe to project creation
         self.instance.project_container.am_subscribe(self._initialize)
+        # Subscribe to local changes
+        self.instance.kb_changes.am_subscribe(self._on_kb_changed)
 
-        # How often do we call the client and update our information?
+        # How often do we pull remote changes?
         self._refresh_interval = 10
-        # How often do we commit?
-        self._update_interval = 10
+        # Local changes that are made within this many seconds of each other are pushed together
+        self._push_delay = 0.5
 
         self._last_refresh_ts = 0
         self._last_update_ts = 0
 
+        # local changes that have not been pushed yet. only the latest value of each address is kept.
+        self._lock = threading.Lock()
+        self._pending_labels = { }
+        self._pending_comments = { }
+        self._wakeup = threading.Event()
+
+        # the last known revision of each user, and when it was last seen changing
+        self._user_revisions = { }
+        self._user_update_ts = { }
+
     @property
     def status(self):
         if self.project is None:
@@ -76,6 +95,15 @@ class SyncControl:
     def last_update_timestamp(self):
         return self._last_update_ts
 
+    def user_update_timestamp(self, user_name):
+        """
+        Get the time when changes from a user were last pulled.
+
+        :param str user_name:   Name of the user.
+        :return:                A timestamp, or None if no changes from this user have been seen yet.
+        """
+        return self._user_update_ts.get(user_name, None)
+
     def _initialize(self, **kwargs):
         self.project = self.instance.project
 
@@ -85,6 +113,16 @@ class SyncControl:
             raise ImportError("binsync is not installed.")
 
         client = binsync.Client(user, repo_path, init_repo=init_repo, remote_url=remote_url)
+        self.connect_client(client)
+
+    def connect_client(self, client):
+        """
+        Connect to a sync repo through a client that has already been created.
+
+        :param client:  A binsync.Client, or anything that project.kb.sync accepts as one.
+        :return:        None
+        """
+
         self.project.kb.sync.connect(client)
 
         # Spawn the worker thread
@@ -92,25 +130,111 @@ class SyncControl:
         thr.start()
 
     def worker_routine(self):
-        while self.status == SyncControlStatus.CONNECTED:
-
-            ts = time.time()
-
-            if ts - self._last_refresh_ts > self._refresh_interval:
-                # update users
-                self.users_container.am_obj = list(self.project.kb.sync.users())
-                self.users_container.am_event()
+        self._pull_changes(False)
 
-                # update tally information
-                self.tally_container.am_obj = self.project.kb.sync.tally()
-                self.tally_container.am_event()
-
-                self._last_refresh_ts = ts
-
-            if ts - self._last_update_ts > self._update_interval:
-                # commit stuff
-                self.project.kb.sync.update()
-
-                self._last_update_ts = ts
+        while self.status == SyncControlStatus.CONNECTED:
 
-            time.sleep(0.5)
+            if self._wakeup.wait(timeout=self._refresh_interval):
+                # give the user a moment to make more changes, so they all end up in the same commit
+                time.sleep(self._push_delay)
+                self._wakeup.clear()
+
+            pushed = self._push_changes()
+            self._pull_changes(pushed)
+
+    #
+    # Private methods
+    #
+
+    def _on_kb_changed(self, kind=None, addr=None, value=None, **kwargs):
+        if self.status != SyncControlStatus.CONNECTED:
+            return
+
+        with self._lock:
+            if kind == 'label':
+                self._pending_labels[addr] = value
+            elif kind == 'comment':
+                self._pending_comments[addr] = value
+            else:
+                return
+        self._wakeup.set()
+
+    def _push_changes(self):
+        """
+        Commit all local changes since the last push.
+
+        :return:    True if anything has been committed, False otherwise.
+        :rtype:     bool
+        """
+
+        with self._lock:
+            labels, self._pending_labels = self._pending_labels, { }
+            comments, self._pending_comments = self._pending_comments, { }
+
+        if not labels and not comments:
+            return False
+
+        kb = self.project.kb
+
+        # binsync stores names of functions, but not other labels
+        for addr in labels:
+            func = kb.functions.function(addr=addr)
+            if func is not None:
+                kb.sync.push_function(func)
+            else:
+                _l.debug("Label at %#x is not a function name and is not synchronized.", addr)
+
+        comments = dict((addr, comment) for addr, comment in comments.items() if comment is not None)
+        if comments:
+            kb.sync.push_comments(comments)
+
+        kb.sync.commit()
+        self._last_update_ts = time.time()
+        return True
+
+    def _pull_changes(self, pushed):
+        """
+        Pull remote changes, and notify subscribers if any user has a new revision.
+
+        binsync cannot pull the changes of single users, nor tell which users have new revisions without a pull: pull()
+        fetches the whole sync repo, which git keeps incremental, and the revisions of all users are then read from the
+        local repo by users() and tally(). Only subscribers are limited to the users whose revisions have changed.
+
+        :param bool pushed: Whether new local commits should be pushed as well.
+        :return:            None
+        """
+
+        sync = self.project.kb.sync
+        if pushed or not hasattr(sync, 'pull'):
+            # update() pushes our commits as well
+            sync.update()
+        else:
+            sync.pull()
+
+        ts = time.time()
+        self._last_refresh_ts = ts
+
+        # local reads, which do not touch the remote
+        users = list(sync.users())
+        tally = sync.tally()
+
+        revisions = dict((u.name, tally.get(u.name, None)) for u in users)
+        changed_users = set(name for name, revision in revisions.items()
+                            if name not in self._user_revisions or self._user_revisions[name] != revision)
+        changed_users |= set(self._user_revisions).difference(revisions)
+        self._user_revisions = revisions
+
+        if not changed_users:
+            return
+
+        for name in changed_users:
+            self._user_update_ts[name] = ts
+
+        gui_thread_schedule_async(self._publish, args=(users, tally, changed_users))
+
+    def _publish(self, users, tally, changed_users):
+        self.tally_container.am_obj = tally
+        self.tally_container.am_event(changed_users=changed_users)
+
+        self.users_container.am_obj = users
+        self.users_container.am_event(changed_users=changed_users)
@@ -0,0 +1,344 @@
+import time
+import pickle
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_l = logging.getLogger(__name__)
+
+
+class AnalysisServerError(Exception):
+    pass
+
+
+class RemoteCodegen:
+    """
+    The decompilation result of a function, as sent back by the analysis server. The AST of the code is not included,
+    so posmap and nodemap are always None.
+    """
+
+    __slots__ = ('text', 'posmap', 'nodemap', )
+
+    def __init__(self, text):
+        self.text = text
+        self.posmap = None
+        self.nodemap = None
+
+
+#
+# The analysis process
+#
+
+class _Analyzer:
+    """
+    Owns the angr project inside the analysis process. Every method whose name starts with op_ can be called by the
+    client. Arguments and return values must be picklable.
+    """
+
+    def __init__(self, binary_path, load_options, cfg_args):
+        import angr  # pylint:disable=import-outside-toplevel
+
+        self.project = angr.Project(binary_path, load_options=load_options)
+
+        self._cfg_args = cfg_args
+        self._cfg = None
+
+    @property
+    def cfg(self):
+        if self._cfg is None:
+            # only if a call needs the CFG before the client has sent its own
+            self._cfg = self.project.analyses.CFGFast(**self._cfg_args)
+        return self._cfg
+
+    def op_ping(self):
+        return True
+
+    def op_set_cfg(self, chunk):
+        """
+        Take over the CFG that the client has generated, so that the analysis process does not generate it again.
+
+        :param tuple chunk: The CFG in the form that parallel_cfg.merge_chunks() takes.
+        :return:            Whether the CFG has been taken over.
+        """
+
+        from .parallel_cfg import merge_chunks  # pylint:disable=import-outside-toplevel
+
+        if self._cfg is not None:
+            return False
+        self._cfg, _ = merge_chunks(self.project, [ chunk ])
+        return True
+
+    def op_set_kb(self, labels, comments):
+        """
+        Make the labels and comments of the knowledge base match those of the client.
+        """
+
+        kb = self.project.kb
+        for addr in [ addr for addr in kb.labels if addr not in labels ]:
+            del kb.labels[addr]
+        for addr, name in labels.items():
+            kb.labels[addr] = name
+        kb.comments.clear()
+        kb.comments.update(comments)
+
+    def op_decompile(self, addr, optimization_passes=None):
+        func = self.cfg.kb.functions.function(addr=addr)
+        if func is None:
+            return None
+        d = self.project.analyses.Decompiler(func, cfg=self.cfg, optimization_passes=optimization_passes)
+        return RemoteCodegen(d.codegen.text)
+
+    def op_set_label(self, addr, name):
+        if name:
+            self.project.kb.labels[addr] = name
+        elif addr in self.project.kb.labels:
+            del self.project.kb.labels[addr]
+
+    def op_set_comment(self, addr, comment):
+        if comment is not None:
+            self.project.kb.comments[addr] = comment
+        elif addr in self.project.kb.comments:
+            del self.project.kb.comments[addr]
+
+
+def _serve(conn, binary_path, load_options, cfg_args, memory_limit):
+    """
+    The main function of the analysis process.
+    """
+
+    if memory_limit and resource is not None:
+        # an analysis that runs away only takes down this process
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    analyzer = _Analyzer(binary_path, load_options, cfg_args)
+
+    while True:
+        try:
+            batch = conn.recv()
+        except EOFError:
+            break
+        if batch is None:
+            break
+
+        results = [ ]
+        for call_id, op, args, kwargs in batch:
+            try:
+                value = getattr(analyzer, 'op_' + op)(*args, **kwargs)
+                pickle.dumps(value)
+            except Exception as e:  # pylint:disable=broad-except
+                _l.debug("Call %s failed.", op, exc_info=True)
+                results.append((call_id, False, "%s: %s" % (type(e).__name__, e)))
+            else:
+                results.append((call_id, True, value))
+
+        conn.send(results)
+
+
+#
+# The client
+#
+
+def _set_future(future, ok, value):
+    if future.cancelled():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(AnalysisServerError(value))
+
+
+class AnalysisServer:
+    """
+    Decompiles functions on a copy of the project in a separate process, so that decompilation neither blocks the GUI
+    nor takes it down when it crashes or runs out of memory. Other analyses, e.g., VFG and DDG generation, still run
+    in the GUI process.
+
+    Calls return futures immediately. Calls that are made in quick succession are sent to the analysis process in one
+    batch. Every analysis process is first handed the calls that seed() returns, so that it starts out with the
+    knowledge base and the CFG of the client. If the analysis process dies, all outstanding futures fail with
+    AnalysisServerError, on_crash is called with the exit code, and a new process is started with the next call.
+    """
+
+    # how long to wait for more calls before sending a batch, in seconds
+    BATCH_DELAY = 0.005
+
+    def __init__(self, binary_path, load_options=None, cfg_args=None, memory_limit=0, on_crash=None, seed=None):
+        """
+        :param str binary_path:     Path of the binary to load.
+        :param dict load_options:   Options that are passed to angr.Project.
+        :param dict cfg_args:       Arguments of CFGFast in the analysis process.
+        :param int memory_limit:    Maximum size of the address space of the analysis process in bytes, or 0 for no
+                                    limit.
+        :param on_crash:            Called with the exit code of the analysis process when it dies unexpectedly. It is
+                                    called from a background thread.
+        :param seed:                Called without arguments whenever an analysis process starts. Returns a list of
+                                    (op, args) tuples, which are called in the new process before any other call.
+        """
+
+        self.binary_path = binary_path
+        self.load_options = load_options if load_options is not None else { }
+        self.cfg_args = cfg_args if cfg_args is not None else { }
+        self.memory_limit = memory_limit
+        self.on_crash = on_crash
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._queue = [ ]  # (call id, op, args, kwargs, future)
+
+        self._process = None
+        self._conn = None
+        self._pending = None  # call id -> future, for calls that have been sent to the current process
+        self._stopped = False
+
+        self._wakeup = threading.Event()
+        self._sender = None
+
+    @property
+    def alive(self):
+        process = self._process
+        return process is not None and process.is_alive()
+
+    #
+    # Public methods
+    #
+
+    def start(self):
+        with self._lock:
+            self._start_process()
+
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_routine, name='Analysis server sender', daemon=True)
+            self._sender.start()
+        # send the seed calls
+        self._wakeup.set()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            conn, process = self._conn, self._process
+            self._conn = self._process = None
+        self._wakeup.set()
+
+        if conn is not None:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        if process is not None:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    def call(self, op, *args, **kwargs):
+        """
+        Call an operation in the analysis process.
+
+        :param str op:  Name of the operation.
+        :return:        A future of the result.
+        :rtype:         concurrent.futures.Future
+        """
+
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                raise AnalysisServerError("The analysis server has been stopped.")
+            if self._process is None:
+                # the previous process died
+                self._start_process()
+            self._queue.append((next(self._ids), op, args, kwargs, future))
+        self._wakeup.set()
+        return future
+
+    #
+    # Private methods
+    #
+
+    def _start_process(self):
+        ctx = multiprocessing.get_context('spawn')
+        conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_serve, name='angr management analysis server', daemon=True,
+                              args=(child_conn, self.binary_path, self.load_options, self.cfg_args, self.memory_limit))
+        process.start()
+        child_conn.close()
+
+        self._conn, self._process, self._pending = conn, process, { }
+        if self.seed is not None:
+            seed_calls = [ (next(self._ids), op, args, { }, Future()) for op, args in self.seed() ]
+            self._queue[:0] = seed_calls
+
+        receiver = threading.Thread(target=self._receive_routine, args=(conn, process, self._pending),
+                                    name='Analysis server receiver', daemon=True)
+        receiver.start()
+
+    def _send_routine(self):
+        while True:
+            self._wakeup.wait()
+            if self._stopped:
+                break
+            # let more calls queue up
+            time.sleep(self.BATCH_DELAY)
+            self._wakeup.clear()
+
+            with self._lock:
+                batch, self._queue = self._queue, [ ]
+                conn, pending = self._conn, self._pending
+                if conn is None:
+                    failed = batch
+                    batch = [ ]
+                else:
+                    failed = [ ]
+                    for call_id, _, _, _, future in batch:
+                        pending[call_id] = future
+
+            for _, _, _, _, future in failed:
+                _set_future(future, False, "The analysis server is not running.")
+            if not batch:
+                continue
+
+            try:
+                conn.send([ (call_id, op, args, kwargs) for call_id, op, args, kwargs, _ in batch ])
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                with self._lock:
+                    for call_id, _, _, _, _ in batch:
+                        pending.pop(call_id, None)
+                for _, _, _, _, future in batch:
+                    _set_future(future, False, "Cannot send arguments: %s" % e)
+            except OSError:
+                # the receiver notices that the process is gone and fails all pending calls
+                pass
+
+    def _receive_routine(self, conn, process, pending):
+        while True:
+            try:
+                results = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            for call_id, ok, value in results:
+                with self._lock:
+                    future = pending.pop(call_id)
+                _set_future(future, ok, value)
+
+        with self._lock:
+            if self._conn is conn:
+                self._conn = self._process = self._pending = None
+            failed = list(pending.values())
+            pending.clear()
+            stopped = self._stopped
+
+        for future in failed:
+            _set_future(future, False, "The analysis server exited.")
+
+        process.join(timeout=5)
+        if not stopped:
+            _l.warning("The analysis server exited unexpectedly with exit code %s.", process.exitcode)
+            if self.on_crash is not None:
+                self.on_crash(process.exitcode)
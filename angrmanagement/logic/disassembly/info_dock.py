@@ -35,6 +35,15 @@ class InfoDock:
         self.selected_insns = ObjectContainer(set(), 'The currently selected instructions')
         self.selected_operands = ObjectContainer({}, 'The currently selected instruction operands')
 
+        # highlight keys (see operand_highlight_key()) of all selected operands
+        self.highlighted_operand_keys = set()
+        self.selected_operands.am_subscribe(self._update_highlighted_operand_keys, priority=1)
+
+        # the selection as of the last call to take_selection_changes()
+        self._last_selected_insns = set()
+        self._last_selected_operands = set()
+        self._last_highlighted_operand_keys = set()
+
     @property
     def smart_highlighting(self):
         return self.highlight_mode == OperandHighlightMode.SAME_IDENT
@@ -45,6 +54,7 @@ class InfoDock:
             self.highlight_mode = OperandHighlightMode.SAME_IDENT
         else:
             self.highlight_mode = OperandHighlightMode.SAME_TEXT
+        self._update_highlighted_operand_keys()
 
     def initialize(self):
         self.selected_insns.clear()
@@ -152,14 +162,74 @@ class InfoDock:
         return (ins_addr, operand_index) in self.selected_operands
 
     def should_highlight_operand(self, selected, operand):
+        """
+        Check if an operand should be highlighted because of a selected operand.
+
+        :param OperandDescriptor selected:  The selected operand.
+        :param QOperand operand:            The operand to check.
+        :return:                            True if it should be highlighted, False otherwise.
+        :rtype:                             bool
+        """
         if selected is None:
             return False
+        return operand.highlight_key in self._operand_descriptor_keys(selected)
+
+    def operand_highlight_key(self, func_addr, text, variable):
+        """
+        Get the key that decides whether an operand is highlighted: an operand is highlighted if its key is in
+        highlighted_operand_keys.
 
-        if self.highlight_mode == OperandHighlightMode.SAME_TEXT or selected.variable is None:
-            # when there is no related variable, we highlight as long as they have the same text
-            return operand.text == selected.text
-        elif self.highlight_mode == OperandHighlightMode.SAME_IDENT:
-            if selected.variable is not None and operand.variable is not None:
-                return selected.variable.ident == operand.variable.ident
+        :param int func_addr:   Address of the function that the operand belongs to.
+        :param str text:        Text of the operand.
+        :param variable:        The variable that is linked to the operand, or None.
+        :return:                A hashable key.
+        """
+
+        if self.highlight_mode == OperandHighlightMode.SAME_IDENT and variable is not None:
+            return 'ident', func_addr, variable.ident
+        # when there is no related variable, we highlight as long as they have the same text
+        return 'text', text
+
+    def take_selection_changes(self):
+        """
+        Get what has changed about the selection since the last call, so that only the affected items need to be
+        repainted.
+
+        :return:    A tuple of addresses of instructions whose selection state has changed, (instruction address,
+                    operand index) tuples of operands whose selection state has changed, and highlight keys of
+                    operands whose highlighting state has changed.
+        :rtype:     tuple
+        """
 
-        return False
+        insns = set(self.selected_insns)
+        operands = set(self.selected_operands)
+        keys = set(self.highlighted_operand_keys)
+
+        changes = (insns ^ self._last_selected_insns,
+                   operands ^ self._last_selected_operands,
+                   keys ^ self._last_highlighted_operand_keys,
+                   )
+
+        self._last_selected_insns = insns
+        self._last_selected_operands = operands
+        self._last_highlighted_operand_keys = keys
+
+        return changes
+
+    #
+    # Private methods
+    #
+
+    def _update_highlighted_operand_keys(self, **kwargs):  # pylint:disable=unused-argument
+        keys = set()
+        for desc in self.selected_operands.values():
+            keys.update(self._operand_descriptor_keys(desc))
+        self.highlighted_operand_keys = keys
+
+    def _operand_descriptor_keys(self, desc):
+        # a selected operand highlights operands with the same text, and in SAME_IDENT mode, operands that are linked to
+        # the same variable as well
+        keys = [ ('text', desc.text) ]
+        if self.highlight_mode == OperandHighlightMode.SAME_IDENT and desc.variable_ident is not None:
+            keys.append(('ident', desc.func_addr, desc.variable_ident))
+        return keys
@@ -0,0 +1,220 @@
+import os
+import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_l = logging.getLogger(__name__)
+
+# the statement index that angr gives the default exit of a block
+DEFAULT_STATEMENT = -2
+# chunk boundaries are aligned to this many bytes, so that they are less likely to fall into an instruction
+CHUNK_ALIGNMENT = 0x10
+
+
+def executable_regions(project):
+    """
+    Get the executable regions of the main object, which CFGFast recovers by default.
+
+    :param angr.Project project:    The project.
+    :return:                        A sorted list of (start, end) tuples.
+    :rtype:                         list
+    """
+
+    obj = project.loader.main_object
+    memory_regions = obj.sections if obj.sections else obj.segments
+    regions = [ (region.min_addr, region.max_addr + 1) for region in memory_regions if region.is_executable ]
+    return sorted(regions)
+
+
+def split_regions(regions, chunks):
+    """
+    Split memory regions into chunks of about the same size. A chunk never spans more than one region, so small regions
+    make up chunks of their own.
+
+    :param list regions:    (start, end) tuples.
+    :param int chunks:      How many chunks to aim for.
+    :return:                A list of (start, end) tuples.
+    :rtype:                 list
+    """
+
+    total = sum(end - start for start, end in regions)
+    if total == 0:
+        return [ ]
+    chunk_size = max(CHUNK_ALIGNMENT, (total + chunks - 1) // chunks)
+
+    result = [ ]
+    for start, end in regions:
+        chunk_start = start
+        while end - chunk_start > chunk_size:
+            chunk_end = (chunk_start + chunk_size) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+            if chunk_end <= chunk_start:
+                break
+            result.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+        result.append((chunk_start, end))
+    return result
+
+
+#
+# Worker processes
+#
+
+_worker_project = None
+
+
+def _init_worker(binary_path, load_options):
+    import angr  # pylint:disable=import-outside-toplevel
+
+    global _worker_project  # pylint:disable=global-statement
+    _worker_project = angr.Project(binary_path, load_options=load_options)
+
+
+def _recover_chunk(region, cfg_args):
+    """
+    Recover the CFG of a chunk. Calls and jumps that leave the chunk are not followed; they are returned as exits and
+    resolved when the chunks are merged.
+
+    :return:    The serialized CFGModel, a list of (addr, returning) tuples of the functions that start in the chunk, a list
+                of (block id, target, jumpkind, instruction address) tuples of the exits, and the serialized cross
+                references.
+    """
+
+    from angr import KnowledgeBase  # pylint:disable=import-outside-toplevel
+
+    project = _worker_project
+    start, end = region
+    cfg = project.analyses.CFGFast(kb=KnowledgeBase(project),
+                                   regions=[ region ],
+                                   start_at_entry=start <= project.entry < end,
+                                   normalize=False,
+                                   **cfg_args
+                                   )
+
+    exits = [ ]
+    for node in cfg.model.graph.nodes():
+        if not node.size or node.is_simprocedure:
+            continue
+        block = project.factory.block(node.addr, size=node.size)
+        for target, jumpkind in block.vex.constant_jump_targets_and_jumpkinds.items():
+            if not start <= target < end:
+                exits.append((node.block_id, target, jumpkind, block.instruction_addrs[-1]))
+
+    functions = [ (func.addr, func.returning) for func in cfg.kb.functions.values() if start <= func.addr < end ]
+
+    return cfg.model.serialize(), functions, exits, cfg.kb.xrefs.serialize()
+
+
+#
+# Merging
+#
+
+def merge_chunks(project, results, normalize=True):
+    """
+    Merge the CFGs of chunks into one CFG, in the knowledge base of the project. Nodes and edges are copied into the
+    model of an empty CFGFast, exits of each chunk are connected to the nodes of the chunk that they lead into, and the
+    functions are made from the merged graph as CFGFast would.
+
+    :param angr.Project project:    The project.
+    :param list results:            Return values of _recover_chunk().
+    :param bool normalize:          Whether to normalize the merged CFG.
+    :return:                        The merged CFG and the number of exits that lead into none of the chunks.
+    :rtype:                         tuple
+    """
+
+    from angr.knowledge_plugins.cfg import CFGModel  # pylint:disable=import-outside-toplevel
+    from angr.knowledge_plugins.xrefs import XRefManager  # pylint:disable=import-outside-toplevel
+
+    cfg = project.analyses.CFGFast(start_at_entry=False,
+                                   symbols=False,
+                                   function_prologues=False,
+                                   force_complete_scan=False,
+                                   function_starts=[ ],
+                                   normalize=False,
+                                   resolve_indirect_jumps=False,
+                                   data_references=False,
+                                   )
+    model = cfg.model
+
+    exits = [ ]
+    functions = { }
+    for model_data, chunk_functions, chunk_exits, _ in results:
+        chunk_model = CFGModel.parse(model_data)
+        for node in chunk_model.graph.nodes():
+            node._cfg_model = model  # pylint:disable=protected-access
+            model.add_node(node.block_id, node)
+            model.graph.add_node(node)
+        for src, dst, data in chunk_model.graph.edges(data=True):
+            model.graph.add_edge(src, dst, **data)
+        model.memory_data.update(chunk_model.memory_data)
+
+        functions.update(chunk_functions)
+        exits.extend(chunk_exits)
+
+    # cross-chunk edges
+    unresolved = 0
+    for block_id, target, jumpkind, ins_addr in exits:
+        dst = model.get_any_node(target)
+        if dst is None:
+            unresolved += 1
+            continue
+        model.graph.add_edge(model.get_node(block_id), dst, jumpkind=jumpkind, ins_addr=ins_addr,
+                             stmt_idx=DEFAULT_STATEMENT)
+        if jumpkind == 'Ijk_Call':
+            functions.setdefault(target, None)
+
+    for addr, returning in functions.items():
+        func = cfg.kb.functions.function(addr=addr, create=True)
+        if returning is not None:
+            func.returning = returning
+    cfg.make_functions()
+    if normalize:
+        cfg.normalize()
+
+    for _, _, _, xrefs_data in results:
+        try:
+            chunk_xrefs = XRefManager.parse(xrefs_data, cfg_model=model, kb=cfg.kb)
+            cfg.kb.xrefs.add_xrefs(list(itertools.chain.from_iterable(chunk_xrefs.xrefs_by_ins_addr.values())))
+        except Exception:  # pylint:disable=broad-except
+            _l.warning("Failed to merge cross references of a chunk.", exc_info=True)
+
+    return cfg, unresolved
+
+
+def recover_cfg_parallel(project, binary_path, load_options=None, cfg_args=None, workers=None, chunks=None,
+                         progress_callback=None):
+    """
+    Recover the CFG of the main object of a project in worker processes. Every worker loads the binary again, and
+    recovers the CFGs of chunks of the executable regions, which are merged into the knowledge base of the project.
+
+    :param angr.Project project:    The project.
+    :param str binary_path:         Path of the binary that the project has been loaded from.
+    :param dict load_options:       Options that the project has been loaded with.
+    :param dict cfg_args:           Arguments of CFGFast.
+    :param int workers:             Number of worker processes. Defaults to the number of CPUs.
+    :param int chunks:              Number of chunks. Defaults to four per worker, so that workers that finish early
+                                    pick up the remaining chunks.
+    :param progress_callback:       Called with the percentage of chunks that are done.
+    :return:                        The merged CFG.
+    """
+
+    cfg_args = dict(cfg_args) if cfg_args else { }
+    normalize = cfg_args.pop('normalize', True)
+    workers = workers if workers else (os.cpu_count() or 1)
+    chunks = chunks if chunks else workers * 4
+
+    regions = split_regions(executable_regions(project), chunks)
+    results = [ None ] * len(regions)
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(regions))), mp_context=ctx,
+                             initializer=_init_worker, initargs=(binary_path, load_options)) as pool:
+        futures = dict((pool.submit(_recover_chunk, region, cfg_args), i) for i, region in enumerate(regions))
+        for done, future in enumerate(as_completed(futures), 1):
+            # merged in address order, whichever order the chunks finish in
+            results[futures[future]] = future.result()
+            if progress_callback is not None:
+                progress_callback(done * 90.0 / len(futures))
+
+    cfg, unresolved = merge_chunks(project, results, normalize=normalize)
+    _l.debug("Merged the CFGs of %d chunks. %d exits lead into none of them.", len(regions), unresolved)
+    return cfg
@@ -0,0 +1,286 @@
+import sys
+import time
+import logging
+import threading
+import traceback
+import functools
+from collections import deque
+
+from PySide2.QtCore import QAbstractEventDispatcher
+
+from . import GlobalInfo
+
+_l = logging.getLogger(__name__)
+
+# kinds of sections
+PROFILE_FRAME = 'frame'
+PROFILE_PAINT = 'paint'
+PROFILE_HANDLER = 'handler'
+PROFILE_GUI_CALL = 'gui call'
+
+
+def callable_name(callable):
+    if isinstance(callable, functools.partial):
+        callable = callable.func
+    return getattr(callable, '__qualname__', None) or repr(callable)
+
+
+class SectionStats:
+    """
+    How often a section has run, and how long it took.
+    """
+
+    __slots__ = ('count', 'time', 'max_time', )
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0  # in seconds
+        self.max_time = 0.0
+
+    def __repr__(self):
+        return "<SectionStats %d runs, %.3f s, at most %.3f s>" % (self.count, self.time, self.max_time)
+
+
+class SlowSection:
+    """
+    A section that took longer than the threshold of the profiler.
+
+    :ivar str kind:         What ran, e.g., PROFILE_PAINT.
+    :ivar str name:         Which view painted, or which handler or call ran.
+    :ivar float timestamp:  When it ended, from time.time().
+    :ivar float duration:   How long it took, in seconds.
+    :ivar str stack:        The stack of the GUI thread once the section had run for longer than the threshold, or None
+                            if it ended before the sampler got to it.
+    """
+
+    __slots__ = ('kind', 'name', 'timestamp', 'duration', 'stack', )
+
+    def __init__(self, kind, name, timestamp, duration, stack):
+        self.kind = kind
+        self.name = name
+        self.timestamp = timestamp
+        self.duration = duration
+        self.stack = stack
+
+
+class _Section:
+
+    __slots__ = ('kind', 'name', 'start', 'stack', 'reported', )
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.stack = None
+        # whether a slow section inside this one has been reported already
+        self.reported = False
+
+
+class GUIProfiler:
+    """
+    Measures where the GUI thread spends its time: in iterations of the Qt event loop (frames), in painting views, in
+    handlers of events that ObjectContainers fire, and in calls that other threads schedule on the GUI thread.
+
+    Profiling is off until enable() is called. Every section that takes longer than the threshold is logged together
+    with a stack sample, which a background thread takes from the GUI thread while the section is still running. A
+    slow section is reported once, by the innermost section that was slow.
+
+    :ivar deque frames:         (time.time(), busy seconds) of the most recent frames.
+    :ivar deque slow_sections:  The most recent SlowSections.
+    :ivar dict stats:           (kind, name) -> SectionStats.
+    """
+
+    MAX_FRAMES = 600
+    MAX_SLOW_SECTIONS = 200
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.05  # in seconds
+
+        self.frames = deque(maxlen=self.MAX_FRAMES)
+        self.slow_sections = deque(maxlen=self.MAX_SLOW_SECTIONS)
+        self.stats = { }
+
+        # open sections on the GUI thread, the innermost last
+        self._sections = [ ]
+        self._frame = None
+        self._dispatcher = None
+        self._stop_sampler = None
+
+    #
+    # Public methods
+    #
+
+    def enable(self, threshold=None):
+        """
+        Start profiling. Must be called on the GUI thread.
+
+        :param float threshold: Sections that take longer than this many seconds are reported.
+        :return:                None
+        """
+
+        if threshold is not None:
+            self.threshold = threshold
+        if self.enabled:
+            return
+        self.enabled = True
+
+        # delayed import, since the event bus reports to the profiler
+        from ..data.event_bus import event_bus  # pylint:disable=import-outside-toplevel
+        event_bus.reset_stats()
+        event_bus.collect_stats = True
+
+        dispatcher = QAbstractEventDispatcher.instance()
+        if dispatcher is not None:
+            dispatcher.awake.connect(self._on_awake)
+            dispatcher.aboutToBlock.connect(self._on_about_to_block)
+            self._dispatcher = dispatcher
+
+        self._stop_sampler = threading.Event()
+        sampler = threading.Thread(target=self._sample_routine, args=(self._stop_sampler, ), name='GUI profiler sampler',
+                                   daemon=True)
+        sampler.start()
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+
+        from ..data.event_bus import event_bus  # pylint:disable=import-outside-toplevel
+        event_bus.collect_stats = False
+
+        if self._dispatcher is not None:
+            self._dispatcher.awake.disconnect(self._on_awake)
+            self._dispatcher.aboutToBlock.disconnect(self._on_about_to_block)
+            self._dispatcher = None
+        self._stop_sampler.set()
+        self._sections = [ ]
+        self._frame = None
+
+    def reset(self):
+        self.frames.clear()
+        self.slow_sections.clear()
+        self.stats = { }
+
+    def begin(self, kind, name):
+        """
+        Start measuring a section. Sections on threads other than the GUI thread are not measured.
+
+        :param str kind:    What runs, e.g., PROFILE_PAINT.
+        :param str name:    Which view paints, or which handler or call runs.
+        :return:            A handle to pass to end(), or None.
+        """
+
+        if not self.enabled or threading.get_ident() != GlobalInfo.gui_thread:
+            return None
+        section = _Section(kind, name)
+        self._sections.append(section)
+        return section
+
+    def end(self, section):
+        """
+        Stop measuring a section.
+
+        :param section: What begin() returned.
+        :return:        How long the section took in seconds, or None if it was not measured.
+        """
+
+        if section is None:
+            return None
+        duration = time.perf_counter() - section.start
+        try:
+            self._sections.remove(section)
+        except ValueError:
+            # profiling was disabled and enabled again in the meantime
+            return duration
+
+        key = (section.kind, section.name)
+        stats = self.stats.get(key, None)
+        if stats is None:
+            stats = self.stats[key] = SectionStats()
+        stats.count += 1
+        stats.time += duration
+        stats.max_time = max(stats.max_time, duration)
+
+        if duration >= self.threshold and not section.reported:
+            for outer in self._sections:
+                outer.reported = True
+            self.slow_sections.append(SlowSection(section.kind, section.name, time.time(), duration, section.stack))
+            _l.warning("Slow %s %s: %.1f ms.%s", section.kind, section.name, duration * 1000,
+                       ("\n" + section.stack) if section.stack else "")
+        return duration
+
+    def measure(self, kind, name):
+        """
+        Measure a section in a with statement.
+        """
+        return _Measure(self, kind, name)
+
+    def report(self, limit=20):
+        """
+        Describe the sections that took the most time.
+
+        :param int limit:   Maximum number of sections.
+        :return:            A human-readable report.
+        :rtype:             str
+        """
+
+        lines = [ "%-10s %-60s %8s %12s %12s" % ("Kind", "Name", "Count", "Total", "Max") ]
+        for (kind, name), stats in sorted(self.stats.items(), key=lambda item: -item[1].time)[:limit]:
+            lines.append("%-10s %-60s %8d %9.1f ms %9.1f ms" % (kind, name[:60], stats.count, stats.time * 1000,
+                                                                stats.max_time * 1000))
+        return "\n".join(lines)
+
+    #
+    # Event handlers
+    #
+
+    def _on_awake(self):
+        if self._frame is None:
+            self._frame = self.begin(PROFILE_FRAME, "Event loop")
+
+    def _on_about_to_block(self):
+        frame, self._frame = self._frame, None
+        duration = self.end(frame)
+        if duration is not None:
+            self.frames.append((time.time(), duration))
+
+    #
+    # Private methods
+    #
+
+    def _sample_routine(self, stop):
+        while not stop.wait(max(0.005, self.threshold / 2)):
+            now = time.perf_counter()
+            slow = [ section for section in list(self._sections)
+                     if section.stack is None and now - section.start >= self.threshold ]
+            if not slow:
+                continue
+            frame = sys._current_frames().get(GlobalInfo.gui_thread, None)  # pylint:disable=protected-access
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            for section in slow:
+                section.stack = stack
+
+
+class _Measure:
+
+    __slots__ = ('_profiler', '_kind', '_name', '_section', )
+
+    def __init__(self, profiler, kind, name):
+        self._profiler = profiler
+        self._kind = kind
+        self._name = name
+        self._section = None
+
+    def __enter__(self):
+        self._section = self._profiler.begin(self._kind, self._name)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._profiler.end(self._section)
+        return False
+
+
+profiler = GUIProfiler()
@@ -1,8 +1,24 @@
+import sys
+import time
+import logging
 import threading
+import traceback
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from PySide2.QtCore import QEvent, QCoreApplication
 
 from . import GlobalInfo
+from .profiler import profiler, callable_name, PROFILE_GUI_CALL
+
+_l = logging.getLogger(__name__)
+
+
+class GUIThreadDeadlock(Exception):
+    """
+    Raised by gui_thread_schedule when the GUI thread has not processed any scheduled calls for a long time while the
+    calling thread is waiting for it.
+    """
+    pass
 
 
 class ExecuteCodeEvent(QEvent):
@@ -41,11 +57,13 @@ class GUIObjProxy(object):
             return result
         return GUIObjProxy(result)
 
+    # setting or deleting attributes does not return anything, so there is no need to wait for the GUI thread. calls
+    # are executed in order, so later reads still see the new value.
     def __delattr__(self, name):
-        gui_thread_schedule(lambda: delattr(object.__getattribute__(self, "_obj"), name))
+        gui_thread_schedule_async(delattr, args=(object.__getattribute__(self, "_obj"), name))
 
     def __setattr__(self, name, value):
-        gui_thread_schedule(lambda: setattr(object.__getattribute__(self, "_obj"), name, value))
+        gui_thread_schedule_async(setattr, args=(object.__getattribute__(self, "_obj"), name, value))
 
     def __nonzero__(self):
         return gui_thread_schedule(lambda: bool(object.__getattribute__(self, "_obj")))
@@ -115,28 +133,159 @@ class GUIObjProxy(object):
         return ins
 
 
+class _GUIThreadQueue:
+    """
+    Calls that are waiting to be executed on the GUI thread.
+
+    All calls that are scheduled before the GUI thread gets around to them are executed by a single ExecuteCodeEvent,
+    in the order they have been scheduled in.
+    """
+
+    # a thread waiting for a call is considered deadlocked after the GUI thread has not picked up any calls for this
+    # many seconds
+    DEADLOCK_TIMEOUT = 30
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = [ ]  # (callable, args, future)
+        self._posted = False
+        # when the GUI thread last started executing scheduled calls
+        self._last_drain_ts = time.monotonic()
+        # how many scheduled calls the GUI thread is in the middle of. it is more than one when a call starts a nested
+        # event loop, e.g., for a modal dialog.
+        self._executing = 0
+
+    def put(self, callable, args, future):
+        with self._lock:
+            self._calls.append((callable, args, future))
+            if self._posted:
+                return
+            self._posted = True
+
+        QCoreApplication.postEvent(GlobalInfo.main_window, ExecuteCodeEvent(self._drain))
+
+    def stalled(self):
+        """
+        Whether calls are waiting while the GUI thread is neither executing scheduled calls nor picking up new ones.
+        """
+        with self._lock:
+            return bool(self._calls) and self._executing == 0 and \
+                time.monotonic() - self._last_drain_ts >= self.DEADLOCK_TIMEOUT
+
+    def _drain(self):
+        with self._lock:
+            calls, self._calls = self._calls, [ ]
+            # calls that are scheduled from now on (including from the calls below, or from a nested event loop that
+            # they start) need a new event
+            self._posted = False
+            self._last_drain_ts = time.monotonic()
+            self._executing += 1
+
+        try:
+            for callable, args, future in calls:
+                if future is not None and not future.set_running_or_notify_cancel():
+                    continue
+                section = profiler.begin(PROFILE_GUI_CALL, callable_name(callable)) if profiler.enabled else None
+                try:
+                    result = callable() if args is None else callable(*args)
+                except Exception as e:  # pylint:disable=broad-except
+                    if future is None:
+                        _l.error("Exception in a call scheduled on the GUI thread.", exc_info=True)
+                    else:
+                        future.set_exception(e)
+                else:
+                    if future is not None:
+                        future.set_result(result)
+                finally:
+                    profiler.end(section)
+        finally:
+            with self._lock:
+                self._executing -= 1
+
+
+_queue = _GUIThreadQueue()
+
+
 def is_gui_thread():
     return threading.get_ident() == GlobalInfo.gui_thread
 
 
-def gui_thread_schedule(callable, args=None):
+def gui_thread_schedule_future(callable, args=None):
+    """
+    Schedule a call on the GUI thread without waiting for it.
+
+    :param callable:    The function to call.
+    :param args:        Positional arguments of the call.
+    :return:            A future of the return value of the call. If called from the GUI thread, the call is made
+                        immediately and the future is already done.
+    :rtype:             concurrent.futures.Future
+    """
+
+    future = Future()
+
+    if is_gui_thread():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(callable() if args is None else callable(*args))
+        except Exception as e:  # pylint:disable=broad-except
+            future.set_exception(e)
+        return future
+
+    _queue.put(callable, args, future)
+    return future
+
+
+def gui_thread_schedule(callable, args=None, timeout=None):
+    """
+    Call a function on the GUI thread and wait for its return value.
+
+    :param callable:        The function to call.
+    :param args:            Positional arguments of the call.
+    :param float timeout:   Maximum number of seconds to wait, or None to wait for as long as the GUI thread is making
+                            progress.
+    :return:                The return value of the call.
+    :raises GUIThreadDeadlock: If the GUI thread has stopped processing scheduled calls.
+    """
+
     if is_gui_thread():
         if args is None:
             return callable()
         else:
             return callable(*args)
 
-    event = ExecuteCodeEvent(callable, args)
-    QCoreApplication.postEvent(GlobalInfo.main_window, event)
-    event.event.wait()  # TODO: unsafe. to be fixed later.
+    if GlobalInfo.main_window is None:
+        # nobody would ever execute the call
+        raise GUIThreadDeadlock("Cannot wait for the GUI thread before the main window is created.")
+
+    future = gui_thread_schedule_future(callable, args=args)
+    if timeout is not None:
+        return future.result(timeout=timeout)
 
-    if event.exception is not None:
-        raise event.exception
+    while True:
+        try:
+            return future.result(timeout=_queue.DEADLOCK_TIMEOUT)
+        except FutureTimeoutError:
+            pass
+        if _queue.stalled():
+            break
 
-    return event.result
+    # the GUI thread has not picked up anything for a long time, so it is most likely waiting for this thread
+    future.cancel()
+    frame = sys._current_frames().get(GlobalInfo.gui_thread, None)  # pylint:disable=protected-access
+    stack = "".join(traceback.format_stack(frame)) if frame is not None else "(unknown)\n"
+    raise GUIThreadDeadlock("The GUI thread has not processed scheduled calls for %s seconds. It is at:\n%s" % (
+        _queue.DEADLOCK_TIMEOUT, stack))
 
 
 def gui_thread_schedule_async(callable, args=None):
+    """
+    Schedule a call on the GUI thread without waiting for it. Exceptions that the call raises are logged.
+
+    :param callable:    The function to call.
+    :param args:        Positional arguments of the call.
+    :return:            None
+    """
+
     if is_gui_thread():
         if args is None:
             callable()
@@ -144,5 +293,4 @@ def gui_thread_schedule_async(callable, args=None):
             callable(*args)
         return
 
-    event = ExecuteCodeEvent(callable, args)
-    QCoreApplication.postEvent(GlobalInfo.main_window, event)
+    _queue.put(callable, args, None)
@@ -13,6 +13,11 @@ QLabel[class=reg_viewer_label] {
     background-color: #ffffff;
 }
 
+QLabel[class=reg_viewer_label_changed] {
+    font: 10pt courier new;
+    background-color: #ffd0d0;
+}
+
 QLabel[class=ast_viewer_size] {
     font: 10pt courier new;
 }
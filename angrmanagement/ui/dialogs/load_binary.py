@@ -58,6 +58,10 @@ class LoadBinary(QDialog):
                 continue
             deps.append(ident)
             processed_objects.add(obj)
+        # libraries that the loader has not loaded
+        for dep in partial_ld.main_object.deps:
+            if dep not in deps:
+                deps.append(dep)
 
         dep_list = self.option_widgets['dep_list']  # type: QListWidget
         for dep in deps:
@@ -146,9 +150,21 @@ class LoadBinary(QDialog):
         collect_data_refs.setChecked(True)
         self.option_widgets['collect_data_refs'] = collect_data_refs
 
+        demand_driven = QCheckBox(self)
+        demand_driven.setText('Recover the code that is being viewed first')
+        demand_driven.setChecked(False)
+        self.option_widgets['demand_driven'] = demand_driven
+
+        parallel = QCheckBox(self)
+        parallel.setText('Generate the CFG in parallel processes')
+        parallel.setChecked(False)
+        self.option_widgets['parallel'] = parallel
+
         layout = QVBoxLayout()
         layout.addWidget(resolve_indirect_jumps)
         layout.addWidget(collect_data_refs)
+        layout.addWidget(demand_driven)
+        layout.addWidget(parallel)
         layout.addStretch(0)
         frame = QFrame(self)
         frame.setLayout(layout)
@@ -181,6 +197,8 @@ class LoadBinary(QDialog):
         self.cfg_args = {
             'resolve_indirect_jumps': self.option_widgets['resolve_indirect_jumps'].isChecked(),
             'collect_data_references': self.option_widgets['collect_data_refs'].isChecked(),
+            'demand_driven': self.option_widgets['demand_driven'].isChecked(),
+            'parallel': self.option_widgets['parallel'].isChecked(),
         }
 
         self.close()
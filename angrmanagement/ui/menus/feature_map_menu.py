@@ -0,0 +1,15 @@
+from .menu import Menu, MenuEntry
+
+
+class FeatureMapLayersMenu(Menu):
+    def __init__(self, feature_map):
+        super().__init__("", parent=feature_map)
+
+        for layer in feature_map.layers:
+            self.entries.append(MenuEntry(layer.get_display_name(), self._toggle_layer(layer), checkable=True,
+                                          checked=feature_map.is_layer_enabled(layer)))
+
+    def _toggle_layer(self, layer):
+        def toggle():
+            self.parent.set_layer_enabled(layer, not self.parent.is_layer_enabled(layer))
+        return toggle
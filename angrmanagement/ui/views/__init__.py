@@ -9,3 +9,6 @@ from .reco_view import RecoView
 from .interaction_view import InteractionView
 from .sync_view import SyncView
 from .patches_view import PatchesView
+from .jobs_view import JobsView
+from .profiler_view import ProfilerView
+from .memory_usage_view import MemoryUsageView
@@ -1,4 +1,6 @@
 
+import logging
+
 from PySide2.QtWidgets import QHBoxLayout, QTextEdit, QMainWindow, QDockWidget
 from PySide2.QtGui import QTextCursor
 from PySide2.QtCore import Qt
@@ -9,8 +11,11 @@ from ..widgets.qccode_edit import QCCodeEdit
 from ..widgets.qccode_highlighter import QCCodeHighlighter
 from ..widgets.qdecomp_options import QDecompilationOptions
 from ..documents import QCodeDocument
+from ...logic.threads import gui_thread_schedule_async
 from .view import BaseView
 
+_l = logging.getLogger(__name__)
+
 
 class CodeView(BaseView):
     def __init__(self, workspace, default_docking_position, *args, **kwargs):
@@ -41,14 +46,18 @@ class CodeView(BaseView):
         if self._function is None:
             return
 
-        d = self.workspace.instance.project.analyses.Decompiler(self._function,
-                                                                cfg=self.workspace.instance.cfg,
-                                                                optimization_passes=self._options.selected_options,
-                                                                # kb=dec_kb
-                                                                )
-        self._doc = QCodeDocument(d.codegen)
-        self._textedit.setDocument(self._doc)
-        self._highlighter = QCCodeHighlighter(self._doc)
+        server = self.workspace.instance.analysis_server
+        if server is not None:
+            # decompile in the analysis process and display the result once it is ready
+            future = server.call('decompile', self._function.addr,
+                                 optimization_passes=self._options.selected_options)
+            function = self._function
+            future.add_done_callback(
+                lambda f: gui_thread_schedule_async(self._on_decompiled, args=(function, f))
+            )
+            return
+
+        self._decompile_locally()
 
     #
     # Properties
@@ -99,10 +108,38 @@ class CodeView(BaseView):
         else:
             self.highlight_chunks([ ])
 
+    def _on_decompiled(self, function, future):
+        if function is not self._function:
+            # another function has been selected in the meantime
+            return
+
+        try:
+            codegen = future.result()
+        except Exception:  # pylint:disable=broad-except
+            _l.warning("Decompilation in the analysis server failed. Decompiling locally.", exc_info=True)
+            self._decompile_locally()
+            return
+
+        if codegen is not None:
+            self._set_codegen(codegen)
+
     #
     # Private methods
     #
 
+    def _decompile_locally(self):
+        d = self.workspace.instance.project.analyses.Decompiler(self._function,
+                                                                cfg=self.workspace.instance.cfg,
+                                                                optimization_passes=self._options.selected_options,
+                                                                # kb=dec_kb
+                                                                )
+        self._set_codegen(d.codegen)
+
+    def _set_codegen(self, codegen):
+        self._doc = QCodeDocument(codegen)
+        self._textedit.setDocument(self._doc)
+        self._highlighter = QCCodeHighlighter(self._doc)
+
     def _init_widgets(self):
 
         window = QMainWindow()
@@ -38,7 +38,11 @@ class DisassemblyView(BaseView):
         self.infodock = InfoDock(self)
         self._variable_recovery_flavor = 'fast'
         self.variable_manager = None  # type: VariableManager
+        # address of the function whose variable manager must not be evicted, because it is displayed
+        self._pinned_variables = None
         self._current_function = ObjectContainer(None, 'The currently selected function')
+        # an address that was jumped to before the CFG around it was recovered
+        self._pending_jump = None
 
         self._insn_menu = None  # type: DisasmInsnContextMenu
 
@@ -125,6 +129,10 @@ class DisassemblyView(BaseView):
         else:
             return self._flow_graph
 
+    @property
+    def feature_map(self):
+        return self._feature_map
+
     #
     # Callbacks
     #
@@ -198,12 +206,13 @@ class DisassemblyView(BaseView):
 
     def _update_current_graph(self):
         """
-        Redraw the graph currently in display.
+        Repaint the instructions and operands in the graph currently in display whose selection or highlighting state
+        has changed.
 
         :return:    None
         """
 
-        self.current_graph.redraw()
+        self.current_graph.update_selection(*self.infodock.take_selection_changes())
 
     #
     # UI
@@ -393,6 +402,8 @@ class DisassemblyView(BaseView):
                     is_renaming = True
                 kb.labels[addr] = new_name
 
+            self.workspace.instance.kb_changes.am_event(kind='label', addr=addr, value=new_name)
+
             # callback first
             if self._label_rename_callback:
                 self._label_rename_callback(addr=addr, new_name=new_name)
@@ -413,6 +424,8 @@ class DisassemblyView(BaseView):
 
             kb.comments[addr] = comment_text
 
+            self.workspace.instance.kb_changes.am_event(kind='comment', addr=addr, value=comment_text)
+
             # callback first
             if self._set_comment_callback:
                 self._set_comment_callback(addr=addr, comment_text=comment_text)
@@ -470,11 +483,14 @@ class DisassemblyView(BaseView):
 
     def _register_events(self):
 
-        # redraw the current graph if instruction/operand selection changes
-        self.infodock.selected_insns.am_subscribe(self._update_current_graph)
-        self.infodock.selected_operands.am_subscribe(self._update_current_graph)
+        # redraw the current graph if instruction/operand selection changes. a burst of selection changes only causes
+        # one redraw.
+        self.infodock.selected_insns.am_subscribe(self._update_current_graph, coalesce=True)
+        self.infodock.selected_operands.am_subscribe(self._update_current_graph, coalesce=True)
+
+        self._feature_map.addr.am_subscribe(self._on_feature_map_addr_changed)
 
-        self._feature_map.addr.am_subscribe(lambda: self._jump_to(self._feature_map.addr.am_obj))
+        self.workspace.instance.cfg_focus.am_subscribe(self._on_cfg_focused)
 
     #
     # Private methods
@@ -498,6 +514,9 @@ class DisassemblyView(BaseView):
             else:
                 vr = self.workspace.instance.project.analyses.VariableRecovery(the_func)
             variable_manager = vr.variable_manager
+            # blocks of this function may show different variables now
+            self.workspace.instance.block_objects.invalidate(the_func.addr)
+        self._account_variables(the_func, variable_manager)
         self.variable_manager = variable_manager
         self.infodock.variable_manager = variable_manager
 
@@ -518,8 +537,12 @@ class DisassemblyView(BaseView):
         })
 
     def _jump_to(self, addr):
+        # a no-op unless the CFG is being generated in demand-driven mode
+        self.workspace.instance.focus_cfg(addr)
+
         function = locate_function(self.workspace.instance, addr)
         if function is not None:
+            self._pending_jump = None
             self._display_function(function)
             instr_addr = function.addr_to_instruction_addr(addr)
             if instr_addr is None:
@@ -527,8 +550,31 @@ class DisassemblyView(BaseView):
             self.infodock.select_instruction(instr_addr, unique=True)
             return True
         else:
+            self._pending_jump = addr
             return False
 
+    def _on_feature_map_addr_changed(self, **kwargs):  # pylint:disable=unused-argument
+        self._jump_to(self._feature_map.addr.am_obj)
+
+    def _on_cfg_focused(self, addr=None, func=None, **kwargs):  # pylint:disable=unused-argument
+        current = self._current_function.am_obj
+        if addr == self._pending_jump or current is None:
+            self._jump_to(addr)
+        elif current.addr == func.addr and current is not func \
+                and len(func.block_addrs_set) > len(current.block_addrs_set):
+            # the function that is shown has been recovered more completely
+            self._display_function(func)
+
+    def _account_variables(self, func, variable_manager):
+        variable_managers = self.workspace.instance.variable_managers
+        if self._pinned_variables != func.addr:
+            variable_managers.pin(func.addr)
+            if self._pinned_variables is not None:
+                variable_managers.unpin(self._pinned_variables)
+            self._pinned_variables = func.addr
+        if variable_manager.has_function_manager(func.addr):
+            variable_managers[func.addr] = variable_manager[func.addr]
+
     #
     # Utils
     #
@@ -14,6 +14,8 @@ class FunctionsView(BaseView):
         self._status_label = None
 
         self.workspace.instance.cfg_container.am_subscribe(self.reload)
+        # tags arrive a chunk of functions at a time
+        self.workspace.instance.code_tags.am_subscribe(self._on_code_tags_changed, coalesce=True)
 
         self.backcolor_callback = None
 
@@ -75,3 +77,6 @@ class FunctionsView(BaseView):
         """
         self.workspace.on_function_selected(func=func)
 
+    def _on_code_tags_changed(self, **kwargs):  # pylint:disable=unused-argument
+        self._function_table.refresh_tags()
+
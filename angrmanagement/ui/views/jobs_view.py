@@ -0,0 +1,77 @@
+from PySide2.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog
+
+from .view import BaseView
+from ..widgets.qjob_table import QJobTable
+from ...data.jobs import records_to_json, records_to_chrome_trace
+
+
+class JobsView(BaseView):
+    """
+    How long each job waited and ran, how much CPU time and memory it took, and how often it reported progress.
+    """
+
+    def __init__(self, workspace, default_docking_position, *args, **kwargs):
+        super().__init__('jobs', workspace, default_docking_position, *args, **kwargs)
+
+        self.caption = "Jobs"
+        self._job_table = None  # type: QJobTable
+
+        self._init_widgets()
+
+    def reload(self):
+        self._job_table.reload()
+
+    #
+    # Public methods
+    #
+
+    def export(self, path, chrome_trace=False):
+        """
+        Export the records of all jobs.
+
+        :param str path:            Path of the file to write.
+        :param bool chrome_trace:   Export in the trace event format of chrome://tracing instead of plain JSON.
+        :return:                    None
+        """
+
+        records = list(self.workspace.instance.job_records.am_obj)
+        with open(path, "w") as f:
+            f.write(records_to_chrome_trace(records) if chrome_trace else records_to_json(records))
+
+    #
+    # Private methods
+    #
+
+    def _init_widgets(self):
+
+        self._job_table = QJobTable(self.workspace.instance, self)
+
+        export_json_button = QPushButton("Export as JSON...")
+        export_json_button.clicked.connect(self._on_export_json_clicked)
+        export_trace_button = QPushButton("Export as Chrome trace...")
+        export_trace_button.clicked.connect(self._on_export_trace_clicked)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(export_json_button)
+        buttons_layout.addWidget(export_trace_button)
+        buttons_layout.addStretch(0)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._job_table)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+
+    #
+    # Event handlers
+    #
+
+    def _on_export_json_clicked(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export job records", "jobs.json", "JSON files (*.json)")
+        if path:
+            self.export(path)
+
+    def _on_export_trace_clicked(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export job records", "jobs.trace.json",
+                                              "Chrome traces (*.json)")
+        if path:
+            self.export(path, chrome_trace=True)
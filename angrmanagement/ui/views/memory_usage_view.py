@@ -0,0 +1,116 @@
+from PySide2.QtWidgets import (QVBoxLayout, QHBoxLayout, QSpinBox, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+                               QAbstractItemView)
+from PySide2.QtCore import Qt, QTimer
+
+from .view import BaseView
+
+MB = 1024 * 1024
+
+
+class MemoryUsageView(BaseView):
+    """
+    How much memory the caches that are registered with the memory manager take, and the budget that they are kept in.
+    """
+
+    HEADER = ['Cache', 'Entries', 'Pinned', 'Size', 'Evictable']
+    REFRESH_INTERVAL = 1000  # in ms
+
+    def __init__(self, workspace, default_docking_position, *args, **kwargs):
+        super().__init__('memory_usage', workspace, default_docking_position, *args, **kwargs)
+
+        self.caption = "Memory Usage"
+
+        self._summary_label = None  # type: QLabel
+        self._budget_box = None  # type: QSpinBox
+        self._cache_table = None  # type: QTableWidget
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+        self._init_widgets()
+        self._timer.start()
+
+    @property
+    def memory(self):
+        return self.workspace.instance.memory
+
+    def reload(self):
+        self.refresh()
+
+    def refresh(self):
+        memory = self.memory
+        breakdown = memory.breakdown()
+        total = sum(size for _, _, _, size, _ in breakdown)
+        evictable = sum(size for _, _, _, size, is_evictable in breakdown if is_evictable)
+
+        self._summary_label.setText("Caches take %.1f MB, evictable caches %.1f MB%s. %d entries (%.1f MB) have been "
+                                    "evicted." % (total / MB, evictable / MB,
+                                                  " of %d MB" % (memory.budget // MB) if memory.budget else "",
+                                                  memory.evictions, memory.evicted_size / MB))
+
+        self._cache_table.setRowCount(len(breakdown))
+        # the largest first
+        for row, (name, entries, pinned, size, evictable) in enumerate(sorted(breakdown, key=lambda c: -c[3])):
+            widgets = [
+                QTableWidgetItem(name),
+                QTableWidgetItem("%d" % entries),
+                QTableWidgetItem("%d" % pinned),
+                QTableWidgetItem("%.1f MB" % (size / MB)),
+                QTableWidgetItem("Yes" if evictable else "No"),
+            ]
+            for col, w in enumerate(widgets):
+                w.setFlags(w.flags() & ~Qt.ItemIsEditable)
+                self._cache_table.setItem(row, col, w)
+
+    #
+    # Private methods
+    #
+
+    def _init_widgets(self):
+
+        self._summary_label = QLabel(self)
+
+        self._budget_box = QSpinBox()
+        self._budget_box.setRange(0, 1024 * 1024)
+        self._budget_box.setSingleStep(256)
+        self._budget_box.setSuffix(" MB")
+        self._budget_box.setSpecialValueText("No limit")
+        self._budget_box.setValue(self.memory.budget // MB)
+        self._budget_box.valueChanged.connect(self._on_budget_changed)
+
+        evict_button = QPushButton("Evict all")
+        evict_button.setToolTip("Evict every entry that is neither pinned nor in a cache that is never evicted from.")
+        evict_button.clicked.connect(self._on_evict_clicked)
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("Budget"))
+        options_layout.addWidget(self._budget_box)
+        options_layout.addStretch(0)
+        options_layout.addWidget(evict_button)
+
+        self._cache_table = QTableWidget(self)
+        self._cache_table.setColumnCount(len(self.HEADER))
+        self._cache_table.setHorizontalHeaderLabels(self.HEADER)
+        self._cache_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._cache_table.verticalHeader().setVisible(False)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(options_layout)
+        layout.addWidget(self._summary_label)
+        layout.addWidget(self._cache_table)
+        self.setLayout(layout)
+
+        self.refresh()
+
+    #
+    # Event handlers
+    #
+
+    def _on_budget_changed(self, value):
+        self.memory.set_budget(value * MB)
+        self.refresh()
+
+    def _on_evict_clicked(self):
+        self.memory.enforce(budget=0)
+        self.refresh()
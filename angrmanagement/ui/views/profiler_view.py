@@ -0,0 +1,125 @@
+import time
+
+from PySide2.QtWidgets import (QVBoxLayout, QHBoxLayout, QCheckBox, QSpinBox, QLabel, QPushButton, QTableWidget,
+                               QTableWidgetItem, QAbstractItemView)
+from PySide2.QtCore import Qt, QTimer
+
+from .view import BaseView
+from ..widgets.qframe_time_graph import QFrameTimeGraph
+from ...logic.profiler import profiler
+
+
+class ProfilerView(BaseView):
+    """
+    Frame times of the GUI thread, and the paints, event handlers, and scheduled calls that took longer than the
+    threshold, with the stack of the GUI thread while they ran as tool tips.
+    """
+
+    HEADER = ['Time', 'Kind', 'Name', 'Duration']
+    REFRESH_INTERVAL = 250  # in ms
+
+    def __init__(self, workspace, default_docking_position, *args, **kwargs):
+        super().__init__('profiler', workspace, default_docking_position, *args, **kwargs)
+
+        self.caption = "Profiler"
+
+        self._enabled_checkbox = None  # type: QCheckBox
+        self._threshold_box = None  # type: QSpinBox
+        self._graph = None  # type: QFrameTimeGraph
+        self._slow_table = None  # type: QTableWidget
+        self._shown_slow_sections = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+        self._init_widgets()
+        if profiler.enabled:
+            self._timer.start()
+
+    def reload(self):
+        self.refresh()
+
+    def refresh(self):
+        self._graph.update()
+
+        slow_sections = list(profiler.slow_sections)
+        if self._shown_slow_sections is not None and self._shown_slow_sections == slow_sections:
+            return
+        self._shown_slow_sections = slow_sections
+
+        self._slow_table.setRowCount(len(slow_sections))
+        # the most recent first
+        for row, section in enumerate(reversed(slow_sections)):
+            widgets = [
+                QTableWidgetItem(time.strftime("%H:%M:%S", time.localtime(section.timestamp))),
+                QTableWidgetItem(section.kind),
+                QTableWidgetItem(section.name),
+                QTableWidgetItem("%.1f ms" % (section.duration * 1000)),
+            ]
+            for col, w in enumerate(widgets):
+                w.setFlags(w.flags() & ~Qt.ItemIsEditable)
+                if section.stack:
+                    w.setToolTip(section.stack)
+                self._slow_table.setItem(row, col, w)
+
+    #
+    # Private methods
+    #
+
+    def _init_widgets(self):
+
+        self._enabled_checkbox = QCheckBox("Profile the GUI thread")
+        self._enabled_checkbox.setChecked(profiler.enabled)
+        self._enabled_checkbox.stateChanged.connect(self._on_enabled_changed)
+
+        self._threshold_box = QSpinBox()
+        self._threshold_box.setRange(1, 10000)
+        self._threshold_box.setSuffix(" ms")
+        self._threshold_box.setValue(int(profiler.threshold * 1000))
+        self._threshold_box.valueChanged.connect(self._on_threshold_changed)
+
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self._on_clear_clicked)
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(self._enabled_checkbox)
+        options_layout.addWidget(QLabel("Report sections slower than"))
+        options_layout.addWidget(self._threshold_box)
+        options_layout.addStretch(0)
+        options_layout.addWidget(clear_button)
+
+        self._graph = QFrameTimeGraph(profiler, self)
+
+        self._slow_table = QTableWidget(self)
+        self._slow_table.setColumnCount(len(self.HEADER))
+        self._slow_table.setHorizontalHeaderLabels(self.HEADER)
+        self._slow_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._slow_table.verticalHeader().setVisible(False)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(options_layout)
+        layout.addWidget(self._graph)
+        layout.addWidget(self._slow_table)
+        self.setLayout(layout)
+
+    #
+    # Event handlers
+    #
+
+    def _on_enabled_changed(self, state):
+        if state == Qt.Checked:
+            profiler.enable(threshold=self._threshold_box.value() / 1000.0)
+            self._timer.start()
+        else:
+            profiler.disable()
+            self._timer.stop()
+        self.refresh()
+
+    def _on_threshold_changed(self, value):
+        profiler.threshold = value / 1000.0
+        self._graph.update()
+
+    def _on_clear_clicked(self):
+        profiler.reset()
+        self.refresh()
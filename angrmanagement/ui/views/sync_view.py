@@ -175,5 +175,5 @@ class SyncView(BaseView):
             # TODO: CFG refinement
             self.workspace.instance.generate_cfg()
 
-    def _update_users(self):
-        self._team_table.update_users(self.workspace.instance.sync.users)
+    def _update_users(self, changed_users=None, **kwargs):
+        self._team_table.update_users(self.workspace.instance.sync.users, changed_users=changed_users)
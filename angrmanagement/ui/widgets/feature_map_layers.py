@@ -0,0 +1,201 @@
+from PySide2.QtGui import QColor
+
+from angr.knowledge_plugins import Function
+
+# how the weights of ranges that fall into the same column of the feature map are combined
+AGGREGATE_SUM = 'sum'
+AGGREGATE_MAX = 'max'
+
+
+class FeatureMapLayer:
+    """
+    An overlay of the feature map. A layer collects weighted address ranges, which are binned into the columns of the
+    map. Its columns are painted in its color over the base map, more opaque where the weight is higher.
+
+    Layers are collected on a worker thread, when they are enabled and whenever one of their sources fires an event.
+    Plugins add their own layers with Workspace.add_feature_map_layer().
+
+    :cvar str DISPLAY_NAME:     Name of the layer in the context menu of the feature map.
+    :cvar QColor COLOR:         Color of the layer.
+    :cvar str AGGREGATE:        How weights in the same column are combined, AGGREGATE_SUM or AGGREGATE_MAX.
+    :cvar bool ENABLED:         Whether the layer is shown when it is added.
+    """
+
+    DISPLAY_NAME = None
+    COLOR = QColor(0xff, 0, 0)
+    AGGREGATE = AGGREGATE_SUM
+    ENABLED = False
+
+    @classmethod
+    def get_display_name(cls):
+        return cls.DISPLAY_NAME if cls.DISPLAY_NAME is not None else cls.__name__
+
+    def sources(self, instance):
+        """
+        Get the objects whose events mean that the layer must be collected again. Sources are queried again every time
+        one of them fires, so they may change over time.
+
+        :param angrmanagement.data.instance.Instance instance:  The instance.
+        :return:                                                A list of ObjectContainers.
+        :rtype:                                                 list
+        """
+        return [ ]
+
+    def collect(self, instance):
+        """
+        Collect the weighted address ranges of the layer. This is called on a worker thread.
+
+        :param angrmanagement.data.instance.Instance instance:  The instance.
+        :return:                                                An iterable of (addr, size, weight) tuples.
+        """
+        raise NotImplementedError()
+
+
+def _function_ranges(func, gap=0x10):
+    """
+    Get the address ranges that the blocks of a function cover. Blocks that are at most gap bytes apart, e.g., because
+    of alignment, are merged into the same range. A column of the feature map usually spans many blocks, so this yields
+    far fewer ranges than there are blocks.
+
+    :return:    (addr, size) pairs.
+    """
+
+    blocks = sorted((node.addr, node.size or 1) for node in func.transition_graph if not isinstance(node, Function))
+    if not blocks:
+        return
+    start, end = blocks[0][0], blocks[0][0] + blocks[0][1]
+    for addr, size in blocks:
+        if addr > end + gap:
+            yield start, end - start
+            start = addr
+        end = max(end, addr + size)
+    yield start, end - start
+
+
+class XRefDensityLayer(FeatureMapLayer):
+    """
+    How many cross references point to each address.
+    """
+
+    DISPLAY_NAME = 'Cross-reference density'
+    COLOR = QColor(0xff, 0x80, 0)
+    AGGREGATE = AGGREGATE_SUM
+
+    def sources(self, instance):
+        return [ instance.cfg_container ]
+
+    def collect(self, instance):
+        if instance.project is None:
+            return
+        # the CFG may still be adding cross references on its own thread. list() copies the items of a dict without
+        # releasing the GIL, while iterating over the dict itself would fail once it changes size.
+        for dst, xrefs in list(instance.project.kb.xrefs.xrefs_by_dst.items()):
+            yield dst, 1, len(xrefs)
+
+
+class FunctionComplexityLayer(FeatureMapLayer):
+    """
+    The cyclomatic complexity of the function that each block belongs to.
+    """
+
+    DISPLAY_NAME = 'Function complexity'
+    COLOR = QColor(0xe0, 0, 0x40)
+    AGGREGATE = AGGREGATE_MAX
+
+    def sources(self, instance):
+        return [ instance.cfg_container ]
+
+    def collect(self, instance):
+        if instance.cfg is None:
+            return
+        for func in list(instance.cfg.kb.functions.values()):
+            tg = func.transition_graph
+            # number_of_edges() goes through the degree view of the graph, which is much slower
+            edges = sum(len(succ) for _, succ in tg.adjacency())
+            complexity = max(1, edges - len(tg) + 2)
+            for addr, size in _function_ranges(func):
+                yield addr, size, complexity
+
+
+class CodeTagLayer(FeatureMapLayer):
+    """
+    Functions that CodeTaggingJob has put tags on.
+    """
+
+    DISPLAY_NAME = 'Code tags'
+    COLOR = QColor(0x80, 0, 0xc0)
+    AGGREGATE = AGGREGATE_MAX
+
+    def sources(self, instance):
+        return [ instance.code_tags ]
+
+    def collect(self, instance):
+        if instance.cfg is None:
+            return
+        for func in list(instance.cfg.kb.functions.values()):
+            tags = getattr(func, 'tags', None)
+            if not tags:
+                continue
+            for addr, size in _function_ranges(func):
+                yield addr, size, len(tags)
+
+
+class SymexecCoverageLayer(FeatureMapLayer):
+    """
+    Blocks that the states of any simulation manager have executed.
+    """
+
+    DISPLAY_NAME = 'Symbolic execution coverage'
+    COLOR = QColor(0, 0xb0, 0x40)
+    AGGREGATE = AGGREGATE_MAX
+
+    def sources(self, instance):
+        return [ instance.simgrs ] + list(instance.simgrs)
+
+    def collect(self, instance):
+        cfg = instance.cfg
+        # states of the same simulation manager share most of their histories
+        seen = set()
+        addrs = set()
+        for simgr in list(instance.simgrs):
+            for states in list(simgr.stashes.values()):
+                for state in list(states):
+                    history = state.history
+                    while history is not None and history not in seen:
+                        seen.add(history)
+                        if history.addr is not None:
+                            addrs.add(history.addr)
+                        history = history.parent
+
+        for addr in addrs:
+            node = cfg.get_any_node(addr) if cfg is not None else None
+            yield addr, node.size if node is not None and node.size else 1, 1
+
+
+class PatchLayer(FeatureMapLayer):
+    """
+    Patched bytes.
+    """
+
+    DISPLAY_NAME = 'Patches'
+    COLOR = QColor(0xff, 0, 0)
+    AGGREGATE = AGGREGATE_MAX
+    ENABLED = True
+
+    def sources(self, instance):
+        return [ instance.patches ]
+
+    def collect(self, instance):
+        if instance.project is None:
+            return
+        for patch in list(instance.project.kb.patches.values()):
+            yield patch.addr, len(patch), 1
+
+
+DEFAULT_LAYERS = [
+    XRefDensityLayer,
+    FunctionComplexityLayer,
+    CodeTagLayer,
+    SymexecCoverageLayer,
+    PatchLayer,
+]
@@ -1,19 +1,25 @@
+import bisect
 import logging
+from array import array
 
-from PySide2.QtGui import QColor, QPen, QPainterPath
-from PySide2.QtCore import QRectF, QMarginsF
+from PySide2.QtGui import QColor, QPen, QPainterPath, QCursor
+from PySide2.QtCore import Qt, QRectF
+from PySide2.QtWidgets import QApplication, QGraphicsItem
 
-from angr.analyses.disassembly import Instruction
+from angr.analyses.disassembly import Instruction, ConstantOperand
 from angr.sim_variable import SimRegisterVariable
 
-from ...utils import get_block_objects, get_out_branches_for_insn
+from ...utils import get_out_branches_for_insn, should_display_string_label, \
+    get_string_for_display, get_comment_for_display
 from ...utils.block_objects import Variables, PhiVariable, Label
 from ...config import Conf
-from .qinstruction import QInstruction
+from ...logic.disassembly.info_dock import OperandDescriptor
+from .qinstruction import QInstruction, operand_branch_info, instruction_backcolor
+from .qoperand import QOperand, OperandDisplay, operand_color, operand_width
 from .qblock_label import QBlockLabel
 from .qphivariable import QPhiVariable
 from .qvariable import QVariable
-from .qgraph_object import QCachedGraphicsItem
+from .qgraph_object import QCachedGraphicsItem, cached_static_text
 
 _l = logging.getLogger(__name__)
 
@@ -109,7 +115,8 @@ class QBlock(QCachedGraphicsItem):
     def _init_widgets(self):
 
         self.objects.clear()
-        block_objects = get_block_objects(self.disasm, self.cfg_nodes, self.func_addr)
+        block_objects = self.workspace.instance.block_objects.get_block_objects(self.disasm, self.cfg_nodes,
+                                                                                self.func_addr)
 
         for obj in block_objects:
             if isinstance(obj, Instruction):
@@ -138,17 +145,306 @@ class QBlock(QCachedGraphicsItem):
 
 
 class QGraphBlock(QBlock):
+    """
+    A block in the disassembly graph.
+
+    Instructions and operands are not graphics items of their own. The block keeps what it displays for every
+    instruction and operand in flat arrays, paints the instructions that are exposed, and maps mouse events to
+    instructions and operands itself. Labels and variables are still child items.
+    """
+
     MINIMUM_DETAIL_LEVEL = 0.4
 
+    def __init__(self, workspace, func_addr, disasm_view, disasm, infodock, addr, cfg_nodes, out_branches, parent=None):
+        super().__init__(workspace, func_addr, disasm_view, disasm, infodock, addr, cfg_nodes, out_branches,
+                         parent=parent)
+
+        # option.exposedRect is only set with this flag
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
     @property
     def mode(self):
         return 'graph'
 
-    def layout_widgets(self):
-        x, y = self.LEFT_PADDING, self.TOP_PADDING
+    @property
+    def insn_addrs(self):
+        return self._insn_addrs
+
+    #
+    # Public methods
+    #
+
+    def refresh_if_contains_addr(self, addr1, addr2):
+        if addr1 in self.addr_to_insn_index or addr2 in self.addr_to_insn_index:
+            self.refresh()
+
+    def refresh(self):
+        self._load_comments()
         for obj in self.objects:
-            obj.setPos(x, y)
-            y += obj.boundingRect().height()
+            obj.refresh()
+        self.layout_widgets()
+        self.recalculate_size()
+        self._create_block_item()
+        self.update()
+
+    def instruction_position(self, insn_addr):
+        idx = self.addr_to_insn_index.get(insn_addr, None)
+        if idx is None:
+            return None
+        return self.LEFT_PADDING, self._insn_y[idx]
+
+    def update_instruction(self, insn_addr):
+        """
+        Repaint an instruction, including its operands.
+
+        :param int insn_addr:   Address of the instruction.
+        :return:                None
+        """
+
+        idx = self.addr_to_insn_index.get(insn_addr, None)
+        if idx is not None:
+            self.update(QRectF(self.LEFT_PADDING, self._insn_y[idx], self._insn_width[idx],
+                               self._config.disasm_font_height))
+
+    def update_operand(self, insn_addr, operand_idx):
+        """
+        Repaint an operand.
+
+        :param int insn_addr:   Address of the instruction.
+        :param int operand_idx: Index of the operand in the instruction.
+        :return:                None
+        """
+
+        j = self._operand_slot(insn_addr, operand_idx)
+        if j is not None:
+            idx = self.addr_to_insn_index[insn_addr]
+            self.update(QRectF(self._operand_x[j], self._insn_y[idx], self._operand_width[j],
+                               self._config.disasm_font_height))
+
+    def operand_highlight_keys(self):
+        """
+        The highlight keys of all operands in this block, under the current highlight mode of the info dock.
+
+        :return:    A generator of tuples of highlight key, instruction address, and operand index.
+        """
+
+        for idx, insn_addr in enumerate(self._insn_addrs):
+            start = self._operand_start[idx]
+            for j in range(start, self._operand_start[idx + 1]):
+                yield self._operand_highlight_key(j), insn_addr, j - start
+
+    def operand_variable(self, insn_addr, operand_idx):
+        """
+        The variable that an operand is linked to, or None.
+        """
+
+        display = self._operand_displays.get(self._operand_slot(insn_addr, operand_idx), None)
+        return display.variable if display is not None else None
+
+    def operand_constant_value(self, insn_addr, operand_idx):
+        """
+        The value of an operand if it is a constant, or None.
+        """
+
+        if self._operand_slot(insn_addr, operand_idx) is None:
+            return None
+        operand = self._insns[self.addr_to_insn_index[insn_addr]].operands[operand_idx]
+        if isinstance(operand, ConstantOperand):
+            return operand.cs_operand.imm
+        return None
+
+    #
+    # Initialization
+    #
+
+    def _init_widgets(self):
+        self.objects.clear()
+        self.addr_to_labels.clear()
+
+        # one entry per instruction
+        self._insns = [ ]
+        self._insn_addrs = array('Q')
+        self.addr_to_insn_index = { }
+        self._mnemonics = [ ]
+        self._insn_y = array('d')
+        self._insn_width = array('d')
+        # operands of instruction i are at indices _operand_start[i] to _operand_start[i + 1] - 1 in the operand arrays
+        self._operand_start = array('I', [ 0 ])
+        # one entry per operand
+        self._operand_labels = [ ]
+        self._operand_x = array('d')
+        self._operand_width = array('d')
+        # only for operands that are branch targets or are linked to variables
+        self._operand_displays = { }
+        # instruction index -> text
+        self._comments = { }
+        self._strings = { }
+        # what is displayed, from top to bottom: instruction indices and child items
+        self._rows = [ ]
+        self._content_width = 0
+        self._content_height = 0
+
+        block_objects = self.workspace.instance.block_objects.get_block_objects(self.disasm, self.cfg_nodes,
+                                                                                self.func_addr)
+        for obj in block_objects:
+            if isinstance(obj, Instruction):
+                self._add_instruction(obj)
+            elif isinstance(obj, Label):
+                # label
+                label = QBlockLabel(obj.addr, obj.text, self._config, self.disasm_view, self.workspace, parent=self)
+                self.objects.append(label)
+                self.addr_to_labels[obj.addr] = label
+                self._rows.append(label)
+            elif isinstance(obj, PhiVariable):
+                if not isinstance(obj.variable, SimRegisterVariable):
+                    phivariable = QPhiVariable(self.workspace, self.disasm_view, obj, self._config, parent=self)
+                    self.objects.append(phivariable)
+                    self._rows.append(phivariable)
+            elif isinstance(obj, Variables):
+                for var in obj.variables:
+                    variable = QVariable(self.workspace, self.disasm_view, var, self._config, parent=self)
+                    self.objects.append(variable)
+                    self._rows.append(variable)
+
+        self._load_comments()
+        self.layout_widgets()
+
+    def _add_instruction(self, insn):
+        idx = len(self._insns)
+        self._insns.append(insn)
+        self._insn_addrs.append(insn.addr)
+        self.addr_to_insn_index[insn.addr] = idx
+        self._mnemonics.append(insn.mnemonic.render()[0])
+
+        out_branch = get_out_branches_for_insn(self.out_branches, insn.addr)
+        for i, operand in enumerate(insn.operands):
+            is_branch_target, is_indirect_branch, branch_targets = operand_branch_info(insn, i, operand, out_branch)
+            display = OperandDisplay(self.workspace, self.func_addr, self.disasm, self.infodock, insn, operand, i,
+                                     is_branch_target, is_indirect_branch, branch_targets, self._config)
+            if is_branch_target or display.variable_label is not None:
+                self._operand_displays[len(self._operand_labels)] = display
+            self._operand_labels.append(display.label)
+        self._operand_start.append(len(self._operand_labels))
+
+        cfg = self.workspace.instance.cfg
+        if should_display_string_label(cfg, insn.addr):
+            self._strings[idx] = get_string_for_display(cfg, insn.addr)
+
+        self._rows.append(idx)
+
+    def _load_comments(self):
+        kb = self.workspace.instance.cfg.kb
+        self._comments.clear()
+        for idx, insn_addr in enumerate(self._insn_addrs):
+            comment = get_comment_for_display(kb, insn_addr)
+            if comment is not None:
+                self._comments[idx] = comment
+
+    def layout_widgets(self):
+        font_width = self._config.disasm_font_width
+        font_height = self._config.disasm_font_height
+        intersperse_width = self._config.disasm_font_metrics.width(QInstruction.INTERSPERSE_ARGS)
+        show_address = self.disasm_view.show_address
+
+        insn_ys = array('d')
+        insn_widths = array('d')
+        operand_xs = array('d')
+        operand_widths = array('d')
+
+        x0, y = self.LEFT_PADDING, self.TOP_PADDING
+        width = 0
+        for row in self._rows:
+            if not isinstance(row, int):
+                # a child item
+                row.setPos(x0, y)
+                rect = row.boundingRect()
+                width = max(width, rect.width())
+                y += rect.height()
+                continue
+
+            x = x0
+            if show_address:
+                x += font_width * len("%08x" % self._insn_addrs[row]) + QInstruction.GRAPH_ADDR_SPACING
+            x += font_width * len(self._mnemonics[row])
+            end = x
+            x += QInstruction.GRAPH_MNEMONIC_SPACING
+
+            start, stop = self._operand_start[row], self._operand_start[row + 1]
+            for j in range(start, stop):
+                if j > start:
+                    x += intersperse_width
+                display = self._operand_displays.get(j, None)
+                if display is None:
+                    w = font_width * len(self._operand_labels[j])
+                else:
+                    w = operand_width(display, self.disasm_view)
+                operand_xs.append(x)
+                operand_widths.append(w)
+                x += w
+                end = x
+
+            # comments have precedence over strings
+            comment = self._comments.get(row, None)
+            if comment is not None:
+                end += QInstruction.GRAPH_COMMENT_STRING_SPACING + \
+                       font_width * len(QInstruction.COMMENT_PREFIX + comment)
+            elif row in self._strings:
+                end += QInstruction.GRAPH_COMMENT_STRING_SPACING + font_width * len(self._strings[row])
+
+            insn_ys.append(y)
+            insn_widths.append(max(end, x) - x0)
+            width = max(width, max(end, x) - x0)
+            y += font_height
+
+        self._insn_y = insn_ys
+        self._insn_width = insn_widths
+        self._operand_x = operand_xs
+        self._operand_width = operand_widths
+        self._content_width = width
+        self._content_height = y - self.TOP_PADDING
+
+    #
+    # Event handlers
+    #
+
+    def mousePressEvent(self, event):
+        hit = self._hit_test(event.pos())
+        if hit is None:
+            super().mousePressEvent(event)
+            return
+
+        idx, j = hit
+        insn = self._insns[idx]
+        insn_pos = self.mapToScene(self.LEFT_PADDING, self._insn_y[idx])
+        if event.button() == Qt.LeftButton:
+            unique = QApplication.keyboardModifiers() != Qt.ControlModifier
+            if j is not None:
+                self.infodock.toggle_operand_selection(insn.addr, j - self._operand_start[idx],
+                                                       self._operand_descriptor(j), insn_pos=insn_pos, unique=unique)
+            else:
+                # toggle selection
+                self.infodock.toggle_instruction_selection(insn.addr, insn_pos=insn_pos, unique=unique)
+            event.accept()
+        elif event.button() == Qt.RightButton:
+            # display the context menu
+            self.disasm_view.instruction_context_menu(insn, QCursor.pos())
+            event.accept()
+        else:
+            super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        hit = self._hit_test(event.pos())
+        if hit is not None and hit[1] is not None and event.button() == Qt.LeftButton:
+            idx, j = hit
+            display = self._operand_displays.get(j, None)
+            if display is not None and display.branch_target is not None:
+                self.disasm_view.jump_to(display.branch_target, src_ins_addr=self._insn_addrs[idx])
+            return
+        super().mouseDoubleClickEvent(event)
+
+    #
+    # Painting
+    #
 
     def paint(self, painter, option, widget):  # pylint: disable=unused-argument
         lod = option.levelOfDetailFromTransform(painter.worldTransform())
@@ -171,10 +467,167 @@ class QGraphBlock(QBlock):
                 obj.setEnabled(not should_omit_text)
             self._objects_are_hidden = should_omit_text
 
+        if not should_omit_text:
+            self._paint_instructions(painter, option.exposedRect)
+
+    def _paint_instructions(self, painter, rect):
+        font_height = self._config.disasm_font_height
+        # instructions that overlap with the exposed rectangle
+        first = bisect.bisect_right(self._insn_y, rect.top() - font_height)
+        last = bisect.bisect_left(self._insn_y, rect.bottom())
+        if first >= last:
+            return
+
+        # render hints are set by the view. texts are drawn with their top-left corner at the given position.
+        painter.setFont(self._config.disasm_font)
+        text_color = QColor(0, 0, 0x80)
+        intersperse_text = cached_static_text(QInstruction.INTERSPERSE_ARGS)
+        show_address = self.disasm_view.show_address
+        x0 = self.LEFT_PADDING
+
+        for idx in range(first, last):
+            insn_addr = self._insn_addrs[idx]
+            y = self._insn_y[idx]
+
+            # selection
+            backcolor = instruction_backcolor(self.disasm_view, insn_addr,
+                                              self.infodock.is_instruction_selected(insn_addr))
+            if backcolor is not None:
+                painter.setBrush(backcolor)
+                painter.setPen(backcolor)
+                painter.drawRect(x0, y, self._insn_width[idx], font_height)
+
+            x = x0
+            # address
+            if show_address:
+                addr_str = "%08x" % insn_addr
+                painter.setPen(Qt.black)
+                painter.drawStaticText(x, y, cached_static_text(addr_str))
+                x += self._config.disasm_font_width * len(addr_str) + QInstruction.GRAPH_ADDR_SPACING
+
+            # mnemonic
+            mnemonic = self._mnemonics[idx]
+            painter.setPen(text_color)
+            painter.drawStaticText(x, y, cached_static_text(mnemonic))
+            x += self._config.disasm_font_width * len(mnemonic)
+
+            # operands, separated by commas
+            start, stop = self._operand_start[idx], self._operand_start[idx + 1]
+            for j in range(start, stop):
+                self._paint_operand(painter, insn_addr, j - start, j, y, text_color)
+                x = self._operand_x[j] + self._operand_width[j]
+                if j < stop - 1:
+                    painter.setPen(text_color)
+                    painter.drawStaticText(x, y, intersperse_text)
+
+            # comment or string - comments have precedence
+            comment = self._comments.get(idx, None)
+            if comment is not None:
+                painter.setPen(Qt.darkGreen)
+                painter.drawStaticText(x + QInstruction.GRAPH_COMMENT_STRING_SPACING, y,
+                                       cached_static_text(QInstruction.COMMENT_PREFIX + comment))
+            elif idx in self._strings:
+                painter.setPen(Qt.gray)
+                painter.drawStaticText(x + QInstruction.GRAPH_COMMENT_STRING_SPACING, y,
+                                       cached_static_text(self._strings[idx]))
+
+    def _paint_operand(self, painter, insn_addr, operand_idx, j, y, text_color):
+        x, width = self._operand_x[j], self._operand_width[j]
+        height = self._config.disasm_font_height
+
+        if self.infodock.is_operand_selected(insn_addr, operand_idx):
+            painter.setPen(self._config.disasm_view_operand_select_color)
+            painter.setBrush(self._config.disasm_view_operand_select_color)
+            painter.drawRect(x, y, width, height)
+        elif self.infodock.highlighted_operand_keys and \
+                self._operand_highlight_key(j) in self.infodock.highlighted_operand_keys:
+            painter.setBrush(self._config.disasm_view_operand_highlight_color)
+            painter.setPen(self._config.disasm_view_operand_highlight_color)
+            painter.drawRect(x, y, width, height)
+
+        display = self._operand_displays.get(j, None)
+        if display is None:
+            painter.setPen(text_color)
+            painter.drawStaticText(x, y, cached_static_text(self._operand_labels[j]))
+            return
+
+        painter.setPen(operand_color(display, self.disasm_view, self.infodock, self._config))
+        if self.disasm_view.show_variable and display.variable_label is not None:
+            painter.drawStaticText(x, y, cached_static_text(display.variable_label))
+            x += display.variable_label_width
+        else:
+            painter.drawStaticText(x, y, cached_static_text(display.label))
+            x += display.label_width
+
+        # draw additional branch targets
+        if display.branch_targets_text:
+            painter.setPen(Qt.darkYellow)
+            x += QOperand.BRANCH_TARGETS_SPACING
+            painter.drawStaticText(x, y, cached_static_text(display.branch_targets_text))
+            x += display.branch_targets_text_width
+
+        if display.variable is not None and self.disasm_view.show_variable_identifier:
+            x += QOperand.VARIABLE_IDENT_SPACING
+            painter.setPen(Qt.darkGreen)
+            painter.drawStaticText(x, y, cached_static_text(display.variable_ident))
+
+    #
+    # Private methods
+    #
+
+    def _operand_slot(self, insn_addr, operand_idx):
+        """
+        Index of an operand in the operand arrays, or None if there is no such operand.
+        """
+
+        idx = self.addr_to_insn_index.get(insn_addr, None)
+        if idx is None:
+            return None
+        j = self._operand_start[idx] + operand_idx
+        if operand_idx < 0 or j >= self._operand_start[idx + 1]:
+            return None
+        return j
+
+    def _operand_highlight_key(self, j):
+        display = self._operand_displays.get(j, None)
+        variable = display.variable if display is not None else None
+        return self.infodock.operand_highlight_key(self.func_addr, self._operand_labels[j], variable)
+
+    def _operand_descriptor(self, j):
+        display = self._operand_displays.get(j, None)
+        variable = display.variable if display is not None else None
+        return OperandDescriptor(self._operand_labels[j], None,
+                                 func_addr=self.func_addr,
+                                 variable_ident=variable.ident if variable is not None else None)
+
+    def _hit_test(self, pos):
+        """
+        Find the instruction and the operand under a position.
+
+        :param QPointF pos: The position, in item coordinates.
+        :return:            A tuple of the instruction index and the operand index in the operand arrays (or None if
+                            the position is not on an operand), or None if the position is not on an instruction.
+        :rtype:             tuple
+        """
+
+        if self._objects_are_hidden:
+            return None
+
+        x, y = pos.x(), pos.y()
+        idx = bisect.bisect_right(self._insn_y, y) - 1
+        if idx < 0 or y >= self._insn_y[idx] + self._config.disasm_font_height:
+            return None
+        if not self.LEFT_PADDING <= x < self.LEFT_PADDING + self._insn_width[idx]:
+            return None
+
+        for j in range(self._operand_start[idx], self._operand_start[idx + 1]):
+            if self._operand_x[j] <= x < self._operand_x[j] + self._operand_width[j]:
+                return idx, j
+        return idx, None
+
     def _boundingRect(self):
-        cbr = self.childrenBoundingRect()
-        margins = QMarginsF(self.LEFT_PADDING, self.TOP_PADDING, self.RIGHT_PADDING, self.BOTTOM_PADDING)
-        return cbr.marginsAdded(margins)
+        return QRectF(0, 0, self.LEFT_PADDING + self._content_width + self.RIGHT_PADDING,
+                      self.TOP_PADDING + self._content_height + self.BOTTOM_PADDING)
 
 
 class QLinearBlock(QBlock):
@@ -20,3 +20,18 @@ class QDisassemblyBaseControl:
 
     def show_instruction(self, insn_addr, insn_pos=None, centering=False, use_block_pos=False):
         raise NotImplementedError()
+
+    def redraw(self):
+        raise NotImplementedError()
+
+    def update_selection(self, insn_addrs, operands, highlight_keys):
+        """
+        Repaint items whose selection or highlighting state has changed. Controls that cannot find the affected items
+        repaint everything.
+
+        :param set insn_addrs:      Addresses of instructions.
+        :param set operands:        (instruction address, operand index) tuples of operands.
+        :param set highlight_keys:  Highlight keys of operands.
+        :return:                    None
+        """
+        self.redraw()
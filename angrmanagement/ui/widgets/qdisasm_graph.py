@@ -1,8 +1,11 @@
 
 import logging
+from collections import defaultdict
 
+from PySide2.QtGui import QPainter
 from PySide2.QtCore import QRect, QPointF, Qt, QSize, QEvent, QRectF
 
+from ...logic.profiler import profiler, PROFILE_PAINT
 from ...utils import get_out_branches
 from ...utils.graph_layouter import GraphLayouter
 from ...utils.cfg import categorize_edges
@@ -32,10 +35,16 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
 
         self.blocks = [ ]
         self._insaddr_to_block = { }
+        # highlight mode, and highlight key -> (block, instruction address, operand index). built when it is first
+        # needed.
+        self._highlight_index = None
 
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
 
+        # set once here instead of by every instruction and operand when it is painted
+        self.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform | QPainter.HighQualityAntialiasing)
+
     #
     # Properties
     #
@@ -78,6 +87,7 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
 
         self.blocks.clear()
         self._insaddr_to_block.clear()
+        self._highlight_index = None
 
         supergraph = self._function_graph.supergraph
         for n in supergraph.nodes():
@@ -88,7 +98,7 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
             self.scene().addItem(block)
             self.blocks.append(block)
 
-            for insn_addr in block.addr_to_insns.keys():
+            for insn_addr in block.insn_addrs:
                 self._insaddr_to_block[insn_addr] = block
 
         self.request_relayout()
@@ -110,9 +120,28 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
         for b in self.blocks:
             b.layout_widgets()
             b.refresh()
+        # operands may have been linked to different variables
+        self._highlight_index = None
 
         self.request_relayout()
 
+    def update_selection(self, insn_addrs, operands, highlight_keys):
+        for insn_addr in insn_addrs:
+            block = self._insaddr_to_block.get(insn_addr, None)
+            if block is not None:
+                block.update_instruction(insn_addr)
+
+        for insn_addr, operand_idx in operands:
+            block = self._insaddr_to_block.get(insn_addr, None)
+            if block is not None:
+                block.update_operand(insn_addr, operand_idx)
+
+        if highlight_keys:
+            index = self._operands_by_highlight_key()
+            for key in highlight_keys:
+                for block, insn_addr, operand_idx in index.get(key, ()):
+                    block.update_operand(insn_addr, operand_idx)
+
     #
     # Event handlers
     #
@@ -128,6 +157,10 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
             return True
         return super().event(event)
 
+    def paintEvent(self, event):
+        with profiler.measure(PROFILE_PAINT, 'QDisassemblyGraph'):
+            super().paintEvent(event)
+
     def mousePressEvent(self, event):
         btn = event.button()
         if btn == Qt.ForwardButton:
@@ -156,14 +189,14 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
                 ins_addr, operand_idx = next(iter(self.infodock.selected_operands))
                 block = self._insaddr_to_block.get(ins_addr, None)
                 if block is not None:
-                    operand = block.addr_to_insns[ins_addr].get_operand(operand_idx)
-                    if operand is not None:
-                        if operand.variable is not None:
-                            # Display cross references to this variable
-                            self.disasm_view.popup_xref_dialog(variable=operand.variable)
-                        elif operand.is_constant:
-                            # Display cross references to an address
-                            self.disasm_view.popup_xref_dialog(dst_addr=operand.constant_value)
+                    variable = block.operand_variable(ins_addr, operand_idx)
+                    constant_value = block.operand_constant_value(ins_addr, operand_idx)
+                    if variable is not None:
+                        # Display cross references to this variable
+                        self.disasm_view.popup_xref_dialog(variable=variable)
+                    elif constant_value is not None:
+                        # Display cross references to an address
+                        self.disasm_view.popup_xref_dialog(dst_addr=constant_value)
             return
 
         super().keyPressEvent(event)
@@ -258,6 +291,16 @@ class QDisassemblyGraph(QZoomableDraggableGraphicsView, QDisassemblyBaseControl)
     # Private methods
     #
 
+    def _operands_by_highlight_key(self):
+        mode = self.infodock.highlight_mode
+        if self._highlight_index is None or self._highlight_index[0] != mode:
+            index = defaultdict(list)
+            for block in self.blocks:
+                for key, insn_addr, operand_idx in block.operand_highlight_keys():
+                    index[key].append((block, insn_addr, operand_idx))
+            self._highlight_index = mode, index
+        return self._highlight_index[1]
+
     def _initial_position(self):
         entry_block_rect = self.entry_block.mapRectToScene(self.entry_block.boundingRect())
         viewport_height = self.viewport().rect().height()
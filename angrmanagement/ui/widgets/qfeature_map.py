@@ -1,8 +1,14 @@
+import time
+import bisect
+import functools
+import logging
+import threading
+from array import array
 
 from sortedcontainers import SortedDict
 
 from PySide2.QtWidgets import QWidget, QHBoxLayout, QGraphicsScene, QSizePolicy, QGraphicsSceneMouseEvent
-from PySide2.QtGui import QPaintEvent, QPainter, QBrush, QPen, QPolygonF
+from PySide2.QtGui import QPaintEvent, QPainter, QBrush, QPen, QPolygonF, QImage, QColor
 from PySide2.QtCore import Qt, QRectF, QSize, QPointF
 
 import cle
@@ -11,7 +17,26 @@ from angr.analyses.cfg.cfb import Unknown
 
 from ...config import Conf
 from ...data.object_container import ObjectContainer
+from ...logic.threads import gui_thread_schedule_async
+from ...logic.profiler import profiler, PROFILE_PAINT
 from .qgraph import QZoomableDraggableGraphicsView
+from ..menus.feature_map_menu import FeatureMapLayersMenu
+from .feature_map_layers import AGGREGATE_SUM, AGGREGATE_MAX, DEFAULT_LAYERS
+
+_l = logging.getLogger(__name__)
+
+# what a column of the feature map shows
+FEATURE_NONE = 0
+FEATURE_FUNCTION = 1
+FEATURE_DATA = 2
+FEATURE_UNKNOWN = 3
+FEATURE_DELIMITER = 4
+
+# width of the cached images that the feature map is painted from, in pixels
+TILE_WIDTH = 256
+# minimum time between two binnings while requests keep arriving, in seconds. the CFG reports progress much more often
+# while it is being generated. a request that arrives while the worker is idle is binned right away.
+BINNING_INTERVAL = 0.5
 
 
 class Orientation:
@@ -19,6 +44,324 @@ class Orientation:
     Horizontal = 1
 
 
+class FeatureMapLayout:
+    """
+    Where memory regions are on the feature map. Regions are laid out next to each other, and offsets are counted in
+    bytes from the left end of the map.
+    """
+
+    def __init__(self, regions):
+        self.addr_to_region = SortedDict()
+        self.regionaddr_to_offset = SortedDict()
+        self.offset_to_regionaddr = SortedDict()
+
+        b = 0
+        for mr in regions:
+            self.addr_to_region[mr.addr] = mr
+            self.regionaddr_to_offset[mr.addr] = b
+            self.offset_to_regionaddr[b] = mr.addr
+            b += self.adjust_region_size(mr)
+        self.total_size = b
+
+        # start addresses, adjusted end addresses and offsets of the regions, for bisecting
+        self.region_starts = list(self.addr_to_region.keys())
+        self.region_ends = [ addr + self.adjust_region_size(self.addr_to_region[addr]) for addr in self.region_starts ]
+        self.region_offsets = [ self.regionaddr_to_offset[addr] for addr in self.region_starts ]
+
+    @staticmethod
+    def adjust_region_size(memory_region):
+
+        if isinstance(memory_region.object, (cle.ExternObject, cle.TLSObject, cle.KernelObject)):
+            # Draw unnecessary objects smaller
+            return 80
+        else:
+            return memory_region.size
+
+    def offset_from_addr(self, addr):
+
+        # find the region it belongs to
+        try:
+            mr_base = next(self.addr_to_region.irange(maximum=addr, reverse=True))
+        except StopIteration:
+            return None
+
+        # get the base offset of that region
+        base_offset = self.regionaddr_to_offset[mr_base]
+
+        return base_offset + addr - mr_base
+
+    def addr_from_offset(self, offset):
+
+        try:
+            base_offset = next(self.offset_to_regionaddr.irange(maximum=offset, reverse=True))
+        except StopIteration:
+            return None
+
+        region_addr = self.offset_to_regionaddr[base_offset]
+        return region_addr + offset - base_offset
+
+
+def feature_kind(obj):
+    if isinstance(obj, Unknown):
+        return FEATURE_DATA
+    elif isinstance(obj, Block):
+        # TODO: Check if it belongs to a function or not
+        return FEATURE_FUNCTION
+    else:
+        return FEATURE_UNKNOWN
+
+
+def bin_features(items, layout, width):
+    """
+    Aggregate the objects of a CFBlanket into the columns of a feature map. A column shows the kind of object that covers
+    most of its bytes. Columns where a memory region begins show a delimiter.
+
+    Every object is visited once, and only the columns it covers are touched, so binning takes time linear in the number
+    of objects plus the width.
+
+    :param iterable items:              (address, object) pairs, in the order of addresses.
+    :param FeatureMapLayout layout:     The layout of memory regions.
+    :param int width:                   Number of columns.
+    :return:                            One FEATURE_* value per column.
+    :rtype:                             bytearray
+    """
+
+    columns = bytearray(max(width, 0))
+    total = layout.total_size
+    if width <= 0 or not total:
+        return columns
+
+    # number of bytes of every kind in every column
+    coverage = { kind: array('d', bytes(8 * width)) for kind in (FEATURE_FUNCTION, FEATURE_DATA, FEATURE_UNKNOWN) }
+
+    starts, ends, offsets = layout.region_starts, layout.region_ends, layout.region_offsets
+
+    region, region_start, region_end = None, 0, 0
+    for addr, obj in items:
+
+        # are we in a new region?
+        if not region_start <= addr < region_end:
+            region = bisect.bisect_right(starts, addr) - 1
+            if region < 0:
+                continue
+            region_start, region_end = starts[region], ends[region]
+
+        size = min(obj.size, region_end - addr)
+        if size <= 0:
+            continue
+
+        counts = coverage[feature_kind(obj)]
+        start = offsets[region] + addr - region_start
+        end = start + size
+        first = start * width // total
+        last = (end - 1) * width // total
+        if first == last:
+            counts[first] += size
+            continue
+
+        # the first byte of column c is at ceil(c * total / width)
+        boundary = -(-(first + 1) * total // width)
+        counts[first] += boundary - start
+        for column in range(first + 1, last):
+            next_boundary = -(-(column + 1) * total // width)
+            counts[column] += next_boundary - boundary
+            boundary = next_boundary
+        counts[last] += end - boundary
+
+    functions, data, unknown = coverage[FEATURE_FUNCTION], coverage[FEATURE_DATA], coverage[FEATURE_UNKNOWN]
+    for column in range(width):
+        f, d, u = functions[column], data[column], unknown[column]
+        if f or d or u:
+            if f >= d and f >= u:
+                columns[column] = FEATURE_FUNCTION
+            else:
+                columns[column] = FEATURE_DATA if d >= u else FEATURE_UNKNOWN
+
+    for offset in offsets:
+        columns[offset * width // total] = FEATURE_DELIMITER
+
+    return columns
+
+
+def bin_layer(items, layout, width, aggregate=AGGREGATE_SUM):
+    """
+    Aggregate the weighted address ranges of a layer into the columns of a feature map.
+
+    :param iterable items:              (address, size, weight) tuples, in any order.
+    :param FeatureMapLayout layout:     The layout of memory regions.
+    :param int width:                   Number of columns.
+    :param str aggregate:               How weights in the same column are combined, AGGREGATE_SUM or AGGREGATE_MAX.
+    :return:                            One intensity per column, from 0 (no weight) to 255 (the highest weight).
+    :rtype:                             bytearray
+    """
+
+    intensities = bytearray(max(width, 0))
+    total = layout.total_size
+    if width <= 0 or not total:
+        return intensities
+
+    weights = array('d', bytes(8 * width))
+    starts, ends, offsets = layout.region_starts, layout.region_ends, layout.region_offsets
+    use_max = aggregate == AGGREGATE_MAX
+    bisect_right = bisect.bisect_right
+
+    for addr, size, weight in items:
+        if not weight:
+            continue
+        region = bisect_right(starts, addr) - 1
+        if region < 0:
+            continue
+        region_start = starts[region]
+        if addr + size > ends[region]:
+            size = ends[region] - addr
+            if size <= 0:
+                continue
+
+        start = offsets[region] + addr - region_start
+        first = start * width // total
+        last = (start + size - 1) * width // total
+        if first == last:
+            # most ranges are much smaller than a column
+            if not use_max:
+                weights[first] += weight
+            elif weight > weights[first]:
+                weights[first] = weight
+            continue
+
+        for column in range(first, last + 1):
+            if not use_max:
+                weights[column] += weight
+            elif weight > weights[column]:
+                weights[column] = weight
+
+    top = max(weights)
+    if top > 0:
+        for column, weight in enumerate(weights):
+            if weight > 0:
+                # columns with any weight stay visible
+                intensities[column] = max(1, int(255 * weight / top))
+
+    return intensities
+
+
+class LayerItems:
+    """
+    The weighted address ranges that a layer has collected, kept in arrays so that re-binning after a resize does not
+    collect the layer again. Arrays of numbers are also much cheaper for the garbage collector than as many tuples.
+    """
+
+    __slots__ = ('addrs', 'sizes', 'weights', )
+
+    def __init__(self, items):
+        self.addrs = array('Q')
+        self.sizes = array('Q')
+        self.weights = array('d')
+        add_addr, add_size, add_weight = self.addrs.append, self.sizes.append, self.weights.append
+        for addr, size, weight in items:
+            add_addr(addr)
+            add_size(size)
+            add_weight(weight)
+
+    def __len__(self):
+        return len(self.addrs)
+
+    def __iter__(self):
+        return zip(self.addrs, self.sizes, self.weights)
+
+
+class FeatureMapTiles:
+    """
+    Images of the columns of a feature map, TILE_WIDTH columns each. A tile is painted the first time it is visible,
+    and is kept until its columns change.
+    """
+
+    def __init__(self, palette):
+        """
+        :param palette: A callable that returns the ARGB color of every column value, a list of 256 integers. Columns
+                        whose color is 0 are transparent.
+        """
+
+        self.columns = bytearray()
+        self._palette = palette
+        self._images = { }  # tile index -> QImage
+
+    def update(self, columns):
+        """
+        Replace the columns. Only the tiles whose columns have changed are painted again.
+
+        :param bytearray columns:   One value per column.
+        :return:                    None
+        """
+
+        if len(columns) != len(self.columns):
+            self._images.clear()
+        else:
+            for idx in list(self._images):
+                start, end = idx * TILE_WIDTH, (idx + 1) * TILE_WIDTH
+                if columns[start:end] != self.columns[start:end]:
+                    del self._images[idx]
+        self.columns = columns
+
+    def paint(self, painter, rect, width, height):
+        """
+        Paint the tiles in a rectangle. The columns are stretched over width x height pixels, so that the tiles of the
+        previous size can be shown until the feature map is binned again after a resize.
+
+        :param QPainter painter:    The painter.
+        :param QRectF rect:         The exposed rectangle.
+        :param int width:           The width to stretch all columns over.
+        :param int height:          The height of the feature map.
+        :return:                    None
+        """
+
+        if not self.columns or width <= 0:
+            return
+
+        scale = width / len(self.columns)
+        first = max(0, int(rect.left() / scale) // TILE_WIDTH)
+        last = min((len(self.columns) - 1) // TILE_WIDTH, int(rect.right() / scale) // TILE_WIDTH)
+        for idx in range(first, last + 1):
+            image = self._images.get(idx, None)
+            if image is None:
+                image = self._images[idx] = self._paint_tile(idx)
+            painter.drawImage(QRectF(idx * TILE_WIDTH * scale, 0, image.width() * scale, height), image)
+
+    def _paint_tile(self, idx):
+        colors = self._palette()
+
+        columns = self.columns[idx * TILE_WIDTH:(idx + 1) * TILE_WIDTH]
+        # one pixel per column. the image is stretched to the height of the feature map.
+        image = QImage(len(columns), 1, QImage.Format_ARGB32)
+        image.fill(Qt.transparent)
+        for x, value in enumerate(columns):
+            color = colors[value]
+            if color:
+                image.setPixel(x, 0, color)
+        return image
+
+
+def base_palette():
+    colors = [ 0 ] * 256
+    colors[FEATURE_FUNCTION] = Conf.feature_map_color_regular_function.rgba()
+    colors[FEATURE_DATA] = Conf.feature_map_color_data.rgba()
+    colors[FEATURE_UNKNOWN] = Conf.feature_map_color_unknown.rgba()
+    colors[FEATURE_DELIMITER] = Conf.feature_map_color_delimiter.rgba()
+    return colors
+
+
+def layer_palette(color):
+    """
+    Get a palette that paints the intensities of a layer in a color, from translucent to mostly opaque.
+
+    :param QColor color:    The color of the layer.
+    :return:                A callable for FeatureMapTiles.
+    """
+
+    colors = [ 0 ] + [ QColor(color.red(), color.green(), color.blue(), 48 + i * 176 // 255).rgba()
+                       for i in range(1, 256) ]
+    return lambda: colors
+
+
 class QClickableGraphicsScene(QGraphicsScene):
 
     def __init__(self, feature_map):
@@ -47,13 +390,32 @@ class QFeatureMapView(QZoomableDraggableGraphicsView):
     def __init__(self, parent=None):
         super().__init__(parent)
 
+        self._feature_map = parent
         self._scene = QClickableGraphicsScene(parent)
         self.setScene(self._scene)
 
+    def paintEvent(self, event):
+        with profiler.measure(PROFILE_PAINT, 'QFeatureMap'):
+            super().paintEvent(event)
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        self._feature_map.paint_tiles(painter, rect)
+
+    def contextMenuEvent(self, event):
+        self._feature_map.contextMenuEvent(event)
+
 
 class QFeatureMap(QWidget):
     """
     Byte-level map of the memory space.
+
+    Objects of the CFB are binned into the columns of the map on a worker thread, and the columns are painted from
+    cached image tiles. The map is binned again when the CFB changes, including while the CFG is being generated, and
+    when the map is resized.
+
+    Layers (see FeatureMapLayer) are painted over the map. They can be toggled from the context menu. A layer is only
+    collected again when one of its sources fires; a resize re-bins the collected ranges.
     """
     def __init__(self, disasm_view, parent=None):
         super().__init__(parent)
@@ -74,18 +436,47 @@ class QFeatureMap(QWidget):
         self.addr = ObjectContainer(None, name='The current address of the Feature Map.')
 
         # cached values
-        self._addr_to_region = SortedDict()
-        self._regionaddr_to_offset = SortedDict()
-        self._offset_to_regionaddr = SortedDict()
-        self._total_size = None
-        self._regions_painted = False
+        self._layout = None  # type: FeatureMapLayout
+        self._tiles = FeatureMapTiles(base_palette)
+
+        # layers
+        self._layers = [ ]  # in the order they are painted in
+        self._enabled_layers = set()
+        self._layer_tiles = { }  # layer -> FeatureMapTiles
+        self._layer_listeners = { }  # layer -> [ (source, listener) ]
+
+        # binning. requests are protected by the lock.
+        self._binning_lock = threading.Lock()
+        self._binning = False  # whether the worker thread is running
+        self._binning_wakeup = threading.Event()  # set whenever a request is made
+        self._pending = False
+        self._pending_base = False  # whether the CFB has changed
+        self._pending_layers = set()  # layers to collect again
+        self._binning_width = 0
+        self._binning_layers = ( )  # enabled layers, in painting order
+        # owned by the worker thread
+        self._worker_layout = None
+        self._worker_width = None
+        self._layer_items = { }  # layer -> LayerItems
+        self._layers_binned = set()  # layers that have been binned with the current layout and width
 
         self._init_widgets()
         self._register_events()
 
+        for layer_cls in DEFAULT_LAYERS:
+            self.add_layer(layer_cls())
+
     def sizeHint(self):
         return QSize(25, 25)
 
+    #
+    # Properties
+    #
+
+    @property
+    def layers(self):
+        return list(self._layers)
+
     #
     # Public methods
     #
@@ -95,9 +486,7 @@ class QFeatureMap(QWidget):
         if self.view is None:
             return
 
-        if not self._regions_painted:
-            self._regions_painted = True
-            self._paint_regions()
+        self._schedule_binning(base=True)
 
     def select_offset(self, offset):
 
@@ -107,6 +496,98 @@ class QFeatureMap(QWidget):
         self.addr.am_obj = addr
         self.addr.am_event()
 
+    def paint_tiles(self, painter, rect):
+        width, height = self.width(), self.height()
+        self._tiles.paint(painter, rect, width, height)
+        for layer in self._layers:
+            tiles = self._layer_tiles.get(layer, None)
+            if tiles is not None:
+                tiles.paint(painter, rect, width, height)
+
+    def add_layer(self, layer, enabled=None):
+        """
+        Add a layer on top of all other layers.
+
+        :param FeatureMapLayer layer:   The layer.
+        :param bool enabled:            Whether to show the layer, or None to use its default.
+        :return:                        None
+        """
+
+        if layer in self._layers:
+            return
+        self._layers.append(layer)
+        self._subscribe_layer_sources(layer)
+        self.set_layer_enabled(layer, layer.ENABLED if enabled is None else enabled)
+
+    def remove_layer(self, layer):
+        """
+        Remove a layer.
+
+        :param FeatureMapLayer layer:   The layer.
+        :return:                        None
+        """
+
+        if layer not in self._layers:
+            return
+        self.set_layer_enabled(layer, False)
+        for source, listener in self._layer_listeners.pop(layer, [ ]):
+            source.am_unsubscribe(listener)
+        self._layers.remove(layer)
+        self._update_binning_layers()
+
+    def is_layer_enabled(self, layer):
+        return layer in self._enabled_layers
+
+    def set_layer_enabled(self, layer, enabled):
+        """
+        Show or hide a layer. A layer is collected again when it is shown.
+
+        :param FeatureMapLayer layer:   The layer.
+        :param bool enabled:            Whether to show the layer.
+        :return:                        None
+        """
+
+        if enabled:
+            self._enabled_layers.add(layer)
+            self._layer_tiles[layer] = FeatureMapTiles(layer_palette(layer.COLOR))
+        else:
+            self._enabled_layers.discard(layer)
+            self._layer_tiles.pop(layer, None)
+            self.view.scene().update()
+        self._update_binning_layers()
+        # a disabled layer is collected again when it is enabled. until then, its ranges are dropped.
+        self._schedule_binning(layers=(layer, ))
+
+    #
+    # Event handlers
+    #
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+
+        if self.view is None:
+            return
+
+        self.view.setSceneRect(QRectF(0, 0, self.width(), self.height()))
+        self._paint_insn_indicators()
+        # the current tiles are stretched to the new width until the map is binned again
+        self._schedule_binning()
+
+    def contextMenuEvent(self, event):
+        menu = FeatureMapLayersMenu(self)
+        menu.qmenu().exec_(event.globalPos())
+
+    def _on_cfb_changed(self, **kwargs):  # pylint:disable=unused-argument
+        self.refresh()
+
+    def _on_layer_source_changed(self, layer, **kwargs):  # pylint:disable=unused-argument
+        if layer not in self._layers:
+            return
+        # the sources of a layer may change, e.g., when a simulation manager is created
+        self._subscribe_layer_sources(layer)
+        if layer in self._enabled_layers:
+            self._schedule_binning(layers=(layer, ))
+
     #
     # Private methods
     #
@@ -122,112 +603,135 @@ class QFeatureMap(QWidget):
         self.setLayout(layout)
 
     def _register_events(self):
-        self.disasm_view.infodock.selected_insns.am_subscribe(self._paint_insn_indicators)
+        self.disasm_view.infodock.selected_insns.am_subscribe(self._paint_insn_indicators, coalesce=True)
+        self.instance.cfb_container.am_subscribe(self._on_cfb_changed, coalesce=True)
+
+    def _subscribe_layer_sources(self, layer):
+
+        listeners = self._layer_listeners.setdefault(layer, [ ])
+        subscribed = set(id(source) for source, _ in listeners)
+        for source in layer.sources(self.instance):
+            if id(source) not in subscribed:
+                subscribed.add(id(source))
+                listener = functools.partial(self._on_layer_source_changed, layer)
+                source.am_subscribe(listener, coalesce=True)
+                listeners.append((source, listener))
+
+    def _update_binning_layers(self):
+        with self._binning_lock:
+            self._binning_layers = tuple(layer for layer in self._layers if layer in self._enabled_layers)
+
+    def _schedule_binning(self, base=False, layers=()):
+
+        with self._binning_lock:
+            self._pending = True
+            self._pending_base |= base
+            self._pending_layers.update(layers)
+            self._binning_width = self.width()
+            self._binning_wakeup.set()
+            if self._binning:
+                # the worker thread picks the request up
+                return
+            self._binning = True
+
+        t = threading.Thread(target=self._binning_worker, name='Feature map binning', daemon=True)
+        t.start()
+
+    def _binning_worker(self):
+
+        while True:
+            with self._binning_lock:
+                if not self._pending:
+                    self._binning = False
+                    return
+                base, collect = self._pending_base, self._pending_layers
+                width, layers = self._binning_width, self._binning_layers
+                self._pending, self._pending_base, self._pending_layers = False, False, set()
+                self._binning_wakeup.clear()
+
+            self._bin(base, collect, width, layers)
+
+            with self._binning_lock:
+                busy = self._pending
+            if busy:
+                # requests arrived while binning, e.g., from a CFG that is being generated. leave the GUI thread some room.
+                time.sleep(BINNING_INTERVAL)
+            else:
+                # a request that arrives soon, e.g., after a resize or a layer toggle, is binned right away. the worker
+                # stops if none arrives.
+                self._binning_wakeup.wait(BINNING_INTERVAL)
 
-    def _paint_regions(self):
+    def _bin(self, base, collect, width, layers):
 
-        cfb = self.instance.cfb_container.am_obj
+        for layer in collect:
+            self._layer_items.pop(layer, None)
+            self._layers_binned.discard(layer)
 
+        cfb = self.instance.cfb_container.am_obj
         if cfb is None:
             return
 
-        # colors
-        func_color = Conf.feature_map_color_regular_function
-        data_color = Conf.feature_map_color_data
-        unknown_color = Conf.feature_map_color_unknown
-        delimiter_color = Conf.feature_map_color_delimiter
-        if self._total_size is None:
-            # calculate the total number of bytes
-            b = 0
-            self._addr_to_region.clear()
-            self._regionaddr_to_offset.clear()
-            for mr in cfb.regions:
-                self._addr_to_region[mr.addr] = mr
-                self._regionaddr_to_offset[mr.addr] = b
-                self._offset_to_regionaddr[b] = mr.addr
-                b += self._adjust_region_size(mr)
-            self._total_size = b
-
-        # iterate through all items and draw the image
-        offset = 0
-        total_width = self.width()
-        current_region = None
-        height = self.height()
-        print(total_width)
-        for addr, obj in cfb.ceiling_items():
-
-            # are we in a new region?
-            new_region = False
-            if current_region is None or not (current_region.addr <= addr < current_region.addr + current_region.size):
-                current_region_addr = next(self._addr_to_region.irange(maximum=addr, reverse=True))
-                current_region = self._addr_to_region[current_region_addr]
-                new_region = True
-
-            # adjust size
-            adjusted_region_size = self._adjust_region_size(current_region)
-            adjusted_size = min(obj.size, current_region.addr + adjusted_region_size - addr)
-            if adjusted_size <= 0:
+        columns = None
+        if base or self._worker_layout is None or width != self._worker_width:
+            try:
+                layout = FeatureMapLayout(cfb.regions)
+                columns = bin_features(cfb.ceiling_items(), layout, width)
+            except Exception:  # pylint:disable=broad-except
+                # the CFG may be adding objects to the CFB at the same time. it will ask for another refresh.
+                _l.debug("Failed to bin the feature map.", exc_info=True)
+                return
+            self._worker_layout, self._worker_width = layout, width
+            self._layers_binned.clear()
+        layout = self._worker_layout
+
+        intensities = { }
+        for layer in layers:
+            if layer in self._layers_binned:
                 continue
+            try:
+                items = self._layer_items.get(layer, None)
+                if items is None:
+                    items = self._layer_items[layer] = LayerItems(layer.collect(self.instance))
+                intensities[layer] = bin_layer(items, layout, width, layer.AGGREGATE)
+            except Exception:  # pylint:disable=broad-except
+                _l.warning("Failed to collect the feature map layer %s.", layer.get_display_name(), exc_info=True)
+                continue
+            self._layers_binned.add(layer)
 
-            pos = offset * total_width // self._total_size
-            length = adjusted_size * total_width // self._total_size
-            offset += adjusted_size
-
-            # draw a rectangle
-            if isinstance(obj, Unknown):
-                pen = QPen(data_color)
-                brush = QBrush(data_color)
-            elif isinstance(obj, Block):
-                # TODO: Check if it belongs to a function or not
-                pen = QPen(func_color)
-                brush = QBrush(func_color)
-            else:
-                pen = QPen(unknown_color)
-                brush = QBrush(unknown_color)
-            rect = QRectF(pos, 0, length, height)
-            self.view._scene.addRect(rect, pen, brush)
+        if columns is not None or intensities:
+            gui_thread_schedule_async(self._install_columns, args=(layout, columns, intensities))
 
-            # if at the beginning of a new region, draw a line
-            if new_region:
-                pen = QPen(delimiter_color)
-                self.view._scene.addLine(pos, 0, pos, height, pen)
+    def _install_columns(self, layout, columns, intensities):
 
-    def _adjust_region_size(self, memory_region):
-
-        if isinstance(memory_region.object, (cle.ExternObject, cle.TLSObject, cle.KernelObject)):
-            # Draw unnecessary objects smaller
-            return 80
-        else:
-            print(memory_region.size, memory_region.object)
-            return memory_region.size
+        if columns is not None:
+            self._layout = layout
+            self._tiles.update(columns)
+        for layer, layer_columns in intensities.items():
+            tiles = self._layer_tiles.get(layer, None)
+            if tiles is not None:
+                tiles.update(layer_columns)
+        self.view.scene().update()
+        self._paint_insn_indicators()
 
     def _get_pos_from_addr(self, addr):
 
-        # find the region it belongs to
-        try:
-            mr_base = next(self._addr_to_region.irange(maximum=addr, reverse=True))
-        except StopIteration:
+        if self._layout is None or not self._layout.total_size:
             return None
 
-        # get the base offset of that region
-        base_offset = self._regionaddr_to_offset[mr_base]
-
-        offset = base_offset + addr - mr_base
-        return offset * self.width() // self._total_size
+        offset = self._layout.offset_from_addr(addr)
+        if offset is None:
+            return None
+        return offset * self.width() // self._layout.total_size
 
     def _get_addr_from_pos(self, pos):
 
-        offset = int(pos * self._total_size // self.width())
-
-        try:
-            base_offset = next(self._offset_to_regionaddr.irange(maximum=offset, reverse=True))
-        except StopIteration:
+        if self._layout is None or not self._layout.total_size or self.width() <= 0:
             return None
 
-        region_addr = self._offset_to_regionaddr[base_offset]
-        return region_addr + offset - base_offset
+        offset = int(pos * self._layout.total_size // self.width())
+        return self._layout.addr_from_offset(offset)
 
-    def _paint_insn_indicators(self):
+    def _paint_insn_indicators(self, **kwargs):  # pylint:disable=unused-argument
 
         scene = self.view.scene()  # type: QGraphicsScene
         for item in self._insn_indicators:
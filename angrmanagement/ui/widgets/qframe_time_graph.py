@@ -0,0 +1,54 @@
+from PySide2.QtWidgets import QWidget
+from PySide2.QtGui import QPainter, QColor, QPen
+from PySide2.QtCore import Qt, QSize, QRectF
+
+
+class QFrameTimeGraph(QWidget):
+    """
+    A bar graph of how long the most recent iterations of the event loop kept the GUI thread busy. Frames that took
+    longer than the threshold of the profiler are red, and the threshold is a dashed line.
+    """
+
+    BAR_COLOR = QColor(0x40, 0x80, 0xc0)
+    SLOW_BAR_COLOR = QColor(0xe0, 0x30, 0x30)
+    THRESHOLD_COLOR = QColor(0x80, 0x80, 0x80)
+
+    def __init__(self, profiler, parent=None):
+        super().__init__(parent)
+
+        self._profiler = profiler
+
+        self.setMinimumHeight(60)
+
+    def sizeHint(self):
+        return QSize(400, 100)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+
+        width, height = self.width(), self.height() - 14
+        # one pixel per frame, the most recent on the right
+        frames = list(self._profiler.frames)[-width:]
+        threshold = self._profiler.threshold
+        scale = max([ threshold * 2 ] + [ duration for _, duration in frames ])
+
+        x = width - len(frames)
+        for _, duration in frames:
+            bar = max(1.0, duration / scale * height)
+            painter.fillRect(QRectF(x, height - bar + 14, 1, bar),
+                             self.SLOW_BAR_COLOR if duration >= threshold else self.BAR_COLOR)
+            x += 1
+
+        y = int(14 + height - threshold / scale * height)
+        painter.setPen(QPen(self.THRESHOLD_COLOR, 1, Qt.DashLine))
+        painter.drawLine(0, y, width, y)
+
+        painter.setPen(Qt.black)
+        if frames:
+            durations = [ duration for _, duration in frames ]
+            text = "%d frames: %.1f ms on average, %.1f ms at most" % (
+                len(durations), sum(durations) / len(durations) * 1000, max(durations) * 1000)
+        else:
+            text = "No frames recorded. Enable profiling to record frames."
+        painter.drawText(2, 11, text)
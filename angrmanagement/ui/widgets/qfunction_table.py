@@ -58,6 +58,11 @@ class QFunctionTableModel(QAbstractTableModel):
 
         self.emit(SIGNAL("layoutChanged()"))
 
+    def refresh_column(self, column):
+        rows = self.rowCount()
+        if rows:
+            self.dataChanged.emit(self.index(0, column), self.index(rows - 1, column))
+
     def rowCount(self, *args, **kwargs):
         if self.func_list is None:
             return 0
@@ -236,6 +241,9 @@ class QFunctionTableView(QTableView):
     def filter(self, keyword):
         self._model.filter(keyword)
 
+    def refresh_tags(self):
+        self._model.refresh_column(QFunctionTableModel.TAGS_COL)
+
     def _on_function_selected(self, model_index):
         row = model_index.row()
         self._selected_func.am_obj = self._model.func_list[row]
@@ -321,6 +329,9 @@ class QFunctionTable(QWidget):
     def subscribe_func_select(self, callback):
         self._table_view.subscribe_func_select(callback)
 
+    def refresh_tags(self):
+        self._table_view.refresh_tags()
+
     #
     # Private methods
     #
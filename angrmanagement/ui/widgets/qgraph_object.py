@@ -1,5 +1,52 @@
+from collections import OrderedDict
+
 from PySide2.QtWidgets import QGraphicsItem
-from PySide2.QtGui import QPainter
+from PySide2.QtGui import QPainter, QStaticText
+from PySide2.QtCore import Qt
+
+
+def create_static_text(text):
+    """
+    Create a QStaticText for a piece of plain text that is painted over and over again. The text is laid out once, and
+    the layout is kept until the text is painted with a different font or at a different zoom level.
+
+    :param str text:    The text.
+    :return:            The static text, or None if text is None.
+    :rtype:             QStaticText
+    """
+
+    if text is None:
+        return None
+    static_text = QStaticText(text)
+    static_text.setTextFormat(Qt.PlainText)
+    return static_text
+
+
+# text -> QStaticText, least recently used first
+_static_text_cache = OrderedDict()
+STATIC_TEXT_CACHE_SIZE = 8192
+
+
+def cached_static_text(text):
+    """
+    Like create_static_text(), but the static text is shared by everything that paints the same text, such as common
+    mnemonics and register names. At most STATIC_TEXT_CACHE_SIZE static texts are kept.
+
+    :param str text:    The text.
+    :return:            The static text, or None if text is None.
+    :rtype:             QStaticText
+    """
+
+    if text is None:
+        return None
+    try:
+        static_text = _static_text_cache[text]
+        _static_text_cache.move_to_end(text)
+    except KeyError:
+        static_text = _static_text_cache[text] = create_static_text(text)
+        if len(_static_text_cache) > STATIC_TEXT_CACHE_SIZE:
+            _static_text_cache.popitem(last=False)
+    return static_text
 
 
 class QCachedGraphicsItem(QGraphicsItem):
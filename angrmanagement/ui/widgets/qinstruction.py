@@ -1,18 +1,69 @@
 import logging
 
-from PySide2.QtGui import QPainter, QColor, QCursor
+from PySide2.QtGui import QColor, QCursor
 from PySide2.QtCore import Qt, QRectF
 from PySide2.QtWidgets import QApplication, QGraphicsSceneMouseEvent
 
 from angr.analyses.disassembly import Value
 
-from .qgraph_object import QCachedGraphicsItem
+from .qgraph_object import QCachedGraphicsItem, create_static_text
 from .qoperand import QOperand
 from ...utils import should_display_string_label, get_string_for_display, get_comment_for_display
 
 _l = logging.getLogger(__name__)
 
 
+def operand_branch_info(insn, operand_index, operand, out_branch):
+    """
+    Determine if an operand is the target of a branch, and where the branch goes.
+
+    :param insn:                The instruction.
+    :param int operand_index:   Index of the operand in the instruction.
+    :param operand:             The operand.
+    :param out_branch:          The outgoing branch of the instruction, or None.
+    :return:                    A tuple of whether the operand is a branch target, whether the branch is indirect, and
+                                the branch targets (or None).
+    :rtype:                     tuple
+    """
+
+    is_branch_target = insn.type in ('branch', 'call') and operand_index == insn.branch_target_operand
+    is_indirect_branch = insn.branch_type == 'indirect'
+    branch_targets = None
+    if is_branch_target:
+        if out_branch is not None:
+            branch_targets = out_branch.targets
+        else:
+            # it does not create multiple branches. e.g., a call instruction
+            if len(operand.children) == 1 and type(operand.children[0]) is Value:
+                branch_targets = (operand.children[0].val,)
+    return is_branch_target, is_indirect_branch, branch_targets
+
+
+def instruction_backcolor(disasm_view, addr, selected):
+    """
+    The background color of an instruction.
+
+    :param disasm_view:     The disassembly view that the instruction is shown in.
+    :param int addr:        Address of the instruction.
+    :param bool selected:   If the instruction is selected.
+    :return:                The color, or None if the background should not be painted.
+    :rtype:                 QColor
+    """
+
+    r, g, b = None, None, None
+
+    # First we'll check for customizations
+    if disasm_view.insn_backcolor_callback:
+        r, g, b = disasm_view.insn_backcolor_callback(addr=addr, selected=selected)
+
+    # Fallback to defaults if we get Nones from the callback
+    if r is None or g is None or b is None:
+        if selected:
+            r, g, b = 0xef, 0xbf, 0xba
+
+    return QColor(r, g, b) if r is not None else None
+
+
 class QInstruction(QCachedGraphicsItem):
 
     GRAPH_ADDR_SPACING = 20
@@ -25,6 +76,9 @@ class QInstruction(QCachedGraphicsItem):
     LINEAR_INSTRUCTION_OFFSET = 120
     COMMENT_PREFIX = "// "
 
+    # created the first time an instruction is painted
+    _intersperse_text = None
+
     def __init__(self, workspace, func_addr, disasm_view, disasm, infodock, insn, out_branch, config, parent=None):
         super().__init__(parent=parent)
 
@@ -41,13 +95,17 @@ class QInstruction(QCachedGraphicsItem):
 
         # all "widgets"
         self._addr = None
+        self._addr_text = None
         self._addr_width = None
         self._mnemonic = None
+        self._mnemonic_text = None
         self._mnemonic_width = None
         self._operands = [ ]
         self._string = None
+        self._string_text = None
         self._string_width = None
         self._comment = None
+        self._comment_text = None
         self._comment_width = None
 
         self._init_widgets()
@@ -84,18 +142,7 @@ class QInstruction(QCachedGraphicsItem):
 
     @property
     def insn_backcolor(self):
-        r, g, b = None, None, None
-
-        # First we'll check for customizations
-        if self.disasm_view.insn_backcolor_callback:
-            r, g, b = self.disasm_view.insn_backcolor_callback(addr=self.insn.addr, selected=self.selected)
-
-        # Fallback to defaults if we get Nones from the callback
-        if r is None or g is None or b is None:
-            if self.selected:
-                r, g, b = 0xef, 0xbf, 0xba
-
-        return QColor(r, g, b) if r is not None else None
+        return instruction_backcolor(self.disasm_view, self.insn.addr, self.selected)
 
     @property
     def selected(self):
@@ -115,23 +162,29 @@ class QInstruction(QCachedGraphicsItem):
         self._update_size()
         self.recalculate_size()
 
+    @property
+    def operands(self):
+        return self._operands
+
     def get_operand(self, operand_idx):
         if operand_idx < len(self._operands):
             return self._operands[operand_idx]
         return None
 
     def load_comment(self):
-        self._comment = get_comment_for_display(self.workspace.instance.cfg.kb, self.insn.addr)
+        comment = get_comment_for_display(self.workspace.instance.cfg.kb, self.insn.addr)
+        if comment != self._comment:
+            self._comment = comment
+            self._comment_text = create_static_text(self.COMMENT_PREFIX + comment) if comment is not None else None
         if self._comment is not None:
             self._comment_width = self._config.disasm_font_width * len(self.COMMENT_PREFIX + self._comment)
 
     def paint(self, painter, option, widget):  # pylint: disable=unused-argument
 
+        # render hints are set by the view. texts are laid out in advance, and drawn with their top-left corner at the
+        # given position.
         x = 0
-        y = self._config.disasm_font_ascent
 
-        painter.setRenderHints(
-            QPainter.Antialiasing | QPainter.SmoothPixmapTransform | QPainter.HighQualityAntialiasing)
         painter.setFont(self._config.disasm_font)
 
         # selection
@@ -144,32 +197,35 @@ class QInstruction(QCachedGraphicsItem):
         # address
         if self.disasm_view.show_address:
             painter.setPen(Qt.black)
-            painter.drawText(x, y, self._addr)
+            painter.drawStaticText(x, 0, self._addr_text)
             x += self._addr_width + self.GRAPH_ADDR_SPACING
 
         # mnemonic
         painter.setPen(QColor(0, 0, 0x80))
-        painter.drawText(x, y, self._mnemonic)
+        painter.drawStaticText(x, 0, self._mnemonic_text)
         x += self._mnemonic_width
 
         # all commas
-        for operand in self._operands[:-1]:
-            endpos = operand.pos().x() + operand.width
-            painter.drawText(endpos, y, self.INTERSPERSE_ARGS)
+        if len(self._operands) > 1:
+            if QInstruction._intersperse_text is None:
+                QInstruction._intersperse_text = create_static_text(self.INTERSPERSE_ARGS)
+            for operand in self._operands[:-1]:
+                endpos = operand.pos().x() + operand.width
+                painter.drawStaticText(endpos, 0, QInstruction._intersperse_text)
 
         if self._operands:
             last_operand = self._operands[-1]
             x = last_operand.pos().x() + last_operand.width
 
         # comment or string - comments have precedence
-        if self._comment is not None:
+        if self._comment_text is not None:
             x += self.GRAPH_COMMENT_STRING_SPACING
             painter.setPen(Qt.darkGreen)
-            painter.drawText(x, y, self.COMMENT_PREFIX + self._comment)
-        elif self._string is not None:
+            painter.drawStaticText(x, 0, self._comment_text)
+        elif self._string_text is not None:
             x += self.GRAPH_COMMENT_STRING_SPACING
             painter.setPen(Qt.gray)
-            painter.drawText(x, y, self._string)
+            painter.drawStaticText(x, 0, self._string_text)
 
     #
     # Private methods
@@ -179,21 +235,15 @@ class QInstruction(QCachedGraphicsItem):
         self._operands.clear()
 
         self._addr = "%08x" % self.insn.addr
+        self._addr_text = create_static_text(self._addr)
         self._addr_width = self._config.disasm_font_width * len(self._addr)
         self._mnemonic = self.insn.mnemonic.render()[0]
+        self._mnemonic_text = create_static_text(self._mnemonic)
         self._mnemonic_width = self._config.disasm_font_width * len(self._mnemonic)
 
         for i, operand in enumerate(self.insn.operands):
-            is_branch_target = self.insn.type in ('branch', 'call') and i == self.insn.branch_target_operand
-            is_indirect_branch = self.insn.branch_type == 'indirect'
-            branch_targets = None
-            if is_branch_target:
-                if self.out_branch is not None:
-                    branch_targets = self.out_branch.targets
-                else:
-                    # it does not create multiple branches. e.g., a call instruction
-                    if len(operand.children) == 1 and type(operand.children[0]) is Value:
-                        branch_targets = (operand.children[0].val,)
+            is_branch_target, is_indirect_branch, branch_targets = operand_branch_info(self.insn, i, operand,
+                                                                                       self.out_branch)
             qoperand = QOperand(self.workspace, self.func_addr, self.disasm_view, self.disasm, self.infodock,
                                 self.insn, operand, i, is_branch_target, is_indirect_branch, branch_targets,
                                 self._config, parent=self)
@@ -202,6 +252,7 @@ class QInstruction(QCachedGraphicsItem):
         if should_display_string_label(self.workspace.instance.cfg, self.insn.addr):
             # yes we should display a string label
             self._string = get_string_for_display(self.workspace.instance.cfg, self.insn.addr)
+            self._string_text = create_static_text(self._string)
             self._string_width = self._config.disasm_font_width * len(self._string)
 
         self.load_comment()
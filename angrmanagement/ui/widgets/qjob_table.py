@@ -0,0 +1,73 @@
+from PySide2.QtWidgets import QTableWidget, QTableWidgetItem, QAbstractItemView
+from PySide2.QtCore import Qt
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return ""
+    if seconds < 1.0:
+        return "%.0f ms" % (seconds * 1000)
+    return "%.2f s" % seconds
+
+
+def _format_bytes(size):
+    if size is None:
+        return ""
+    return "%.1f MB" % (size / (1024 * 1024))
+
+
+class QJobTableItem:
+    def __init__(self, record):
+        self.record = record
+
+    def widgets(self):
+        record = self.record
+        rate = record.progress_rate
+
+        widgets = [
+            QTableWidgetItem(record.name),
+            QTableWidgetItem(record.status),
+            QTableWidgetItem(_format_seconds(record.queue_wait)),
+            QTableWidgetItem(_format_seconds(record.wall_time)),
+            QTableWidgetItem(_format_seconds(record.cpu_time)),
+            QTableWidgetItem(_format_bytes(record.peak_memory)),
+            QTableWidgetItem(_format_bytes(record.memory_growth)),
+            QTableWidgetItem("%.1f/s" % rate if rate is not None else ""),
+        ]
+
+        for w in widgets:
+            w.setFlags(w.flags() & ~Qt.ItemIsEditable)
+
+        return widgets
+
+
+class QJobTable(QTableWidget):
+
+    HEADER = ['Job', 'Status', 'Queue Wait', 'Wall Time', 'CPU Time', 'Peak Memory', 'Memory Growth', 'Progress Rate']
+
+    def __init__(self, instance, parent):
+        super(QJobTable, self).__init__(parent)
+
+        self.setColumnCount(len(self.HEADER))
+        self.setHorizontalHeaderLabels(self.HEADER)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.verticalHeader().setVisible(False)
+
+        self.items = [ ]
+        self.instance = instance
+        # jobs that report progress often would otherwise rebuild the table just as often
+        self.instance.job_records.am_subscribe(self._watch_jobs, coalesce=True)
+
+    def reload(self):
+        self.clearContents()
+
+        # the most recent job first
+        self.items = [ QJobTableItem(record) for record in reversed(self.instance.job_records.am_obj) ]
+        self.setRowCount(len(self.items))
+
+        for idx, item in enumerate(self.items):
+            for i, it in enumerate(item.widgets()):
+                self.setItem(idx, i, it)
+
+    def _watch_jobs(self, **kwargs):
+        self.reload()
@@ -9,6 +9,8 @@ from angr.block import Block
 from angr.analyses.cfg.cfb import Unknown
 
 from ...config import Conf
+from ...logic.profiler import profiler, PROFILE_PAINT
+from ...data.memory_manager import ManagedCache
 from .qblock import QLinearBlock
 from .qunknown_block import QUnknownBlock
 from .qgraph import QSaveableGraphicsView
@@ -48,6 +50,11 @@ class QLinearDisassemblyView(QSaveableGraphicsView):
             return True
         return super().event(event)
 
+    def paintEvent(self, event):
+        # the scroll area around this view does not paint anything itself
+        with profiler.measure(PROFILE_PAINT, 'QLinearDisassembly'):
+            super().paintEvent(event)
+
 
 class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
     OBJECT_PADDING = 0
@@ -78,8 +85,14 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
         # The first line that is rendered of the first object in self.objects. Start from 0.
         self._start_line_in_object = 0
 
-        self._disasms = { }
+        # disassembled functions, which the memory manager evicts once they take more than the budget
+        self._disasms = ManagedCache(workspace.instance.memory, 'Linear disassembly')
+        self._pinned_disasms = set()  # addresses of the functions that self.objects display
         self.objects = [ ]
+        # the memory manager would otherwise keep the disassembly of a closed viewer around. the cache is bound instead
+        # of self, since the Python object of a widget may be gone by the time destroyed is emitted.
+        self.destroyed.connect(self._disasms.release)
+        workspace.instance.project_container.am_subscribe(self._on_project_changed)
 
         self.verticalScrollBar().actionTriggered.connect(self._on_vertical_scroll_bar_triggered)
 
@@ -155,6 +168,13 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
             self.verticalScrollBar().setValue(self.offset * self._line_height)
             self.viewport().update()
 
+    def _on_project_changed(self, **kwargs):  # pylint:disable=unused-argument
+        # the disassembly of the previous project
+        for obj in self.objects:
+            self.scene.removeItem(obj)
+        self.clear_objects()
+        self._disasms.clear()
+
     def _on_vertical_scroll_bar_triggered(self, action):
 
         if action == QAbstractSlider.SliderSingleStepAdd:
@@ -280,6 +300,7 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
     def clear_objects(self):
         self.objects.clear()
         self._offset = None
+        self._pin_disasms()
 
     def prepare_objects(self, offset, start_line=0):
         """
@@ -394,6 +415,8 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
 
         _l.debug("Final offset %d, start_line_in_object %d.", offset, start_line_in_object)
 
+        self._pin_disasms()
+
         # Update properties
         self._offset = offset
         self._start_line_in_object = start_line_in_object
@@ -419,6 +442,15 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
             qobject = None
         return qobject
 
+    def _pin_disasms(self):
+        # the disassembly of functions that are on the screen is never evicted
+        func_addrs = set(obj.func_addr for obj in self.objects if isinstance(obj, QLinearBlock))
+        for func_addr in func_addrs - self._pinned_disasms:
+            self._disasms.pin(func_addr)
+        for func_addr in self._pinned_disasms - func_addrs:
+            self._disasms.unpin(func_addr)
+        self._pinned_disasms = func_addrs
+
     def _calculate_max_offset(self):
         try:
             max_off = next(self._offset_to_region.irange(reverse=True))
@@ -444,6 +476,8 @@ class QLinearDisassembly(QAbstractScrollArea, QDisassemblyBaseControl):
         :return:
         """
 
-        if func.addr not in self._disasms:
-            self._disasms[func.addr] = self.workspace.instance.project.analyses.Disassembly(function=func)
-        return self._disasms[func.addr]
+        disasm = self._disasms.get(func.addr, None)
+        if disasm is None:
+            disasm = self.workspace.instance.project.analyses.Disassembly(function=func)
+            self._disasms[func.addr] = disasm
+        return disasm
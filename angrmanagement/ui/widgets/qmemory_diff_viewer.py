@@ -0,0 +1,232 @@
+import logging
+import threading
+import time
+
+from PySide2.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton
+from PySide2.QtCore import Qt, QSize
+
+from ...logic.threads import gui_thread_schedule_async
+from ...utils.memory_diff import diff_memory
+from .qstate_combobox import QStateComboBox
+
+l = logging.getLogger('ui.widgets.qmemory_diff_viewer')
+
+
+class QMemoryDiffViewer(QFrame):
+    """
+    Lists the memory ranges that differ between the selected state and another state. Diffing the memory of two states
+    may take a while, so states are diffed on a worker thread, and only while the viewer is visible.
+    """
+
+    def __init__(self, state, parent, workspace, diff_callback=None, range_callback=None):
+        super(QMemoryDiffViewer, self).__init__(parent)
+        self.workspace = workspace
+
+        self.state = state
+
+        self._diff_callback = diff_callback
+        self._range_callback = range_callback
+
+        self._cmb_states = None  # type: QStateComboBox
+        self._lbl_summary = None  # type: QLabel
+        self._lst_ranges = None  # type: QListWidget
+
+        self._pinned = [ ]  # states that are not in the instance, but can be compared against
+        self._diff = None
+        self._dirty = False  # whether the states have changed while the viewer was hidden
+
+        # diffing. requests are protected by the lock.
+        self._diff_lock = threading.Lock()
+        self._diffing = False  # whether the worker thread is running
+        self._pending = None  # (request, base, state) to diff next
+        self._request = 0  # increased with every reload, so that results of earlier reloads are dropped
+
+        self._init_widgets()
+
+        self.state.am_subscribe(self._watch_state)
+        self.workspace.instance.states.am_subscribe(self._watch_states)
+
+    @property
+    def diff(self):
+        return self._diff
+
+    #
+    # Overridden methods
+    #
+
+    def sizeHint(self, *args, **kwargs):
+        return QSize(100, 100)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self.reload()
+
+    #
+    # Public methods
+    #
+
+    def reload(self):
+        """
+        Diff the selected state against the state to compare with, and list all changed ranges once the diff is done.
+        If the viewer is hidden, the states are diffed when it is shown.
+
+        :return: None
+        """
+
+        if not self.isVisible():
+            self._dirty = True
+            with self._diff_lock:
+                # results of earlier reloads are out of date, too
+                self._request += 1
+                self._pending = None
+            # the diff that the memory viewer highlights is of another pair of states now
+            self._lst_ranges.clear()
+            self._set_diff(None)
+            return
+        self._dirty = False
+
+        self._lst_ranges.clear()
+        # nothing is highlighted until the new diff is done
+        self._set_diff(None)
+
+        base = self._cmb_states.state
+        state = None if self.state.am_none() else self.state.am_obj
+        with self._diff_lock:
+            self._request += 1
+            if base is None or state is None:
+                self._pending = None
+            else:
+                self._pending = (self._request, base, state)
+                start_worker = not self._diffing
+                self._diffing = True
+
+        if base is None or state is None:
+            self._lbl_summary.setText("Select a state to compare with.")
+            return
+
+        self._lbl_summary.setText("Diffing...")
+        if start_worker:
+            t = threading.Thread(target=self._diff_worker, name='Memory diff', daemon=True)
+            t.start()
+
+    #
+    # Event handlers
+    #
+
+    def _on_pin_clicked(self):
+        if self.state.am_none():
+            return
+
+        state = self.state.am_obj
+        if any(s is state for s in self._pinned) or any(s is state for s in self.workspace.instance.states):
+            return
+
+        self._pinned.append(state)
+        self._cmb_states.addItem("%s (pinned)" % state.gui_data.name, state)
+        self._cmb_states.setCurrentIndex(self._cmb_states.count() - 1)
+
+    def _on_compare_state_changed(self, *args):
+        self.reload()
+
+    def _on_range_activated(self, item):
+        if self._range_callback is not None:
+            self._range_callback(item.data(Qt.UserRole))
+
+    #
+    # Private methods
+    #
+
+    def _init_widgets(self):
+
+        lbl_states = QLabel()
+        lbl_states.setText("Compare with")
+
+        cmb_states = QStateComboBox(self.workspace.instance, parent=self)
+        cmb_states.currentIndexChanged.connect(self._on_compare_state_changed)
+        self._cmb_states = cmb_states
+
+        btn_pin = QPushButton("Pin selected")
+        btn_pin.setToolTip("Keep the currently selected state around to compare other states with it.")
+        btn_pin.clicked.connect(self._on_pin_clicked)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(lbl_states)
+        top_layout.addWidget(cmb_states)
+        top_layout.addWidget(btn_pin)
+
+        self._lbl_summary = QLabel()
+
+        self._lst_ranges = QListWidget()
+        self._lst_ranges.itemDoubleClicked.connect(self._on_range_activated)
+
+        layout = QVBoxLayout()
+        layout.addLayout(top_layout)
+        layout.addWidget(self._lbl_summary)
+        layout.addWidget(self._lst_ranges)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.setLayout(layout)
+
+    def _diff_worker(self):
+
+        while True:
+            with self._diff_lock:
+                if self._pending is None:
+                    self._diffing = False
+                    return
+                request, base, state = self._pending
+                self._pending = None
+
+            start = time.time()
+            try:
+                diff = diff_memory(base, state)
+            except Exception:  # pylint:disable=broad-except
+                l.warning("Failed to diff the memory of two states.", exc_info=True)
+                diff = None
+            elapsed = time.time() - start
+
+            gui_thread_schedule_async(self._install_diff, args=(request, diff, elapsed))
+
+    def _install_diff(self, request, diff, elapsed):
+
+        if request != self._request:
+            # the states have changed since
+            return
+
+        self._lst_ranges.clear()
+        if diff is None:
+            self._lbl_summary.setText("Failed to diff the states.")
+            self._set_diff(None)
+            return
+
+        for range_start, range_end in diff.ranges():
+            item = QListWidgetItem("%#x - %#x (%d bytes)" % (range_start, range_end, range_end - range_start))
+            item.setData(Qt.UserRole, range_start)
+            self._lst_ranges.addItem(item)
+
+        self._lbl_summary.setText("%d bytes changed in %d pages (%.2f seconds)." % (len(diff), len(diff.pages),
+                                                                                    elapsed))
+        self._set_diff(diff)
+
+    def _set_diff(self, diff):
+        self._diff = diff
+        if self._diff_callback is not None:
+            self._diff_callback(diff)
+
+    def _watch_state(self, **kwargs):
+        self.reload()
+
+    def _watch_states(self, **kwargs):
+        base = self._cmb_states.state
+
+        self._cmb_states.blockSignals(True)
+        self._cmb_states.reload()
+        for state in self._pinned:
+            self._cmb_states.addItem("%s (pinned)" % state.gui_data.name, state)
+            if state is base:
+                self._cmb_states.setCurrentIndex(self._cmb_states.count() - 1)
+        self._cmb_states.blockSignals(False)
+
+        if self._cmb_states.state is not base:
+            self.reload()
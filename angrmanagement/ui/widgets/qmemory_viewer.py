@@ -1,121 +1,237 @@
 import logging
+from collections import OrderedDict
 
-from PySide2.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QScrollArea, QLineEdit,\
-    QWidget
-from PySide2.QtGui import QPainter, QBrush, QPen
+from PySide2.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QAbstractScrollArea, QLineEdit
+from PySide2.QtGui import QPainter, QPen, QColor
 from PySide2.QtCore import Qt, QSize
 
-from ...config import Conf
-from .qast_viewer import QASTViewer
+import claripy
 
-l = logging.getLogger('ui.widgets.qregister_viewer')
+from ...config import Conf
+from ...utils.memory_diff import MemoryDiff
 
+l = logging.getLogger('ui.widgets.qmemory_viewer')
 
-class AddressPiece(object):
-    __slots__ = ['address']
 
-    def __init__(self, address):
-        self.address = address
+class QMemoryView(QAbstractScrollArea):
+    """
+    A hex view of the memory of a state.
 
+    Memory is fetched one page at a time, and only the rows that are currently visible are painted. Concrete pages are
+    converted to bytes in one go. Only pages that contain symbolic data are split into individual bytes.
+    """
 
-class NewLinePiece(object):
-    pass
+    MARGIN_LEFT = 5
+    MARGIN_TOP = 5
+    LINE_MARGIN = 3
 
+    PAGE_SIZE = 0x100
+    MAX_CACHED_PAGES = 256
+    # the number of bytes that can be scrolled through around the current address
+    SCROLL_WINDOW = 0x1000000
 
-class QMemoryView(QWidget):
     def __init__(self, state, workspace, parent=None):
         super(QMemoryView, self).__init__(parent)
         self.workspace = workspace
 
         self.state = state
-        self.cols = None
-        self.rows = None
+        self.cols = 16
+
+        # The address that the scroll bar is relative to. Must be set through .address
+        self._base_address = None
+        self._total_rows = 0
+
+        # maps page addresses to lists of bytes, where each byte is either an int or a string describing a symbolic
+        # value
+        self._pages = OrderedDict()
 
-        # The current address being displayed. Must be set through .address
-        self._address = None
+        # changed bytes to highlight
+        self._diff = None  # type: MemoryDiff
 
-        self._objects = [ ]
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(1)
 
     @property
     def address(self):
-        return self._address
+        """
+        The address of the first visible row.
+        """
+        if self._base_address is None:
+            return None
+        return self._base_address + self.verticalScrollBar().value() * self.cols
 
     @address.setter
     def address(self, v):
-        if v != self._address:
-            self._address = v
-            self._reload_objects()
+        if v == self.address:
+            return
 
-    def paintEvent(self, event):
+        max_addr = self._max_address()
+        rows_before = min(v // self.cols, self.SCROLL_WINDOW // self.cols // 2)
+        self._base_address = v - rows_before * self.cols
+        self._total_rows = min(self.SCROLL_WINDOW, max_addr - self._base_address) // self.cols
 
-        if self.address is None:
-            return
+        self._update_scrollbar()
+        self.verticalScrollBar().setValue(rows_before)
+        self.viewport().update()
 
-        MARGIN_LEFT = 5
-        MARGIN_TOP = 5
-        LINE_MARGIN = 3
+    @property
+    def diff(self):
+        return self._diff
 
-        painter = QPainter(self)
+    @diff.setter
+    def diff(self, v):
+        self._diff = v
+        self.viewport().update()
 
-        painter.setPen(QPen(Qt.black, 1))
-        painter.setFont(Conf.symexec_font)
+    @property
+    def row_height(self):
+        return int(Conf.symexec_font_height) + self.LINE_MARGIN
 
-        x = MARGIN_LEFT
-        y = MARGIN_TOP
-
-        for obj in self._objects:
-
-            obj_type = type(obj)
-
-            if obj_type is NewLinePiece:
-                # carriage return
-                x = MARGIN_LEFT
-                y += Conf.symexec_font_height + LINE_MARGIN
-            elif obj_type is AddressPiece:
-                # address
-                addr_str = "%08x" % obj.address
-                painter.drawText(x, y + Conf.symexec_font_ascent, addr_str)
-                x += Conf.symexec_font_width * len(addr_str)
-                x += 7
-            elif obj_type is QASTViewer:
-                # AST viewer
-                obj.x = x
-                obj.y = y
-                obj.paint(painter)
-
-                x += obj.width + 2
-            else:
-                raise TypeError('paintEvent(): Unsupported object type %s.' % obj_type)
+    @property
+    def visible_rows(self):
+        return max(1, (self.viewport().height() - self.MARGIN_TOP) // self.row_height)
 
-    def _reload_objects(self):
+    #
+    # Public methods
+    #
+
+    def reload(self):
         """
-        Reload addresses and text pieces to be displayed.
+        Drop all fetched memory, and fetch the visible rows again from the state.
 
         :return: None
         """
 
-        objects = [ ]
+        self._pages.clear()
+        self.viewport().update()
+
+    #
+    # Overridden methods
+    #
+
+    def resizeEvent(self, event):
+        super(QMemoryView, self).resizeEvent(event)
+        self._update_scrollbar()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
 
-        addr_base = self.address
-        for row in range(self.rows):
+    def paintEvent(self, event):
+
+        addr = self.address
+        if addr is None or self.state.am_none():
+            return
 
-            addr = addr_base + row * self.cols
+        painter = QPainter(self.viewport())
+
+        normal_pen = QPen(Qt.black, 1)
+        changed_pen = QPen(QColor(0xc0, 0, 0), 1)
+        painter.setPen(normal_pen)
+        painter.setFont(Conf.symexec_font)
+
+        diff = self._diff
+        font_width = Conf.symexec_font_width
+        ascent = Conf.symexec_font_ascent
+        max_addr = self._max_address()
+
+        y = self.MARGIN_TOP
+        for _ in range(self.visible_rows):
+            if addr >= max_addr:
+                break
+
+            x = self.MARGIN_LEFT
 
             # address
-            addr_piece = AddressPiece(addr)
-            objects.append(addr_piece)
+            addr_str = "%08x" % addr
+            painter.drawText(x, y + ascent, addr_str)
+            x += font_width * len(addr_str) + 7
+
+            # bytes
+            for i, data in enumerate(self._load(addr, min(self.cols, max_addr - addr))):
+                data_str = "%02x" % data if type(data) is int else data
+                if diff is not None and diff.is_changed(addr + i):
+                    painter.setPen(changed_pen)
+                    painter.drawText(x, y + ascent, data_str)
+                    painter.setPen(normal_pen)
+                else:
+                    painter.drawText(x, y + ascent, data_str)
+                x += font_width * len(data_str) + 2
+
+            addr += self.cols
+            y += self.row_height
+
+    #
+    # Private methods
+    #
 
-            # QASTViewer objects
-            for col in range(self.cols):
-                data = self.state.memory.load(addr + col, 1, inspect=False, disable_actions=True)
-                ast_viewer = QASTViewer(data, workspace=self.workspace, custom_painting=True, display_size=False)
-                objects.append(ast_viewer)
+    def _update_scrollbar(self):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setPageStep(self.visible_rows)
+        scrollbar.setRange(0, max(0, self._total_rows - self.visible_rows))
 
-            # end of the line
-            newline_piece = NewLinePiece()
-            objects.append(newline_piece)
+    def _max_address(self):
+        return 1 << self.state.arch.bits
+
+    def _load(self, addr, size):
+        """
+        Get bytes from the page cache, fetching missing pages from the state.
 
-        self._objects = objects
+        :param int addr:    The address to start at.
+        :param int size:    Number of bytes to get.
+        :return:            A list of ints (for concrete bytes) and strings (for symbolic bytes).
+        :rtype:             list
+        """
+
+        data = [ ]
+        end = addr + size
+        while addr < end:
+            page_addr = addr - addr % self.PAGE_SIZE
+            page = self._pages.get(page_addr, None)
+            if page is None:
+                page = self._load_page(page_addr)
+                self._pages[page_addr] = page
+                if len(self._pages) > self.MAX_CACHED_PAGES:
+                    self._pages.popitem(last=False)
+            else:
+                self._pages.move_to_end(page_addr)
+
+            offset = addr - page_addr
+            chunk = page[offset : offset + end - addr]
+            data.extend(chunk)
+            addr += len(chunk)
+
+        return data
+
+    def _load_page(self, page_addr):
+
+        state = self.state
+        size = self.PAGE_SIZE
+
+        data = state.memory.load(page_addr, size, inspect=False, disable_actions=True)
+        if not data.symbolic:
+            return list(state.solver.eval(data, cast_to=bytes))
+
+        # only split the symbolic parts of the page into individual bytes
+        page = [ ]
+        row_size = self.cols
+        for row_offset in range(0, size, row_size):
+            # memory is loaded in big endian, so the first byte is the most significant one
+            hi = (size - row_offset) * 8 - 1
+            row = data[hi : hi - row_size * 8 + 1]
+            if not row.symbolic:
+                page.extend(state.solver.eval(row, cast_to=bytes))
+                continue
+            for i in range(row_size):
+                byte = row[(row_size - i) * 8 - 1 : (row_size - i - 1) * 8]
+                if not byte.symbolic:
+                    page.append(state.solver.eval(byte))
+                elif isinstance(byte, claripy.ast.BV) and byte.op == 'BVS':
+                    page.append(byte.args[0])
+                else:
+                    page.append(byte.__repr__(max_depth=1))
+
+        return page
 
 
 class QMemoryViewer(QFrame):
@@ -123,7 +239,6 @@ class QMemoryViewer(QFrame):
         super(QMemoryViewer, self).__init__(parent)
         self.workspace = workspace
 
-        self._scrollarea = None  # type: QScrollArea
         self._txt_addr = None  # type: QLineEdit
         self._view = None  # type: QMemoryView
 
@@ -166,6 +281,30 @@ class QMemoryViewer(QFrame):
 
         self._refresh_memory_view()
 
+    def jump_to(self, addr):
+        """
+        Display memory starting at an address, even if the view has been scrolled away from the same address before.
+
+        :param int addr:    The address to display.
+        :return:            None
+        """
+
+        self._txt_addr.setText("%x" % addr)
+        if self._addr != addr:
+            self.addr = addr
+        elif not self.state.am_none():
+            self._view.address = addr
+
+    def highlight_diff(self, diff):
+        """
+        Highlight changed bytes.
+
+        :param MemoryDiff diff: The changed bytes, or None to remove all highlights.
+        :return:                None
+        """
+
+        self._view.diff = diff
+
     #
     # Event handlers
     #
@@ -202,26 +341,15 @@ class QMemoryViewer(QFrame):
 
         self._view = QMemoryView(self.state, self.workspace)
 
-        area = QScrollArea()
-        self._scrollarea = area
-        area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        area.setWidgetResizable(True)
-
-        area.setWidget(self._view)
-
         layout.addLayout(top_layout)
-        layout.addWidget(area)
+        layout.addWidget(self._view)
         layout.setContentsMargins(0, 0, 0, 0)
 
         self.setLayout(layout)
 
     def _refresh_memory_view(self):
-        self._view.cols = 16
-        self._view.rows = 10
+        self._view.reload()
         self._view.address = self.addr
 
-        self._view.repaint()
-
     def _watch_state(self, **kwargs):
         self.reload()
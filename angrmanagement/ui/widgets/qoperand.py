@@ -1,285 +1,130 @@
 import logging
 
 from PySide2.QtWidgets import QApplication
-from PySide2.QtGui import QPainter, QColor
+from PySide2.QtGui import QColor
 from PySide2.QtCore import Qt, QRectF
 
 from angr.analyses.disassembly import ConstantOperand, RegisterOperand, MemoryOperand
 
-from ...logic.disassembly.info_dock import OperandDescriptor, OperandHighlightMode
-from .qgraph_object import QCachedGraphicsItem
+from ...logic.disassembly.info_dock import OperandDescriptor
+from .qgraph_object import QCachedGraphicsItem, create_static_text
 
 l = logging.getLogger('ui.widgets.qoperand')
 
 
-class QOperand(QCachedGraphicsItem):
-
-    BRANCH_TARGETS_SPACING = 5
-    VARIABLE_IDENT_SPACING = 5
-
-    def __init__(self, workspace, func_addr, disasm_view, disasm, infodock, insn, operand, operand_index,
-                 is_branch_target, is_indirect_branch, branch_targets, config, parent=None):
-        super().__init__(parent=parent)
-
-        self.workspace = workspace
-        self.func_addr = func_addr
-        self.disasm_view = disasm_view
-        self.disasm = disasm
-        self.infodock = infodock
-        self.variable_manager = infodock.variable_manager
-        self.insn = insn
-        self.operand = operand
-        self.operand_index = operand_index
-        self.is_branch_target = is_branch_target
-        self.is_indirect_branch = is_indirect_branch
-        self.branch_targets = branch_targets
+class OperandDisplay:
+    """
+    How an operand is displayed in the disassembly view: its text with and without variable names, the variable that it
+    is linked to, and its branch targets. Widths are in pixels.
+    """
+
+    __slots__ = ('label', 'label_width', 'variable', 'variable_label', 'variable_label_width', 'variable_ident',
+                 'variable_ident_width', 'branch_target', 'indirect_branch_targets', 'branch_targets_text',
+                 'branch_targets_text_width', 'is_target_func',
+                 '_workspace', '_func_addr', '_disasm', '_infodock', '_variable_manager', '_insn', '_operand',
+                 '_operand_index', '_config', )
+
+    def __init__(self, workspace, func_addr, disasm, infodock, insn, operand, operand_index, is_branch_target,
+                 is_indirect_branch, branch_targets, config):
+        self._workspace = workspace
+        self._func_addr = func_addr
+        self._disasm = disasm
+        self._infodock = infodock
+        self._variable_manager = infodock.variable_manager
+        self._insn = insn
+        self._operand = operand
+        self._operand_index = operand_index
+        self._config = config
 
+        self.label = None
+        self.label_width = None
         # the variable involved
         self.variable = None
-
-        self._cachy = None
-
-        self._config = config
-
-        # "widgets"
-        self._label = None
-        self._label_width = None
-        self._variable_label = None
-        self._variable_label_width = None
-        self._variable_ident = None
-        self._variable_ident_width = None
-        self._branch_target = None
-        self._branch_targets = None
-        self._branch_targets_text = None
-        self._branch_targets_text_width = None
-        self._is_target_func = None
-
-        self._width = None
-        self._height = None
-
-        self._init_widgets()
-
-    #
-    # Properties
-    #
-
-    @property
-    def text(self):
-        return self._label
+        self.variable_label = None
+        self.variable_label_width = None
+        self.variable_ident = None
+        self.variable_ident_width = None
+        self.branch_target = None
+        self.indirect_branch_targets = None
+        self.branch_targets_text = None
+        self.branch_targets_text_width = None
+        self.is_target_func = None
+
+        self._compute(is_branch_target, is_indirect_branch, branch_targets)
 
     @property
     def is_constant(self):
-        return isinstance(self.operand, ConstantOperand)
+        return isinstance(self._operand, ConstantOperand)
 
     @property
     def constant_value(self):
         if self.is_constant:
-            return self.operand.cs_operand.imm
+            return self._operand.cs_operand.imm
         return None
 
-    @property
-    def selected(self):
-        return self.infodock.is_operand_selected(self.insn.addr, self.operand_index)
-
-    @property
-    def operand_descriptor(self):
-        return OperandDescriptor(self.text, None,
-                                 func_addr=self.func_addr,
-                                 variable_ident=self.variable.ident if self.variable is not None else None)
-
-    #
-    # Event handlers
-    #
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.infodock.toggle_operand_selection(self.insn.addr, self.operand_index,
-                                                   self.operand_descriptor, insn_pos=self.parentItem().scenePos(),
-                                                   unique=QApplication.keyboardModifiers() != Qt.ControlModifier)
-        else:
-            super().mousePressEvent(event)
-
-    def mouseDoubleClickEvent(self, event):
-        button = event.button()
-        if button == Qt.LeftButton:
-            if self._branch_target is not None:
-                self.disasm_view.jump_to(self._branch_target, src_ins_addr=self.insn.addr)
-        else:
-            super().mouseDoubleClickEvent(event)
-
-    #
-    # Public methods
-    #
-
-    def refresh(self):
-        self._update_size()
-        self.recalculate_size()
-
-    def paint(self, painter, option, widget): #pylint: disable=unused-argument
-        if self.selected:
-            painter.setPen(self._config.disasm_view_operand_select_color)
-            painter.setBrush(self._config.disasm_view_operand_select_color)
-            painter.drawRect(0, 0, self.width, self.height)
-        else:
-            for _, selected_operand_desc in self.infodock.selected_operands.items():
-                if self._equals_for_highlighting_purposes(selected_operand_desc):
-                    painter.setBrush(self._config.disasm_view_operand_highlight_color)
-                    painter.setPen(self._config.disasm_view_operand_highlight_color)
-                    painter.drawRect(0, 0, self.width, self.height)
-                    break
-
-        if self._branch_target or self._branch_targets:
-            if self._is_target_func:
-                painter.setPen(self._config.disasm_view_target_addr_color)
-            else:
-                painter.setPen(self._config.disasm_view_antitarget_addr_color)
-        else:
-            if self.disasm_view.show_variable and self.variable is not None:
-                # show-variable is enabled and this operand has a linked variable
-                fallback = True
-                if self.infodock.induction_variable_analysis is not None:
-                    r = self.infodock.induction_variable_analysis.variables.get(self.variable.ident, None)
-                    if r is not None and r.expr.__class__.__name__ == "InductionExpr":
-                        painter.setPen(Qt.darkYellow)
-                        fallback = False
-
-                if fallback:
-                    painter.setPen(QColor(0xff, 0x14, 0x93))
-            else:
-                painter.setPen(QColor(0, 0, 0x80))
-
-        painter.setRenderHints(
-                QPainter.Antialiasing | QPainter.SmoothPixmapTransform | QPainter.HighQualityAntialiasing)
-        painter.setFont(self._config.disasm_font)
-        y = self._config.disasm_font_ascent
-
-        if self.disasm_view.show_variable and self._variable_label is not None:
-            text = self._variable_label
-            x = self._variable_label_width
-        else:
-            text = self._label
-            x = self._label_width
-        painter.drawText(0, y, text)
-
-        # draw additional branch targets
-        if self._branch_targets_text:
-            painter.setPen(Qt.darkYellow)
-            x += self.BRANCH_TARGETS_SPACING
-            painter.drawText(x, y, self._branch_targets_text, )
-            x += self._branch_targets_text_width
-
-        if self.variable is not None and self.disasm_view.show_variable_identifier:
-            x += self.VARIABLE_IDENT_SPACING
-            painter.setPen(Qt.darkGreen)
-            painter.drawText(x, y, self._variable_ident)
-            x += self._variable_ident_width
-
-        # restores the color
-        painter.setPen(QColor(0, 0, 0x80))
-
     #
     # Private methods
     #
 
-    def _branch_target_for_operand(self, operand, branch_targets):
-        if not branch_targets:
-            return None
-
-        if len(branch_targets) == 1:
-            return next(iter(branch_targets))
-
-        # there are more than one targets
-        # we pick the one that complies with the operand's text
-        # my solution is pretty hackish...
-
-        imm = self.constant_value
-        if imm is not None and imm in branch_targets:
-            # problem solved
-            return imm
-        else:
-            # umm why?
-            pass
-
-        # try to render it
-        rendered = operand.render()[0]
-        for t in branch_targets:
-            if "%x" % t == rendered or "%#x" % t == rendered:
-                return t
-            if t == rendered:
-                return t
-
-        # ouch not sure what to do
-        l.warning('Cannot determine branch targets for operand "%s". Please report on GitHub.', rendered)
-        # return a random one
-        return next(iter(branch_targets))
-
-    def _first_n_branch_targets(self, branch_targets, n):
-
-        if not branch_targets:
-            return [ ]
+    def _compute(self, is_branch_target, is_indirect_branch, branch_targets):
 
-        return list(branch_targets)[ : n]
-
-    def _init_widgets(self):
-
-        if self.is_branch_target:
+        if is_branch_target:
             # a branch instruction
 
-            if self.branch_targets is not None and next(iter(self.branch_targets)) in self.disasm.kb.functions:
+            if branch_targets is not None and next(iter(branch_targets)) in self._disasm.kb.functions:
                 # jumping to a function
                 is_target_func = True
             else:
                 # jumping to a non-function address
                 is_target_func = False
 
-            if self.is_indirect_branch:
+            if is_indirect_branch:
                 # indirect jump
-                self._label = self.operand.render()[0]
-                self._label_width = len(self._label) * self._config.disasm_font_width
-                self._is_target_func = is_target_func
+                self.label = self._operand.render()[0]
+                self.label_width = len(self.label) * self._config.disasm_font_width
+                self.is_target_func = is_target_func
 
-                self._branch_targets = self.branch_targets
-                first_n_targets = self._first_n_branch_targets(self._branch_targets, 3)
+                self.indirect_branch_targets = branch_targets
+                first_n_targets = self._first_n_branch_targets(self.indirect_branch_targets, 3)
                 if first_n_targets:
-                    self._branch_targets_text = "[ %s ]" % ", ".join([ "%xh" % t for t in first_n_targets ])
-                    self._branch_targets_text_width = len(self._branch_targets_text) * self._config.disasm_font_width
+                    self.branch_targets_text = "[ %s ]" % ", ".join([ "%xh" % t for t in first_n_targets ])
+                    self.branch_targets_text_width = len(self.branch_targets_text) * self._config.disasm_font_width
 
-                if self._branch_targets and len(self._branch_targets) == 1:
-                    self._branch_target = next(iter(self._branch_targets))
+                if self.indirect_branch_targets and len(self.indirect_branch_targets) == 1:
+                    self.branch_target = next(iter(self.indirect_branch_targets))
 
             else:
-                self._label = self.operand.render()[0]
-                self._label_width = self._config.disasm_font_metrics.width(self._label)
-                self._is_target_func = is_target_func
+                self.label = self._operand.render()[0]
+                self.label_width = self._config.disasm_font_metrics.width(self.label)
+                self.is_target_func = is_target_func
 
-                self._branch_target = self._branch_target_for_operand(self.operand, self.branch_targets)
+                self.branch_target = self._branch_target_for_operand(self._operand, branch_targets)
 
         else:
             # not a branch
 
             formatting = {}
-            if isinstance(self.operand, MemoryOperand):
+            if isinstance(self._operand, MemoryOperand):
                 variable_sort = 'memory'
-            elif isinstance(self.operand, RegisterOperand):
+            elif isinstance(self._operand, RegisterOperand):
                 variable_sort = 'register'
             else:
                 variable_sort = None
 
             # without displaying variable
-            self._label = self.operand.render(formatting=formatting)[0]
-            self._label_width = len(self._label) * self._config.disasm_font_width
+            self.label = self._operand.render(formatting=formatting)[0]
+            self.label_width = len(self.label) * self._config.disasm_font_width
 
             if variable_sort:
                 # try find the corresponding variable
-                variable_and_offsets = self.variable_manager[self.func_addr].find_variables_by_insn(self.insn.addr,
-                                                                                                    variable_sort
-                                                                                                    )
+                variable_and_offsets = self._variable_manager[self._func_addr].find_variables_by_insn(
+                    self._insn.addr, variable_sort)
                 if variable_and_offsets:
                     variable, offset = self._pick_variable(variable_and_offsets)
 
                     if variable is not None:
                         self.variable = variable
-                        self._variable_ident = "<%s>" % variable.ident
+                        self.variable_ident = "<%s>" % variable.ident
                         if offset is None:
                             # unexpected
                             # TODO: Figure out why
@@ -290,7 +135,7 @@ class QOperand(QCachedGraphicsItem):
 
                         variable_str = variable.name
 
-                        ident = (self.insn.addr, 'operand', self.operand_index)
+                        ident = (self._insn.addr, 'operand', self._operand_index)
                         if 'custom_values_str' not in formatting: formatting['custom_values_str'] = { }
                         if variable_sort == 'memory':
                             if offset == 0: custom_value_str = variable_str
@@ -301,8 +146,8 @@ class QOperand(QCachedGraphicsItem):
                         ##
                         # Hacks
                         ##
-                        if self.infodock.induction_variable_analysis is not None:
-                            r = self.infodock.induction_variable_analysis.variables.get(variable.ident, None)
+                        if self._infodock.induction_variable_analysis is not None:
+                            r = self._infodock.induction_variable_analysis.variables.get(variable.ident, None)
                             if r is not None and r.expr.__class__.__name__ == "InductionExpr":
                                 custom_value_str = "i*%d+%d" % (r.expr.stride, r.expr.init)
                             if r is not None and r.expr.__class__.__name__ == "Add" and r.expr.operands[0].__class__.__name__ == "InductionExpr":
@@ -314,30 +159,52 @@ class QOperand(QCachedGraphicsItem):
                         formatting['values_style'][ident] = 'curly'
 
                     # with variable displayed
-                    self._variable_label = self.operand.render(formatting=formatting)[0]
-                    self._variable_label_width = self._config.disasm_font_metrics.width(self._variable_label)
+                    self.variable_label = self._operand.render(formatting=formatting)[0]
+                    self.variable_label_width = self._config.disasm_font_metrics.width(self.variable_label)
 
         if self.variable is not None:
-            self._variable_ident_width = self._config.disasm_font_metrics.width(self._variable_ident)
+            self.variable_ident_width = self._config.disasm_font_metrics.width(self.variable_ident)
         else:
-            self._variable_ident_width = 0
+            self.variable_ident_width = 0
 
-        self._update_size()
+    def _branch_target_for_operand(self, operand, branch_targets):
+        if not branch_targets:
+            return None
 
-    def _update_size(self):
-        if self.disasm_view.show_variable and self._variable_label is not None:
-            self._width = self._variable_label_width
+        if len(branch_targets) == 1:
+            return next(iter(branch_targets))
+
+        # there are more than one targets
+        # we pick the one that complies with the operand's text
+        # my solution is pretty hackish...
+
+        imm = self.constant_value
+        if imm is not None and imm in branch_targets:
+            # problem solved
+            return imm
         else:
-            self._width = self._label_width
-        if self.disasm_view.show_variable_identifier and self._variable_ident_width:
-            self._width += self.VARIABLE_IDENT_SPACING + self._variable_ident_width
-        if self._branch_targets_text_width:
-            self._width += self.BRANCH_TARGETS_SPACING + self._branch_targets_text_width
-        self._height = self._config.disasm_font_height
-        self.recalculate_size()
+            # umm why?
+            pass
 
-    def _boundingRect(self):
-        return QRectF(0, 0, self._width, self._height)
+        # try to render it
+        rendered = operand.render()[0]
+        for t in branch_targets:
+            if "%x" % t == rendered or "%#x" % t == rendered:
+                return t
+            if t == rendered:
+                return t
+
+        # ouch not sure what to do
+        l.warning('Cannot determine branch targets for operand "%s". Please report on GitHub.', rendered)
+        # return a random one
+        return next(iter(branch_targets))
+
+    def _first_n_branch_targets(self, branch_targets, n):
+
+        if not branch_targets:
+            return [ ]
+
+        return list(branch_targets)[ : n]
 
     def _pick_variable(self, variable_and_offsets):
         """
@@ -348,21 +215,21 @@ class QOperand(QCachedGraphicsItem):
         :rtype:                             tuple
         """
 
-        if isinstance(self.operand, MemoryOperand):
+        if isinstance(self._operand, MemoryOperand):
             if len(variable_and_offsets) > 1:
-                l.error("Instruction %#x has two memory operands. Please report it on GitHub.", self.insn.addr)
+                l.error("Instruction %#x has two memory operands. Please report it on GitHub.", self._insn.addr)
             return variable_and_offsets[0]
 
-        elif isinstance(self.operand, RegisterOperand):
+        elif isinstance(self._operand, RegisterOperand):
             # there might be multiple register-type variables for an instruction. pick the right one is... not easy
 
-            the_reg = self.operand.register
+            the_reg = self._operand.register
             if the_reg is None:
                 # huh, it does not have a Register child
                 return None, None
 
             reg_name = the_reg.reg
-            arch = self.workspace.instance.project.arch
+            arch = self._workspace.instance.project.arch
 
             if len(variable_and_offsets) == 1:
                 # only one candidate...
@@ -371,17 +238,17 @@ class QOperand(QCachedGraphicsItem):
                     return var, offset
                 return None, None
 
-            if self.operand_index > 0:
+            if self._operand_index > 0:
                 # this is the source operand
                 # which variable is read here?
                 for var, offset in variable_and_offsets:
                     if arch.registers[reg_name][0] == var.reg:
-                        if self._variable_has_access(var, self.insn.addr, 'read'):
+                        if self._variable_has_access(var, self._insn.addr, 'read'):
                             return var, offset
 
                 l.debug('Cannot find any source variable for operand %d at instruction %#x.',
-                        self.operand_index,
-                        self.insn.addr
+                        self._operand_index,
+                        self._insn.addr
                         )
                 return None, None
 
@@ -389,53 +256,249 @@ class QOperand(QCachedGraphicsItem):
             # which variable is written here?
             for var, offset in variable_and_offsets:
                 if arch.registers[reg_name][0] == var.reg:
-                    if self._variable_has_access(var, self.insn.addr, 'write'):
+                    if self._variable_has_access(var, self._insn.addr, 'write'):
                         return var, offset
 
             l.debug('Cannot find any destination variable for operand %d at instruction %#x.',
-                    self.operand_index,
-                    self.insn.addr
+                    self._operand_index,
+                    self._insn.addr
                     )
             # just return the first one
             return None, None
 
         else:
             # what's this type? why am I here?
-            l.error('_pick_variable: Unsupported operand type %s.', self.operand.__class__)
+            l.error('_pick_variable: Unsupported operand type %s.', self._operand.__class__)
 
             return None, None
 
 
     def _variable_has_access(self, variable, ins_addr, access_type):
 
-        if variable not in self.variable_manager[self.func_addr]._variable_accesses:
+        if variable not in self._variable_manager[self._func_addr]._variable_accesses:
             l.error('Variable %s does not have any accessing records.', variable)
             return False
 
-        accesses = self.variable_manager[self.func_addr]._variable_accesses[variable]
+        accesses = self._variable_manager[self._func_addr]._variable_accesses[variable]
         for access in accesses:
             if access.location.ins_addr == ins_addr and access.access_type == access_type:
                 return True
 
         return False
 
-    def _equals_for_highlighting_purposes(self, other):
-        """
 
-        :param OperandDescriptor other: The other operand to compare with.
-        :return:
+def operand_color(display, disasm_view, infodock, config):
+    """
+    The color that an operand is drawn in.
+
+    :param OperandDisplay display:  The operand.
+    :param disasm_view:             The disassembly view that the operand is shown in.
+    :param InfoDock infodock:       The info dock of the disassembly view.
+    :param config:                  The configuration to take colors from.
+    :rtype:                         QColor
+    """
+
+    if display.branch_target or display.indirect_branch_targets:
+        if display.is_target_func:
+            return config.disasm_view_target_addr_color
+        return config.disasm_view_antitarget_addr_color
+
+    if disasm_view.show_variable and display.variable is not None:
+        # show-variable is enabled and this operand has a linked variable
+        if infodock.induction_variable_analysis is not None:
+            r = infodock.induction_variable_analysis.variables.get(display.variable.ident, None)
+            if r is not None and r.expr.__class__.__name__ == "InductionExpr":
+                return QColor(Qt.darkYellow)
+        return QColor(0xff, 0x14, 0x93)
+
+    return QColor(0, 0, 0x80)
+
+
+def operand_width(display, disasm_view):
+    """
+    The width of an operand in pixels, given what the disassembly view currently shows.
+
+    :param OperandDisplay display:  The operand.
+    :param disasm_view:             The disassembly view that the operand is shown in.
+    :rtype:                         float
+    """
+
+    if disasm_view.show_variable and display.variable_label is not None:
+        width = display.variable_label_width
+    else:
+        width = display.label_width
+    if disasm_view.show_variable_identifier and display.variable_ident_width:
+        width += QOperand.VARIABLE_IDENT_SPACING + display.variable_ident_width
+    if display.branch_targets_text_width:
+        width += QOperand.BRANCH_TARGETS_SPACING + display.branch_targets_text_width
+    return width
+
+
+class QOperand(QCachedGraphicsItem):
+
+    BRANCH_TARGETS_SPACING = 5
+    VARIABLE_IDENT_SPACING = 5
+
+    def __init__(self, workspace, func_addr, disasm_view, disasm, infodock, insn, operand, operand_index,
+                 is_branch_target, is_indirect_branch, branch_targets, config, parent=None):
+        super().__init__(parent=parent)
+
+        self.workspace = workspace
+        self.func_addr = func_addr
+        self.disasm_view = disasm_view
+        self.disasm = disasm
+        self.infodock = infodock
+        self.variable_manager = infodock.variable_manager
+        self.insn = insn
+        self.operand = operand
+        self.operand_index = operand_index
+        self.is_branch_target = is_branch_target
+        self.is_indirect_branch = is_indirect_branch
+        self.branch_targets = branch_targets
+
+        self._cachy = None
+
+        self._config = config
+
+        # what is displayed
+        self._display = None
+        # laid out texts of the above, for painting
+        self._static_texts = { }
+
+        self._width = None
+        self._height = None
+
+        self._init_widgets()
+
+    #
+    # Properties
+    #
+
+    @property
+    def text(self):
+        return self._display.label
+
+    @property
+    def variable(self):
         """
+        The variable involved, or None.
+        """
+        return self._display.variable
 
-        if other is None:
-            return False
+    @property
+    def is_constant(self):
+        return self._display.is_constant
 
-        highlight_mode = self.infodock.highlight_mode
+    @property
+    def constant_value(self):
+        return self._display.constant_value
+
+    @property
+    def selected(self):
+        return self.infodock.is_operand_selected(self.insn.addr, self.operand_index)
 
-        if highlight_mode == OperandHighlightMode.SAME_TEXT or self.variable is None:
-            # when there is no related variable, we highlight as long as they have the same text
-            return other.text == self.text
-        elif highlight_mode == OperandHighlightMode.SAME_IDENT:
-            if self.variable is not None and other.variable_ident is not None:
-                return self.func_addr == other.func_addr and self.variable.ident == other.variable_ident
+    @property
+    def highlight_key(self):
+        return self.infodock.operand_highlight_key(self.func_addr, self.text, self.variable)
 
-        return False
+    @property
+    def operand_descriptor(self):
+        return OperandDescriptor(self.text, None,
+                                 func_addr=self.func_addr,
+                                 variable_ident=self.variable.ident if self.variable is not None else None)
+
+    #
+    # Event handlers
+    #
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.infodock.toggle_operand_selection(self.insn.addr, self.operand_index,
+                                                   self.operand_descriptor, insn_pos=self.parentItem().scenePos(),
+                                                   unique=QApplication.keyboardModifiers() != Qt.ControlModifier)
+        else:
+            super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        button = event.button()
+        if button == Qt.LeftButton:
+            if self._display.branch_target is not None:
+                self.disasm_view.jump_to(self._display.branch_target, src_ins_addr=self.insn.addr)
+        else:
+            super().mouseDoubleClickEvent(event)
+
+    #
+    # Public methods
+    #
+
+    def refresh(self):
+        self._update_size()
+        self.recalculate_size()
+
+    def paint(self, painter, option, widget): #pylint: disable=unused-argument
+        d = self._display
+
+        if self.selected:
+            painter.setPen(self._config.disasm_view_operand_select_color)
+            painter.setBrush(self._config.disasm_view_operand_select_color)
+            painter.drawRect(0, 0, self.width, self.height)
+        elif self.highlight_key in self.infodock.highlighted_operand_keys:
+            painter.setBrush(self._config.disasm_view_operand_highlight_color)
+            painter.setPen(self._config.disasm_view_operand_highlight_color)
+            painter.drawRect(0, 0, self.width, self.height)
+
+        painter.setPen(operand_color(d, self.disasm_view, self.infodock, self._config))
+
+        # render hints are set by the view. texts are drawn with their top-left corner at the given position.
+        painter.setFont(self._config.disasm_font)
+        static_texts = self._static_texts
+
+        if self.disasm_view.show_variable and d.variable_label is not None:
+            text = static_texts['variable_label']
+            x = d.variable_label_width
+        else:
+            text = static_texts['label']
+            x = d.label_width
+        painter.drawStaticText(0, 0, text)
+
+        # draw additional branch targets
+        if d.branch_targets_text:
+            painter.setPen(Qt.darkYellow)
+            x += self.BRANCH_TARGETS_SPACING
+            painter.drawStaticText(x, 0, static_texts['branch_targets'])
+            x += d.branch_targets_text_width
+
+        if d.variable is not None and self.disasm_view.show_variable_identifier:
+            x += self.VARIABLE_IDENT_SPACING
+            painter.setPen(Qt.darkGreen)
+            painter.drawStaticText(x, 0, static_texts['variable_ident'])
+            x += d.variable_ident_width
+
+        # restores the color
+        painter.setPen(QColor(0, 0, 0x80))
+
+    #
+    # Private methods
+    #
+
+    def _init_widgets(self):
+        d = self._display = OperandDisplay(self.workspace, self.func_addr, self.disasm, self.infodock, self.insn,
+                                           self.operand, self.operand_index, self.is_branch_target,
+                                           self.is_indirect_branch, self.branch_targets, self._config)
+
+        self._static_texts = {
+            'label': create_static_text(d.label),
+            'variable_label': create_static_text(d.variable_label),
+            'branch_targets': create_static_text(d.branch_targets_text),
+            'variable_ident': create_static_text(d.variable_ident),
+        }
+
+        self._update_size()
+
+    def _update_size(self):
+        self._width = operand_width(self._display, self.disasm_view)
+        self._height = self._config.disasm_font_height
+        self.recalculate_size()
+
+    def _boundingRect(self):
+        return QRectF(0, 0, self._width, self._height)
@@ -24,6 +24,22 @@ class QPathTree(QFrame):
         # widgets
         self._graph = None
 
+        # incremental path tree maintenance
+        self._simgr = None  # the simulation manager that the current tree is built from
+        # histories of all displayed states -> in how many stashes they are. it is updated from the changes of the
+        # stashes, so a step only costs as much as the states that it touches.
+        self._leaves = { }
+        # stash name -> (number of states, first state, last state, histories of the states) when it was last seen
+        self._stash_states = { }
+        self._history_to_block = { }
+        # maps the first history below a block's parent on the path towards that block, to the block. it tells whether
+        # a new branch point falls onto an existing edge of the tree.
+        self._slot_to_block = { }
+        self._block_to_slot = { }
+
+        # stashes of a deferred reload, or False if no reload is pending
+        self._pending_stashes = False
+
         self._init_widgets()
 
         self.simgr.am_subscribe(self._watch_simgr)
@@ -32,16 +48,38 @@ class QPathTree(QFrame):
     # Public methods
     #
 
-    def reload(self):
+    def reload(self, stashes=None):
+        """
+        Update the path tree.
+
+        New histories are appended to the existing tree, and only the affected part of the tree is laid out again. The
+        tree is generated from scratch only when the simulation manager changes or the tree structure changed in a way
+        that cannot be patched.
+
+        :param dict stashes:    A snapshot of stashes to display, or None to read stashes from the simulation manager.
+        :return:                None
+        """
+
         if self.simgr.am_none():
             return
 
-        states = [state for (stash, states) in self.simgr.stashes.items() if stash != 'pruned' for state in states]
+        if stashes is None:
+            stashes = self.simgr.stashes
+
         hierarchy = self.simgr._hierarchy
+        incremental = self._simgr is self.simgr.am_obj and self._graph.graph is not None
+        if not incremental:
+            self._leaves = { }
+            self._stash_states = { }
+        added, removed = self._diff_stashes(stashes)
 
-        graph = self._generate_graph([state.history for state in states], hierarchy, self.symexec_view)
+        if incremental:
+            if self._update_graph(added, removed, hierarchy):
+                self._graph.request_relayout()
+                return
+            l.debug('The path tree cannot be updated incrementally. Regenerate it.')
 
-        self._graph.graph = graph
+        self._generate_graph(hierarchy)
 
     #
     # Initialization
@@ -65,6 +103,13 @@ class QPathTree(QFrame):
     def sizeHint(self):
         return QSize(500, 500)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+
+        if self._pending_stashes is not False:
+            stashes, self._pending_stashes = self._pending_stashes, False
+            self.reload(stashes=stashes)
+
     #
     # Private methods
     #
@@ -92,53 +137,183 @@ class QPathTree(QFrame):
                             yield parent_path
                             seen.add(parent_path.path_id)
 
-    @staticmethod
-    def _all_edges_gen(state_histories, hierarchy):
-
-        # TODO: reduce duplication with above function
-        work = set(state_histories)
-        while len(work) > 0:
-            working_history = bot_history = work.pop()
-            while hierarchy.history_contains(working_history):
-                parent_histories = hierarchy.history_predecessors(working_history)
-                if not parent_histories:
-                    break
-
-                parent_history = parent_histories[0]
-
-                try:
-                    successors = hierarchy.history_successors(parent_history)
-                    if len(successors) > 1:
-                        yield (parent_history, bot_history)
-                        work.add(parent_history)
-                        break
-                    else:
-                        working_history = parent_history
-                except KeyError:
-                    # the parent history is not found in the path mapping
-                    l.error('Parent history %s is not found', parent_history)
-                    break
-
-    @staticmethod
-    def _generate_graph(state_histories, hierarchy, symexec_view):
-
-        g = networkx.DiGraph()
-
-        history_to_block = { }
-
-        for state_history in state_histories:
-            if state_history not in history_to_block:
-                history_to_block[state_history] = QStateBlock(False, symexec_view, history=state_history)
-            g.add_node(history_to_block[state_history])
-
-        for src, dst in QPathTree._all_edges_gen(state_histories, hierarchy):
-            if src not in history_to_block:
-                history_to_block[src] = QStateBlock(False, symexec_view, history=src)
-            if dst not in history_to_block:
-                history_to_block[dst] = QStateBlock(dst, False, symexec_view, history=dst)
-            g.add_edge(history_to_block[src], history_to_block[dst])
-
-        return g
+    def _diff_stashes(self, stashes):
+        """
+        Find the histories of states that have been added to or removed from the displayed stashes since they were last
+        seen, and update self._leaves. Stashes that states have only been appended to, such as deadended, are not walked
+        again; other stashes, such as active, are compared in full, which is proportional to the states that stepped.
+
+        :param dict stashes:    Stash names -> lists of states.
+        :return:                The histories that have become displayed, and those that are no longer displayed.
+        :rtype:                 tuple
+        """
+
+        old = self._stash_states
+        self._stash_states = { }
+        changes = { }  # history -> change of its count
+        for stash, states in stashes.items():
+            if stash == 'pruned':
+                continue
+            previous = old.pop(stash, None)
+            if previous is not None:
+                count, first, last, histories = previous
+                if count == 0 or (len(states) >= count and states[0] is first and states[count - 1] is last):
+                    # states have only been appended
+                    new_states = states[count:]
+                else:
+                    for history in histories:
+                        changes[history] = changes.get(history, 0) - 1
+                    histories = [ ]
+                    new_states = states
+            else:
+                histories = [ ]
+                new_states = states
+
+            for state in new_states:
+                history = state.history
+                histories.append(history)
+                changes[history] = changes.get(history, 0) + 1
+            if states:
+                self._stash_states[stash] = (len(states), states[0], states[-1], histories)
+            else:
+                self._stash_states[stash] = (0, None, None, histories)
+
+        # stashes that are gone
+        for _, _, _, histories in old.values():
+            for history in histories:
+                changes[history] = changes.get(history, 0) - 1
+
+        added, removed = [ ], [ ]
+        leaves = self._leaves
+        for history, delta in changes.items():
+            if not delta:
+                continue
+            before = leaves.get(history, 0)
+            after = before + delta
+            if after > 0:
+                leaves[history] = after
+            else:
+                leaves.pop(history, None)
+            if before <= 0 < after:
+                added.append(history)
+            elif after <= 0 < before:
+                removed.append(history)
+        return added, removed
+
+    def _generate_graph(self, hierarchy):
+        self._simgr = self.simgr.am_obj
+        self._history_to_block.clear()
+        self._slot_to_block.clear()
+        self._block_to_slot.clear()
+
+        self._graph.graph = networkx.DiGraph()
+        self._update_graph(list(self._leaves), [ ], hierarchy)
+        self._graph.request_relayout(reset_view=True)
+
+    def _update_graph(self, added, removed, hierarchy):
+        """
+        Add new histories to the path tree, and remove histories that are no longer displayed. self._leaves must already
+        hold the histories of all states to display.
+
+        :param list added:      Histories that have become displayed.
+        :param list removed:    Histories that are no longer displayed.
+        :param hierarchy:       The state hierarchy of the simulation manager.
+        :return:                True if the tree is updated, False if it must be generated from scratch.
+        :rtype:                 bool
+        """
+
+        leaves = self._leaves
+
+        for state_history in added:
+            if state_history not in self._history_to_block:
+                if self._attach(state_history, hierarchy, leaves) is None:
+                    return False
+
+        # remove states that are gone, as well as branch points that no longer lead to any state
+        graph = self._graph.graph
+        for state_history in removed:
+            block = self._history_to_block.get(state_history, None)
+            while block is not None and graph.out_degree(block) == 0 and block.history not in leaves:
+                predecessors = list(graph.predecessors(block))
+                self._graph.remove_block(block)
+                self._forget(block)
+                block = predecessors[0] if predecessors else None
+
+        return True
+
+    def _attach(self, history, hierarchy, leaves):
+        """
+        Create a block for a history and attach it to the tree. Linear chains of histories are collapsed into a single
+        block, so the history is attached to its closest ancestor that is either a branch point or already in the tree.
+        A block that is a leaf of the tree and has been stepped is replaced by the block of its descendant.
+
+        :return:    The new block, or None if the history cannot be attached incrementally.
+        """
+
+        working_history = history
+        parent_history, parent_block = None, None
+        while hierarchy.history_contains(working_history):
+            parent_histories = hierarchy.history_predecessors(working_history)
+            if not parent_histories:
+                break
+
+            parent_history = parent_histories[0]
+            parent_block = self._history_to_block.get(parent_history, None)
+            if parent_block is not None:
+                break
+
+            try:
+                successors = hierarchy.history_successors(parent_history)
+            except KeyError:
+                # the parent history is not found in the path mapping
+                l.error('Parent history %s is not found', parent_history)
+                parent_history = None
+                break
+
+            if len(successors) > 1:
+                # a branch point that is not in the tree yet
+                parent_block = self._attach(parent_history, hierarchy, leaves)
+                if parent_block is None:
+                    return None
+                break
+
+            working_history = parent_history
+
+        # working_history is the first history below the parent block
+        slot = working_history
+        block = QStateBlock(False, self.symexec_view, history=history)
+
+        if parent_block is not None \
+                and self._graph.graph.out_degree(parent_block) == 0 \
+                and parent_history not in leaves \
+                and len(hierarchy.history_successors(parent_history)) == 1:
+            # the parent state has been stepped. its descendant takes its place.
+            slot = self._block_to_slot.get(parent_block, None)
+            self._forget(parent_block)
+            self._graph.replace_block(parent_block, block)
+        else:
+            existing = self._slot_to_block.get(slot, None)
+            if existing is not None:
+                # the history is a new branch point on an existing edge of the tree
+                return None
+            self._graph.add_block(block, parent=parent_block)
+
+        self._history_to_block[history] = block
+        if slot is not None:
+            self._slot_to_block[slot] = block
+            self._block_to_slot[block] = slot
+        return block
+
+    def _forget(self, block):
+        del self._history_to_block[block.history]
+        slot = self._block_to_slot.pop(block, None)
+        if slot is not None:
+            del self._slot_to_block[slot]
 
     def _watch_simgr(self, **kwargs):
-        self.reload()
+        stashes = kwargs.get('stashes', None)
+        if not self.isVisible():
+            # do not spend any time on the GUI thread laying out a graph that nobody sees
+            self._pending_stashes = stashes
+            return
+        self.reload(stashes=stashes)
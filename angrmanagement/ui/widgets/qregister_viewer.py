@@ -1,6 +1,7 @@
 import logging
+import weakref
 
-from PySide2.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QScrollArea, QSizePolicy
+from PySide2.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout, QScrollArea, QSizePolicy, QCheckBox
 from PySide2.QtCore import Qt, QSize
 
 from .qast_viewer import QASTViewer
@@ -14,13 +15,15 @@ class QRegisterViewer(QFrame):
         'X86': {
             'common': [
                 'eax', 'ecx', 'edx', 'ebx', 'esp', 'ebp', 'esi', 'edi', 'eip'
-            ]
+            ],
+            'vector': [ 'xmm%d' % i for i in range(8) ],
         },
         'AMD64': {
             'common': [
                 'rax', 'rcx', 'rdx', 'rbx', 'rsp', 'rbp', 'rsi', 'rdi', 'rip', 'r8', 'r9', 'r10', 'r11', 'r12',
                 'r13', 'r14', 'r15'
-            ]
+            ],
+            'vector': [ 'ymm%d' % i for i in range(16) ],
         },
         'MIPS32': {
             'common': [
@@ -31,7 +34,8 @@ class QRegisterViewer(QFrame):
         'ARM': {
             'common': [
                 'r0', 'r1', 'r2', 'r3', 'r4', 'r5', 'r6', 'r7', 'r8', 'r9', 'r10', 'r11', 'r12', 'sp', 'lr', 'pc'
-            ]
+            ],
+            'vector': [ 'd%d' % i for i in range(32) ],
         },
     }
 
@@ -44,7 +48,17 @@ class QRegisterViewer(QFrame):
         self._state = state
         self.workspace = workspace
 
-        self._registers = { }
+        self._registers = { }  # register name -> QASTViewer
+        self._labels = { }  # register name -> QLabel
+        self._vector_container = None  # type: QFrame
+        self._show_vector = False
+
+        # the state whose registers are currently displayed
+        self._displayed_state = None
+        # register values that have been loaded so far, keyed by state
+        self._values = weakref.WeakKeyDictionary()
+        # registers that differ between the displayed state and the state displayed before it
+        self._changed = set()
 
         self._state.am_subscribe(self._watch_state)
 
@@ -59,17 +73,96 @@ class QRegisterViewer(QFrame):
     # Public methods
     #
 
-    def reload(self):
-        for reg_name, reg_ctrl in self._registers.items():
-            if self._state.am_none():
-                reg_ctrl.ast = None
-            else:
-                reg_ctrl.ast = self._state.registers.load(reg_name, disable_actions=True, inspect=False)
+    def reload(self, force=False):
+        """
+        Display the registers of the current state. Only registers whose values differ from what is being displayed are
+        updated, and they are highlighted until another state is displayed.
+
+        :param bool force:  Reload all register values from the state, even if the state has been displayed before, e.g.,
+                            because registers have been modified in place.
+        :return:            None
+        """
+
+        state = None if self._state.am_none() else self._state.am_obj
+        if state is self._displayed_state and not force:
+            return
+
+        if force and state is not None:
+            self._values.pop(state, None)
+
+        previous_state = self._displayed_state
+        self._displayed_state = state
+
+        changed = set()
+        for reg_name in self._visible_registers():
+            reg_ctrl = self._registers[reg_name]
+            value = self._load_register(state, reg_name)
+            if value is not reg_ctrl.ast:
+                reg_ctrl.ast = value
+                if previous_state is not None and state is not None:
+                    changed.add(reg_name)
+
+        if state is previous_state:
+            # registers that were modified in place are highlighted along with those that were highlighted already
+            changed |= self._changed
+        self._set_changed(changed)
+
+    #
+    # Event handlers
+    #
+
+    def _on_vector_toggled(self, checked):
+        self._show_vector = checked
+        self._vector_container.setVisible(checked)
+        if checked:
+            self._update_registers(self._arch_registers().get('vector', [ ]))
 
     #
     # Private methods
     #
 
+    def _arch_registers(self):
+        return self.ARCH_REGISTERS[self._state.arch.name]
+
+    def _visible_registers(self):
+        regs = self._arch_registers()
+        if self._show_vector:
+            return regs['common'] + regs['vector']
+        return regs['common']
+
+    def _load_register(self, state, reg_name):
+        if state is None:
+            return None
+
+        values = self._values.get(state, None)
+        if values is None:
+            values = { }
+            self._values[state] = values
+
+        try:
+            return values[reg_name]
+        except KeyError:
+            value = state.registers.load(reg_name, disable_actions=True, inspect=False)
+            values[reg_name] = value
+            return value
+
+    def _update_registers(self, reg_names):
+        # bring registers that have not been displayed along with the current state up to date
+        for reg_name in reg_names:
+            value = self._load_register(self._displayed_state, reg_name)
+            reg_ctrl = self._registers[reg_name]
+            if value is not reg_ctrl.ast:
+                reg_ctrl.ast = value
+
+    def _set_changed(self, changed):
+        for reg_name in self._changed ^ changed:
+            lbl = self._labels[reg_name]
+            lbl.setProperty('class', 'reg_viewer_label_changed' if reg_name in changed else 'reg_viewer_label')
+            # reapply the style
+            lbl.style().unpolish(lbl)
+            lbl.style().polish(lbl)
+        self._changed = changed
+
     def _init_widgets(self):
         if self._state.am_none():
             return
@@ -84,26 +177,29 @@ class QRegisterViewer(QFrame):
         area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         area.setWidgetResizable(True)
 
-        regs = self.ARCH_REGISTERS[self._state.arch.name]
+        regs = self._arch_registers()
 
         # common ones
         common_regs = regs['common']
-
-        for reg_name in common_regs:
-            sublayout = QHBoxLayout()
-
-            lbl_reg_name = QLabel(self)
-            lbl_reg_name.setProperty('class', 'reg_viewer_label')
-            lbl_reg_name.setText(reg_name)
-            lbl_reg_name.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            sublayout.addWidget(lbl_reg_name)
-
-            sublayout.addSpacing(10)
-            reg_value = QASTViewer(None, parent=self, workspace=self.workspace)
-            self._registers[reg_name] = reg_value
-            sublayout.addWidget(reg_value)
-
-            layout.addLayout(sublayout)
+        self._init_register_widgets(layout, common_regs)
+
+        # vector registers are only loaded when they are shown
+        vector_regs = regs.get('vector', [ ])
+        if vector_regs:
+            chk_vector = QCheckBox("Vector registers")
+            chk_vector.setChecked(self._show_vector)
+            chk_vector.toggled.connect(self._on_vector_toggled)
+            layout.addWidget(chk_vector)
+
+            vector_layout = QVBoxLayout()
+            self._init_register_widgets(vector_layout, vector_regs)
+            vector_layout.setSpacing(0)
+            vector_layout.setContentsMargins(0, 0, 0, 0)
+
+            self._vector_container = QFrame()
+            self._vector_container.setLayout(vector_layout)
+            self._vector_container.setVisible(self._show_vector)
+            layout.addWidget(self._vector_container)
 
         layout.setSpacing(0)
         layout.addStretch(0)
@@ -123,8 +219,30 @@ class QRegisterViewer(QFrame):
         base_layout.addWidget(area)
         self.setLayout(base_layout)
 
+    def _init_register_widgets(self, layout, reg_names):
+        for reg_name in reg_names:
+            sublayout = QHBoxLayout()
+
+            lbl_reg_name = QLabel(self)
+            lbl_reg_name.setProperty('class', 'reg_viewer_label')
+            lbl_reg_name.setText(reg_name)
+            lbl_reg_name.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+            self._labels[reg_name] = lbl_reg_name
+            sublayout.addWidget(lbl_reg_name)
+
+            sublayout.addSpacing(10)
+            reg_value = QASTViewer(None, parent=self, workspace=self.workspace)
+            self._registers[reg_name] = reg_value
+            sublayout.addWidget(reg_value)
+
+            layout.addLayout(sublayout)
+
     def _watch_state(self, **kwargs):
         if not self._registers:
             self._init_widgets()
 
-        self.reload()
+        if self._registers:
+            # the displayed state is announced again when it has been modified in place, e.g., from the console, so its
+            # registers are loaded again. claripy ASTs are hash-consed, so only registers that changed are updated.
+            state = None if self._state.am_none() else self._state.am_obj
+            self.reload(force=state is not None and state is self._displayed_state)
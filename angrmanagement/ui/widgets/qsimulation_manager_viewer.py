@@ -17,7 +17,8 @@ class QSimulationManagerViewer(QTreeWidget):
 
     def refresh(self, **kwargs):
         if kwargs.get('src') != 'simgr_viewer':
-            self._init_widgets()
+            # exploration progress updates carry a snapshot of all stashes
+            self._init_widgets(stashes=kwargs.get('stashes', None))
 
     def current_state(self):
         item = self.currentItem()
@@ -40,13 +41,16 @@ class QSimulationManagerViewer(QTreeWidget):
                     continue
                 break
 
-    def _init_widgets(self):
+    def _init_widgets(self, stashes=None):
         self.clear()
 
         if self.simgr.am_none():
             return
 
-        for stash_name, stash in self.simgr.stashes.items():
+        if stashes is None:
+            stashes = self.simgr.stashes
+
+        for stash_name, stash in stashes.items():
             if not stash and stash_name not in ('active', 'deadended', 'avoided'):
                 continue
 
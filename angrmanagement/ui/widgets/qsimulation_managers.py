@@ -201,7 +201,7 @@ class QSimulationManagers(QFrame):
             self.state.am_event(src='clicked')
 
     def _watch_simgr(self, **kwargs):
-        if kwargs.get('src') in ('clicked', 'filter_actives'):
+        if kwargs.get('src') in ('clicked', 'filter_actives', 'explore_progress'):
             return
         elif kwargs.get('src') == 'job_done' and kwargs.get('job') == 'step':
             self._filter_actives(self.simgr)
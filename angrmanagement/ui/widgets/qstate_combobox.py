@@ -8,6 +8,21 @@ class QStateComboBox(QComboBox):
         self.allow_none = allow_none
         self._init_items()
 
+    def reload(self):
+        """
+        Repopulate the list of states, keeping the current selection if the state still exists.
+
+        :return: None
+        """
+
+        state = self.state
+        self.clear()
+        self._init_items()
+        for idx in range(self.count()):
+            if self.itemData(idx) is state:
+                self.setCurrentIndex(idx)
+                break
+
     def _init_items(self):
         if self.allow_none:
             self.addItem('<None>', None)
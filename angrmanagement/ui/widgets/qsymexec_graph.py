@@ -1,11 +1,12 @@
 import logging
 
-from PySide2.QtGui import QPainter, QColor, QPen, QBrush
+import networkx
 from PySide2.QtWidgets import QGraphicsView
 from PySide2.QtCore import QPoint, Qt, QPointF, QRectF
 
-from ...utils.graph_layouter import GraphLayouter
+from ...utils.tree_layouter import TreeLayouter
 from .qgraph import QZoomableDraggableGraphicsView
+from .qgraph_arrow import QGraphArrow
 
 l = logging.getLogger('ui.widgets.qpg_graph')
 
@@ -23,7 +24,8 @@ class QSymExecGraph(QZoomableDraggableGraphicsView):
 
         self._graph = None
         self.blocks = set()
-        self._edges = []
+        self._arrows = { }  # maps each block to the QGraphArrow pointing to it
+        self._layouter = TreeLayouter()
 
         self.state.am_subscribe(self._watch_state)
 
@@ -38,50 +40,117 @@ class QSymExecGraph(QZoomableDraggableGraphicsView):
             self.reload()
 
     def reload(self):
-        self.request_relayout()
-
-    def request_relayout(self):
         self._reset_scene()
+        self.blocks.clear()
+        self._arrows.clear()
+        self._layouter.clear()
         if self.graph is None:
             return
 
-        # remove all edges
-        scene = self.scene()
-        for p in self._edge_paths:
-            scene.removeItem(p)
+        # parents must be added before their children
+        for node in networkx.topological_sort(self.graph):
+            predecessors = list(self.graph.predecessors(node))
+            self._add_block(node, predecessors[0] if predecessors else None)
 
-        # remove all nodes
-        self.blocks.clear()
-        #self.remove_all_children()
-        self._edge_paths = []
+        self.request_relayout(reset_view=True)
 
-        node_sizes = {}
-        for node in self.graph.nodes():
-            self.blocks.add(node)
-            node_sizes[node] = (node.width, node.height)
-        gl = GraphLayouter(self.graph, node_sizes, node_compare_key=lambda n: 0)
+    def add_block(self, block, parent=None):
+        """
+        Add a new block to the tree.
 
-        self._edges = gl.edges
+        :param QStateBlock block:   The block to add.
+        :param QStateBlock parent:  The parent block, or None if the new block is a root.
+        :return:                    None
+        """
 
-        min_x, max_x, min_y, max_y = 0, 0, 0, 0
+        self.graph.add_node(block)
+        if parent is not None:
+            self.graph.add_edge(parent, block)
+        self._add_block(block, parent)
 
-        scene = self.scene()
-        for node, (x, y) in gl.node_coordinates.items():
-            scene.addItem(node)
-            node.setPos(x, y)
-            min_x = min(min_x, node.x())
-            max_x = max(max_x, node.x() + node.width)
-            min_y = min(min_y, node.y())
-            max_y = max(max_y, node.y() + node.height)
+    def replace_block(self, old_block, new_block):
+        """
+        Replace a block in the tree with a new block, keeping its parent and children.
 
-        min_x -= self.LEFT_PADDING
-        max_x += self.LEFT_PADDING
-        min_y -= self.TOP_PADDING
-        max_y += self.TOP_PADDING
-        width = (max_x - min_x) + 2 * self.LEFT_PADDING
-        height = (max_y - min_y) + 2 * self.TOP_PADDING
+        :param QStateBlock old_block:   The block to replace.
+        :param QStateBlock new_block:   The new block.
+        :return:                        None
+        """
 
-        self._reset_view()
+        self.graph.add_node(new_block)
+        for predecessor in self.graph.predecessors(old_block):
+            self.graph.add_edge(predecessor, new_block)
+        for successor in self.graph.successors(old_block):
+            self.graph.add_edge(new_block, successor)
+        self.graph.remove_node(old_block)
+
+        # the new block takes over the position, the arrows, and the children of the old block
+        self.blocks.add(new_block)
+        parent_item = old_block.parentItem()
+        if parent_item is None:
+            self.scene().addItem(new_block)
+        else:
+            new_block.setParentItem(parent_item)
+        new_block.setPos(old_block.pos())
+        for child in self._layouter.children_of(old_block):
+            child.setParentItem(new_block)
+            arrow = self._arrows.get(child, None)
+            if arrow is not None:
+                arrow.setParentItem(new_block)
+        if old_block in self._arrows:
+            self._arrows[new_block] = self._arrows.pop(old_block)
+
+        self.blocks.discard(old_block)
+        self.scene().removeItem(old_block)
+        self._layouter.replace_node(old_block, new_block, (new_block.width, new_block.height))
+
+    def remove_block(self, block):
+        """
+        Remove a block and all of its descendants from the tree.
+
+        :param QStateBlock block:   The block to remove.
+        :return:                    None
+        """
+
+        # descendants are child items of the block, and they leave the scene together with it
+        removed = self._layouter.remove_node(block)
+        self._remove_items(block)
+        for node in removed:
+            self.graph.remove_node(node)
+            self.blocks.discard(node)
+            self._arrows.pop(node, None)
+
+    def request_relayout(self, reset_view=False):
+        """
+        Update the position of all blocks and arrows that are affected by changes since the last layout.
+
+        Each block is a child item of its parent block, and each arrow is a child item of the block it starts from.
+        Therefore only blocks whose position relative to their parent has changed are touched.
+
+        :param bool reset_view: Whether to center the view on the graph afterwards.
+        :return:                None
+        """
+
+        moved = self._layouter.layout()
+
+        coordinates = self._layouter.node_coordinates
+        edges = self._layouter.edges
+
+        for node in moved:
+            parent = self._layouter.parent_of(node)
+            if node.parentItem() is not parent:
+                node.setParentItem(parent)
+            node.setPos(*coordinates[node])
+
+            self._remove_arrow(node)
+            edge = edges.get(node, None)
+            if edge is not None:
+                arrow = QGraphArrow(edge, parent=parent)
+                arrow.setPos(QPointF(*edge.coordinates[0]))
+                self._arrows[node] = arrow
+
+        if reset_view:
+            self._reset_view()
 
     #
     # Event handlers
@@ -119,38 +188,23 @@ class QSymExecGraph(QZoomableDraggableGraphicsView):
         ibr = self.scene().itemsBoundingRect()
         return ibr.center()
 
+    def _add_block(self, block, parent):
+        self.blocks.add(block)
+        self.scene().addItem(block)
+        self._layouter.add_node(block, (block.width, block.height), parent=parent)
+
+    def _remove_items(self, block):
+        self.blocks.discard(block)
+        self._remove_arrow(block)
+        self.scene().removeItem(block)
+
+    def _remove_arrow(self, block):
+        arrow = self._arrows.pop(block, None)
+        if arrow is not None and arrow.scene() is not None:
+            arrow.scene().removeItem(arrow)
+
     def _block_from_state(self, state):
         for block in self.blocks:
             if block.get_state() == state:
                 return block
         return None
-
-    def _draw_edges(self, painter, topleft_point, bottomright_point):
-        for edge in self._edges:
-            edge_coords = edge.coordinates
-
-            color = QColor(0x70, 0x70, 0x70)
-            pen = QPen(color)
-            pen.setWidth(1.5)
-            painter.setPen(pen)
-
-            for from_, to_ in zip(edge_coords, edge_coords[1:]):
-                start_point = QPointF(*from_)
-                end_point = QPointF(*to_)
-                # optimization: don't draw edges that are outside of the current scope
-                if (start_point.x() > bottomright_point.x() or start_point.y() > bottomright_point.y()) and \
-                        (end_point.x() > bottomright_point.x() or end_point.y() > bottomright_point.y()):
-                    continue
-                elif (start_point.x() < topleft_point.x() or start_point.y() < topleft_point.y()) and \
-                        (end_point.x() < topleft_point.x() or end_point.y() < topleft_point.y()):
-                    continue
-                painter.drawPolyline((start_point, end_point))
-
-            # arrow
-            # end_point = self.mapToScene(*edges[-1])
-            end_point = (edge_coords[-1][0], edge_coords[-1][1])
-            arrow = [QPointF(end_point[0] - 3, end_point[1]), QPointF(end_point[0] + 3, end_point[1]),
-                     QPointF(end_point[0], end_point[1] + 6)]
-            brush = QBrush(color)
-            painter.setBrush(brush)
-            painter.drawPolygon(arrow)
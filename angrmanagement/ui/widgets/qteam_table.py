@@ -1,21 +1,26 @@
 
+import time
+
 from PySide2.QtWidgets import QTableWidget, QTableWidgetItem, QAbstractItemView, QMenu, QHeaderView
 from PySide2.QtCore import Qt, QItemSelectionModel
 
 
 class QUserItem:
-    def __init__(self, user):
+    def __init__(self, user, last_update=None):
         super().__init__()
 
         self.user = user
+        self.last_update = last_update
 
     def widgets(self):
 
         u = self.user
 
+        last_update = "" if self.last_update is None else time.strftime("%H:%M:%S", time.localtime(self.last_update))
+
         widgets = [
             QTableWidgetItem(u.name),
-            QTableWidgetItem(),
+            QTableWidgetItem(last_update),
             QTableWidgetItem(),
         ]
 
@@ -45,6 +50,7 @@ class QTeamTable(QTableWidget):
         self.verticalHeader().setVisible(False)
         self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
+        self.instance = instance
         self.items = [ ]
 
     def reload(self):
@@ -75,14 +81,33 @@ class QTeamTable(QTableWidget):
                 self.selectRow(i)
                 break
 
-    def update_users(self, users):
+    def update_users(self, users, changed_users=None):
+        """
+        Update the table. If the same users are listed as before, only rows of changed users are updated.
+
+        :param list users:          All users.
+        :param set changed_users:   Names of users whose information has changed, or None if all users have changed.
+        :return:                    None
+        """
+
+        sync = self.instance.sync
+
+        if changed_users is not None and [ item.user.name for item in self.items ] == [ u.name for u in users ]:
+            for idx, u in enumerate(users):
+                if u.name not in changed_users:
+                    continue
+                item = QUserItem(u, last_update=sync.user_update_timestamp(u.name))
+                self.items[idx] = item
+                for i, it in enumerate(item.widgets()):
+                    self.setItem(idx, i, it)
+            return
 
         selected_user = self.selected_user()
 
         self.items.clear()
 
         for u in users:
-            self.items.append(QUserItem(u))
+            self.items.append(QUserItem(u, last_update=sync.user_update_timestamp(u.name)))
 
         self.reload()
 
@@ -1,6 +1,7 @@
 from PySide2.QtWidgets import QTabWidget
 
 from .qmemory_viewer import QMemoryViewer
+from .qmemory_diff_viewer import QMemoryDiffViewer
 from .qregister_viewer import QRegisterViewer
 from .qvextemps_viewer import QVEXTempsViewer
 
@@ -13,6 +14,7 @@ class StateInspector(QTabWidget):
 
         self._register_viewer = None  # type: QRegisterViewer
         self._memory_viewer = None  # type: QMemoryViewer
+        self._memory_diff_viewer = None  # type: QMemoryDiffViewer
         self._vextemps_viewer = None  # type: QVEXTempsViewer
 
         self._init_widgets()
@@ -24,5 +26,14 @@ class StateInspector(QTabWidget):
         self._memory_viewer = QMemoryViewer(self._state, self, self.workspace)
         self.addTab(self._memory_viewer, "Memory")
 
+        self._memory_diff_viewer = QMemoryDiffViewer(self._state, self, self.workspace,
+                                                     diff_callback=self._memory_viewer.highlight_diff,
+                                                     range_callback=self._on_diff_range_selected)
+        self.addTab(self._memory_diff_viewer, "Memory Diff")
+
         self._vextemps_viewer = QVEXTempsViewer(self._state, self, self.workspace)
         self.addTab(self._vextemps_viewer, "Temps")
+
+    def _on_diff_range_selected(self, addr):
+        self._memory_viewer.jump_to(addr)
+        self.setCurrentWidget(self._memory_viewer)
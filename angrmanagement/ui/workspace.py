@@ -12,7 +12,8 @@ from angr import StateHierarchy
 from ..data.instance import ObjectContainer
 from ..data.jobs import CodeTaggingJob
 from ..config import Conf
-from .views import (FunctionsView, DisassemblyView, SymexecView, StatesView, StringsView, RecoView, ConsoleView, CodeView, InteractionView, SyncView, PatchesView)
+from .views import (FunctionsView, DisassemblyView, SymexecView, StatesView, StringsView, RecoView, ConsoleView, CodeView, InteractionView, SyncView, PatchesView,
+                    JobsView, ProfilerView, MemoryUsageView)
 
 from .widgets.qsmart_dockwidget import QSmartDockWidget
 from .view_manager import ViewManager
@@ -30,6 +31,7 @@ class Workspace:
         self.is_split = False
         self.split_tab_id = 0
         instance.workspace = self
+        self._code_tagging_job = None  # type: CodeTaggingJob
 
         self.view_manager = ViewManager(self)
 
@@ -50,6 +52,9 @@ class Workspace:
             PatchesView(self, 'center'),
             InteractionView(self, 'center'),
             ConsoleView(self, 'bottom'),
+            JobsView(self, 'bottom'),
+            ProfilerView(self, 'bottom'),
+            MemoryUsageView(self, 'bottom'),
         ]
 
         if has_binsync():
@@ -80,6 +85,8 @@ class Workspace:
 
     def on_function_selected(self, func):
 
+        # a no-op unless the CFG is being generated in demand-driven mode
+        self.instance.focus_cfg(func.addr)
         self._get_or_create_disassembly_view().display_function(func)
 
     def on_cfg_generated(self):
@@ -93,19 +100,43 @@ class Workspace:
             if the_func is not None:
                 self.on_function_selected(the_func)
 
-        self.instance.add_job(
-            CodeTaggingJob(
-                on_finish=self.on_function_tagged,
-            )
+        # tags that a running job has yet to compute may be for functions that are gone
+        self.cancel_code_tagging()
+        self._code_tagging_job = CodeTaggingJob(
+            on_finish=self.on_function_tagged,
         )
+        self.instance.add_job(self._code_tagging_job)
 
     def on_function_tagged(self):
-        pass
+        # a job that was cancelled may finish after its replacement was added
+        if self._code_tagging_job not in self.instance.jobs:
+            self._code_tagging_job = None
 
     #
     # Public methods
     #
 
+    def cancel_code_tagging(self):
+        """
+        Cancel the running code tagging job, if there is one. Tags that it has computed are kept; tag_functions()
+        resumes with the functions that are left.
+
+        :return:    None
+        """
+        if self._code_tagging_job is not None:
+            self._code_tagging_job.cancel()
+            self._code_tagging_job = None
+
+    def tag_functions(self):
+        """
+        Tag the functions that have not been tagged yet, or that have changed since they were tagged.
+
+        :return:    None
+        """
+        if self._code_tagging_job is None:
+            self._code_tagging_job = CodeTaggingJob(on_finish=self.on_function_tagged)
+            self.instance.add_job(self._code_tagging_job)
+
     def split_view(self):
         """
         Split the view into two panes and shift
@@ -343,3 +374,13 @@ class Workspace:
         dv = self.view_manager.first_view_in_category('disassembly')  # type: DisassemblyView
         if dv:
             dv.set_comment_callback = callback
+
+    def add_feature_map_layer(self, layer):
+        dv = self.view_manager.first_view_in_category('disassembly')  # type: DisassemblyView
+        if dv:
+            dv.feature_map.add_layer(layer)
+
+    def remove_feature_map_layer(self, layer):
+        dv = self.view_manager.first_view_in_category('disassembly')  # type: DisassemblyView
+        if dv:
+            dv.feature_map.remove_layer(layer)
@@ -1,7 +1,8 @@
 
 import itertools
+from array import array
 
-from .block_objects import Variables, PhiVariable, Label
+from .block_objects import Variables, PhiVariable, Label, FunctionBlockObjects
 
 
 def locate_function(inst, addr):
@@ -14,6 +15,12 @@ def locate_function(inst, addr):
     :rtype: angr.knowledge_plugins.Function or None
     """
 
+    # functions that were recovered around an address are more complete than those of a CFG that is being generated
+    for function in list(inst.cfg_focus.am_obj.values()):
+        for block in function.blocks:
+            if block.addr <= addr < block.addr + block.size:
+                return function
+
     if inst.cfg is None:
         return None
 
@@ -47,7 +54,7 @@ def get_label_text(addr, kb, function=None):
         return "loc_%#x:" % addr
 
 
-def get_block_objects(disasm, nodes, func_addr):
+def get_block_objects(disasm, nodes, func_addr, table=None):
     """
     Get a list of objects to be displayed in a block in disassembly view. Objects may include instructions, stack
     variables, and labels.
@@ -55,10 +62,15 @@ def get_block_objects(disasm, nodes, func_addr):
     :param angr.analyses.Disassembly disasm:    The angr Disassembly Analysis instance.
     :param iterable nodes:                      A collection of CFG nodes.
     :param int func_addr:                       The function address of the current block.
+    :param FunctionBlockObjects table:          Objects of the function, as built by build_function_block_objects(). If
+                                                it is None, they are looked up in the knowledge base.
     :return:                                    a list of Instruction objects and label names (strings).
     :rtype:                                     list
     """
 
+    if table is not None:
+        return _get_block_objects_from_table(disasm, nodes, func_addr, table)
+
     block_addrs = [node.addr for node in nodes]
     block_addr = block_addrs[0]
     insn_addrs = list(itertools.chain.from_iterable(disasm.block_to_insn_addrs[addr] for addr in block_addrs))
@@ -95,6 +107,80 @@ def get_block_objects(disasm, nodes, func_addr):
     return lst
 
 
+def build_function_block_objects(disasm, func_addr):
+    """
+    Collect the stack variables, phi variables, and labels of all blocks in a function, so that get_block_objects()
+    does not have to query the variable manager and the labels for every block.
+
+    :param angr.analyses.Disassembly disasm:    The angr Disassembly Analysis instance of the function.
+    :param int func_addr:                       The function address.
+    :return:                                    The objects of the function.
+    :rtype:                                     FunctionBlockObjects
+    """
+
+    kb = disasm.kb
+    variable_manager = kb.variables[func_addr]
+
+    variables = variable_manager.get_variables(sort='stack', collapse_same_ident=False)
+    stack_variables = Variables(sorted(variables, key=lambda v: v.offset))
+
+    phi_variables = { }
+    labels = { }
+    block_labels = { }
+    insn_addrs = [ ]
+    for block_addr, block_insn_addrs in disasm.block_to_insn_addrs.items():
+        phis = variable_manager.get_phi_variables(block_addr)
+        if phis:
+            phi_variables[block_addr] = [ PhiVariable(phi, variables) for phi, variables in phis.items() ]
+        block_labels[block_addr] = get_label_text(block_addr, kb)
+        for insn_addr in block_insn_addrs:
+            if insn_addr in kb.labels:
+                labels[insn_addr] = kb.labels[insn_addr] + ":"
+        insn_addrs.extend(block_insn_addrs)
+
+    return FunctionBlockObjects(func_addr, stack_variables, phi_variables, labels, block_labels,
+                                array('Q', sorted(insn_addrs)))
+
+
+def _get_block_objects_from_table(disasm, nodes, func_addr, table):
+    block_addrs = [node.addr for node in nodes]
+    if any(addr not in table.block_labels for addr in block_addrs):
+        # the table has been built from a disassembly that does not have all of these blocks
+        return get_block_objects(disasm, nodes, func_addr)
+    block_addr = block_addrs[0]
+    instructions = disasm.raw_result_map['instructions']
+
+    lst = [ ]
+
+    # stack variables
+    if block_addr == func_addr:
+        lst.append(table.stack_variables)
+
+    # phi variables
+    lst.extend(table.phi_variables.get(block_addr, ()))
+
+    # instructions and labels
+    labels = table.labels
+    for addr in block_addrs:
+        for insn_addr in disasm.block_to_insn_addrs[addr]:
+            label = labels.get(insn_addr, None)
+            if label is None and not table.contains(insn_addr) and insn_addr in disasm.kb.labels:
+                label = disasm.kb.labels[insn_addr] + ":"
+            if label is not None:
+                lst.append((insn_addr, label))
+            lst.append(instructions[insn_addr])
+
+    # initial label, if there is any
+    if lst and not isinstance(lst[0], tuple):
+        # the first element should be a label
+        label = table.block_labels.get(block_addr, None)
+        if label is None:
+            label = get_label_text(block_addr, disasm.kb)
+        lst.insert(0, Label(block_addr, label))
+
+    return lst
+
+
 def get_out_branches(supernode):
     """
     Get a list of descriptors of branches going out from the supernode.
@@ -1,3 +1,4 @@
+import bisect
 
 
 class Variables:
@@ -24,3 +25,33 @@ class Label:
     def __init__(self, addr, text):
         self.addr = addr
         self.text = text
+
+
+class FunctionBlockObjects:
+    """
+    The objects that are displayed in the blocks of a function besides instructions, collected for all blocks of the
+    function at once.
+    """
+
+    __slots__ = ['func_addr', 'stack_variables', 'phi_variables', 'labels', 'block_labels', 'insn_addrs']
+
+    def __init__(self, func_addr, stack_variables, phi_variables, labels, block_labels, insn_addrs):
+        self.func_addr = func_addr
+        self.stack_variables = stack_variables  # Variables, displayed in the entry block
+        self.phi_variables = phi_variables  # block address -> list of PhiVariable
+        self.labels = labels  # instruction address -> label text, for instructions that have a label in the kb
+        self.block_labels = block_labels  # block address -> label text
+        self.insn_addrs = insn_addrs  # sorted addresses of all instructions
+
+    def contains(self, addr):
+        """
+        Check if an address is a block or an instruction of the function.
+
+        :param int addr:    The address.
+        :rtype:             bool
+        """
+
+        if addr in self.block_labels:
+            return True
+        idx = bisect.bisect_left(self.insn_addrs, addr)
+        return idx < len(self.insn_addrs) and self.insn_addrs[idx] == addr
@@ -1,4 +1,5 @@
 
+import weakref
 import itertools
 from collections import defaultdict
 
@@ -23,154 +24,356 @@ def to_supergraph(transition_graph):
     :rtype networkx.DiGraph
     """
 
-    # make a copy of the graph
-    transition_graph = networkx.DiGraph(transition_graph)
+    return SupergraphBuilder().update(transition_graph)
 
-    # remove all edges that transitions to outside
-    for src, dst, data in list(transition_graph.edges(data=True)):
-        if data['type'] == 'transition' and data.get('outside', False) is True:
-            transition_graph.remove_edge(src, dst)
-        if transition_graph.in_degree(dst) == 0:
-            transition_graph.remove_node(dst)
 
-    edges_to_shrink = set()
+# transition graph -> SupergraphBuilder
+_supergraph_builders = weakref.WeakKeyDictionary()
 
-    # Find all edges to remove in the super graph
-    for src in transition_graph.nodes():
-        edges = transition_graph[src]
 
-        # there are two types of edges we want to remove:
-        # - call or fakerets, since we do not want blocks to break at calls
-        # - boring jumps that directly transfer the control to the block immediately after the current block. this is
-        #   usually caused by how VEX breaks down basic blocks, which happens very often in MIPS
+def get_supergraph(function):
+    """
+    Get the super transition graph of a function. The graph is cached until the transition graph of the function
+    changes. If blocks and edges have only been added to the transition graph since, e.g., by a CFG that is still being
+    generated, the cached graph is patched instead of rebuilt.
 
+    Graphs that have been returned before are never modified.
 
+    :param angr.knowledge_plugins.Function function: The function.
+    :return: The super transition graph.
+    :rtype: networkx.DiGraph
+    """
 
-        if len(edges) == 1 and src.addr + src.size == next(iter(edges.keys())).addr:
-            dst = next(iter(edges.keys()))
-            dst_in_edges = transition_graph.in_edges(dst)
-            if len(dst_in_edges) == 1:
-                edges_to_shrink.add((src, dst))
-                continue
+    transition_graph = function.transition_graph
+    builder = _supergraph_builders.get(transition_graph, None)
+    if builder is None:
+        builder = _supergraph_builders[transition_graph] = SupergraphBuilder()
+    return builder.update(transition_graph)
 
-        if any(iter('type' in data and data['type'] not in ('fake_return', 'call') for data in edges.values())):
-            continue
 
-        for dst, data in edges.items():
-            if isinstance(dst, Function):
-                continue
-            if 'type' in data and data['type'] == 'fake_return':
-                if all(iter('type' in data and data['type'] in ('fake_return', 'return_from_call')
-                            for _, _, data in transition_graph.in_edges(dst, data=True))):
-                    edges_to_shrink.add((src, dst))
-                break
+def _is_outside_transition(data):
+    return data.get('type', None) == 'transition' and data.get('outside', False) is True
 
-    # Create the super graph
-    super_graph = networkx.DiGraph()
 
-    supernodes_map = {}
+def _edge_keys(tg):
+    """
+    Map the edges of a transition graph, as keys of (src, dst), to their types and whether they are transitions from
+    outside the function. angr may change both on an existing edge, which changes neither the number of nodes nor of
+    edges.
+    """
 
-    function_nodes = set()  # it will be traversed after all other nodes are added into the supergraph
+    return dict(((_node_key(src), _node_key(dst)), (data.get('type', None), _is_outside_transition(data)))
+                for src, dst, data in tg.edges(data=True))
 
-    for node in transition_graph.nodes():
 
-        if isinstance(node, Function):
-            function_nodes.add(node)
-            # don't put functions into the supergraph
+def _removed_nodes(tg):
+    """
+    Find the nodes of a transition graph that are not part of its super graph. Transitions from outside the function
+    are dropped, and so is every node that no edge leads to afterwards, together with its out-edges. Edges are visited
+    in order, so the removal cascades to nodes that are only reachable through removed nodes that are visited before
+    them.
+
+    :param networkx.DiGraph tg: The transition graph.
+    :return:                    The removed nodes, without functions.
+    :rtype:                     set
+    """
+
+    in_degree = dict((node, len(pred)) for node, pred in tg.pred.items())
+    removed = set()
+    dropped = set()  # transitions from outside the function
+    for src, dst, data in tg.edges(data=True):
+        if dst in removed:
             continue
+        if src not in removed and _is_outside_transition(data):
+            dropped.add((src, dst))
+            in_degree[dst] -= 1
+        if in_degree[dst] == 0:
+            removed.add(dst)
+            for succ in tg.succ[dst]:
+                if succ not in removed and (dst, succ) not in dropped:
+                    in_degree[succ] -= 1
+    return set(node for node in removed if not isinstance(node, Function))
 
-        dests_and_data = transition_graph[node]
 
-        # make a super node
-        if node in supernodes_map:
-            src_supernode = supernodes_map[node]
-        else:
-            src_supernode = SuperCFGNode.from_cfgnode(node)
-            supernodes_map[node] = src_supernode
-            # insert it into the graph
-            super_graph.add_node(src_supernode)
+def _node_key(node):
+    # functions are identified by their addresses, so that the builder does not keep them alive. a function may be a
+    # node of its own transition graph.
+    return ('function', node.addr) if isinstance(node, Function) else node
 
-        if not dests_and_data:
-            # might be an isolated node
-            continue
 
-        for dst, data in dests_and_data.items():
+class SupergraphBuilder:
+    """
+    Converts the transition graph of a function to a super transition graph, and keeps the result up to date.
 
-            edge = (node, dst)
+    Blocks that are merged into the same super node are tracked with a union-find structure, so a conversion takes time
+    linear in the number of edges. As long as blocks and edges are only added to the transition graph, update() only
+    regroups the blocks of the super nodes that the new edges touch, and keeps the rest of the super graph. If blocks or
+    edges are removed, or if an edge changes whether a block is reachable from inside the function, the super graph is
+    rebuilt.
+    """
+
+    def __init__(self):
+        self._transition_graph = None  # weak reference
+        self._supergraph = None
 
-            if edge in edges_to_shrink:
+        self._nodes = set()  # nodes of the transition graph, as keys
+        self._edges = { }  # edges of the transition graph, as keys of (src, dst) -> (type, whether from outside)
+        self._removed = set()  # nodes that are only reachable from outside the function, see _removed_nodes()
+        self._shrink = { }  # node -> the node that is merged into the same super node through their edge
 
-                if dst in supernodes_map:
-                    dst_supernode = supernodes_map[dst]
-                else:
-                    dst_supernode = None
+        # union-find of nodes in the same super node
+        self._parent = { }
+        self._members = { }  # root -> nodes
+        self._supernodes = { }  # root -> SuperCFGNode
 
-                src_supernode.insert_cfgnode(dst)
+    #
+    # Public methods
+    #
 
-                # update supernodes map
-                supernodes_map[dst] = src_supernode
+    def update(self, transition_graph):
+        """
+        Bring the super graph up to date with the transition graph.
 
-                # merge the other supernode
-                if dst_supernode is not None:
-                    src_supernode.merge(dst_supernode)
+        :param networkx.DiGraph transition_graph:   The transition graph.
+        :return:                                    The super transition graph.
+        :rtype:                                     networkx.DiGraph
+        """
 
-                    for src in dst_supernode.cfg_nodes:
-                        supernodes_map[src] = src_supernode
+        edges = _edge_keys(transition_graph)
+        if self._transition_graph is not None and self._transition_graph() is transition_graph:
+            if transition_graph.number_of_nodes() == len(self._nodes) and edges == self._edges:
+                return self._supergraph
+            if not self._patch(transition_graph, edges):
+                self._build(transition_graph, edges)
+        else:
+            self._build(transition_graph, edges)
+
+        self._transition_graph = weakref.ref(transition_graph)
+        return self._supergraph
+
+    #
+    # Private methods
+    #
+
+    def _find(self, node):
+        parent = self._parent
+        root = node
+        while parent[root] is not root:
+            root = parent[root]
+        # path compression
+        while parent[node] is not root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a is b:
+            return a
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a].extend(self._members.pop(b))
+        return a
+
+    def _add_to_union_find(self, node):
+        self._parent[node] = node
+        self._members[node] = [ node ]
+
+    def _kept_in_edges(self, tg, node):
+        return [ data for src, data in tg.pred[node].items()
+                 if not _is_outside_transition(data) and src not in self._removed ]
+
+    def _shrink_target(self, tg, src):
+        """
+        Find the node that src is merged with, if any.
 
-                    # link all out edges of dst_supernode to src_supernode
-                    for dst_, data_ in super_graph[dst_supernode].items():
-                        super_graph.add_edge(src_supernode, dst_, **data_)
+        There are two types of edges we want to remove:
+        - call or fakerets, since we do not want blocks to break at calls
+        - boring jumps that directly transfer the control to the block immediately after the current block. this is
+          usually caused by how VEX breaks down basic blocks, which happens very often in MIPS
+        """
 
-                    # link all in edges of dst_supernode to src_supernode
-                    for src_, _, data_ in super_graph.in_edges([dst_supernode], data=True):
-                        super_graph.add_edge(src_, src_supernode, **data_)
+        edges = dict((dst, data) for dst, data in tg.succ[src].items() if not _is_outside_transition(data))
 
-                        if 'type' in data_ and data_['type'] == 'transition':
-                            if not ('ins_addr' in data_ and 'stmt_idx' in data_):
-                                # this is a hack to work around the issue in Function.normalize() where ins_addr and
-                                # stmt_idx weren't properly set onto edges
-                                continue
-                            src_supernode.register_out_branch(data_['ins_addr'], data_['stmt_idx'], data_['type'],
-                                                              dst_supernode.addr
-                                                              )
+        if len(edges) == 1:
+            dst = next(iter(edges.keys()))
+            if not isinstance(dst, Function) and src.addr + src.size == dst.addr and \
+                    len(self._kept_in_edges(tg, dst)) == 1:
+                return dst
 
-                    super_graph.remove_node(dst_supernode)
+        if any('type' in data and data['type'] not in ('fake_return', 'call') for data in edges.values()):
+            return None
 
-            else:
-                if isinstance(dst, Function):
-                    # skip all functions
-                    continue
-
-                # make a super node
-                if dst in supernodes_map:
-                    dst_supernode = supernodes_map[dst]
-                else:
-                    dst_supernode = SuperCFGNode.from_cfgnode(dst)
-                    supernodes_map[dst] = dst_supernode
-
-                super_graph.add_edge(src_supernode, dst_supernode, **data)
-
-                if 'type' in data and data['type'] == 'transition':
-                    if not ('ins_addr' in data and 'stmt_idx' in data):
-                        # this is a hack to work around the issue in Function.normalize() where ins_addr and
-                        # stmt_idx weren't properly set onto edges
-                        continue
-                    src_supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'],
-                                                      dst_supernode.addr
-                                                      )
-
-    for node in function_nodes:
-        in_edges = transition_graph.in_edges(node, data=True)
-
-        for src, _, data in in_edges:
-            if not ('ins_addr' in data and 'stmt_idx' in data):
-                # this is a hack to work around the issue in Function.normalize() where ins_addr and
-                # stmt_idx weren't properly set onto edges
+        for dst, data in edges.items():
+            if isinstance(dst, Function):
                 continue
-            supernode = supernodes_map[src]
-            supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'], node.addr)
+            if 'type' in data and data['type'] == 'fake_return':
+                if all('type' in data_ and data_['type'] in ('fake_return', 'return_from_call')
+                       for data_ in self._kept_in_edges(tg, dst)):
+                    return dst
+                break
+
+        return None
+
+    def _add_edge(self, graph, src, dst, data, register=True):
+        """
+        Add an edge of the transition graph to the super graph, and register it as an out branch of the super node of src
+        if register is True.
+        """
+
+        if src in self._removed or isinstance(src, Function) or _is_outside_transition(data):
+            return
 
-    return super_graph
+        has_location = 'ins_addr' in data and 'stmt_idx' in data
+        src_supernode = self._supernodes[self._find(src)]
+
+        if isinstance(dst, Function):
+            # don't put functions into the supergraph
+            if has_location and register:
+                src_supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'], dst.addr)
+            return
+
+        if self._shrink.get(src, None) is dst:
+            return
+
+        dst_supernode = self._supernodes[self._find(dst)]
+        graph.add_edge(src_supernode, dst_supernode, **data)
+
+        if register and 'type' in data and data['type'] == 'transition':
+            if not has_location:
+                # this is a hack to work around the issue in Function.normalize() where ins_addr and stmt_idx weren't
+                # properly set onto edges
+                return
+            src_supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'], dst_supernode.addr)
+
+    def _build(self, tg, edges):
+        self._nodes = set(_node_key(node) for node in tg.nodes())
+        self._edges = edges
+        self._removed = _removed_nodes(tg)
+        self._shrink = { }
+        self._parent = { }
+        self._members = { }
+        self._supernodes = { }
+
+        nodes = [ node for node in tg.nodes() if not isinstance(node, Function) and node not in self._removed ]
+        for node in nodes:
+            self._add_to_union_find(node)
+
+        for src in nodes:
+            dst = self._shrink_target(tg, src)
+            if dst is not None:
+                self._shrink[src] = dst
+                self._union(src, dst)
+
+        graph = networkx.DiGraph()
+        for node in nodes:
+            root = self._find(node)
+            if root not in self._supernodes:
+                supernode = self._supernodes[root] = SuperCFGNode.from_cfgnodes(self._members[root])
+                graph.add_node(supernode)
+
+        for src, dst, data in tg.edges(data=True):
+            self._add_edge(graph, src, dst, data)
+
+        self._supergraph = graph
+
+    def _patch(self, tg, edges):
+        """
+        Add new nodes and edges of the transition graph to a copy of the super graph. Only the super nodes that the new
+        edges touch are regrouped; all other super nodes and the edges between them are kept.
+
+        :param networkx.DiGraph tg: The transition graph.
+        :param dict edges:          The edges of the transition graph, see _edge_keys().
+        :return:                    True if the super graph has been patched, False if it must be rebuilt instead.
+        :rtype:                     bool
+        """
+
+        for key, kind in self._edges.items():
+            if edges.get(key, None) != kind:
+                # the edge has been removed, its type has changed, or it now comes from outside the function or no
+                # longer does
+                return False
+
+        nodes = self._nodes
+        new_nodes = [ node for node in tg.nodes() if _node_key(node) not in nodes ]
+        if len(nodes) + len(new_nodes) != tg.number_of_nodes():
+            # nodes have been removed
+            return False
+        new_edges = [ (src, dst, data) for src, dst, data in tg.edges(data=True)
+                      if (_node_key(src), _node_key(dst)) not in self._edges ]
+
+        new_keys = [ _node_key(node) for node in new_nodes ]
+        new_nodes = [ node for node in new_nodes if not isinstance(node, Function) ]
+        new_node_set = set(new_nodes)
+
+        # removals cascade, so new edges may remove or bring back nodes anywhere in the graph
+        removed = _removed_nodes(tg)
+        if removed.difference(new_node_set) != self._removed:
+            return False
+        self._removed = removed
+        new_nodes = [ node for node in new_nodes if node not in removed ]
+
+        # where blocks are merged only depends on the out-edges of the source and the in-edges of the destination
+        affected = set(src for src, _, _ in new_edges)
+        for _, dst, _ in new_edges:
+            if not isinstance(dst, Function):
+                affected.update(tg.pred[dst])
+        affected.update(new_nodes)
+        touched = set(src for src, _, _ in new_edges)
+        shrink = { }
+        for src in affected:
+            if isinstance(src, Function) or src in self._removed:
+                continue
+            dst = self._shrink_target(tg, src)
+            old_dst = self._shrink.get(src, None)
+            if dst is not old_dst:
+                # the super nodes of both ends are regrouped. a lost merge splits a super node.
+                shrink[src] = dst
+                touched.add(src)
+                touched.add(dst if dst is not None else old_dst)
+        touched = [ node for node in touched
+                    if not isinstance(node, Function) and node not in self._removed and node not in new_node_set ]
+
+        # super nodes that change are replaced, so that graphs that have been returned before stay the same
+        stale_roots = set(self._find(node) for node in touched)
+        stale = [ self._supernodes.pop(root) for root in stale_roots ]
+        regrouped = [ node for root in stale_roots for node in self._members[root] ]
+        regrouped += new_nodes
+
+        for src, dst in shrink.items():
+            if dst is None:
+                del self._shrink[src]
+            else:
+                self._shrink[src] = dst
+        for node in regrouped:
+            self._add_to_union_find(node)
+        for src in regrouped:
+            dst = self._shrink.get(src, None)
+            if dst is not None:
+                self._union(src, dst)
+
+        dirty_roots = set(self._find(node) for node in regrouped)
+        for root in dirty_roots:
+            self._supernodes[root] = SuperCFGNode.from_cfgnodes(self._members[root])
+
+        graph = self._supergraph.copy()
+        graph.remove_nodes_from(stale)
+        for root in dirty_roots:
+            graph.add_node(self._supernodes[root])
+        # the edges of regrouped nodes are added again from the transition graph. out branches are only registered on
+        # the new super nodes; super nodes that are kept already have theirs, and their targets have not changed.
+        regrouped_set = set(regrouped)
+        for node in regrouped:
+            for dst, data in tg.succ[node].items():
+                self._add_edge(graph, node, dst, data)
+            for src, data in tg.pred[node].items():
+                if src not in regrouped_set:
+                    self._add_edge(graph, src, node, data, register=False)
+
+        nodes.update(new_keys)
+        self._edges = edges
+        self._supergraph = graph
+        return True
 
 
 class OutBranch:
@@ -241,6 +444,25 @@ class SuperCFGNode(object):
 
         return s
 
+    @classmethod
+    def from_cfgnodes(cls, cfg_nodes):
+        """
+        Create a supernode out of CFG nodes, in the order of their addresses. Of nodes at the same address, only the
+        first one is kept.
+
+        :param list cfg_nodes:  The CFG nodes.
+        :return:                The supernode.
+        :rtype:                 SuperCFGNode
+        """
+
+        nodes = { }
+        for node in cfg_nodes:
+            nodes.setdefault(node.addr, node)
+        s = cls(min(nodes))
+        s.cfg_nodes = [ nodes[addr] for addr in sorted(nodes) ]
+
+        return s
+
     def insert_cfgnode(self, cfg_node):
         # TODO: Make it binary search/insertion
         for i, n in enumerate(self.cfg_nodes):
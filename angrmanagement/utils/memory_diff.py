@@ -0,0 +1,136 @@
+import logging
+
+l = logging.getLogger('utils.memory_diff')
+
+
+class MemoryDiff(object):
+    """
+    The set of bytes that differ between the memory of two states.
+
+    Changed bytes are stored as one bitmap per changed page, so that looking up whether an address has changed is
+    cheap enough to be done for every byte that is painted.
+    """
+
+    __slots__ = ('page_size', '_pages', )
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self._pages = { }  # maps page addresses to bytearrays, where each non-zero byte marks a changed byte
+
+    def __len__(self):
+        return sum(len(bitmap) - bitmap.count(0) for bitmap in self._pages.values())
+
+    @property
+    def pages(self):
+        """
+        Addresses of all pages that contain at least one changed byte, in ascending order.
+        """
+        return sorted(self._pages)
+
+    def is_changed(self, addr):
+        offset = addr % self.page_size
+        bitmap = self._pages.get(addr - offset, None)
+        return bitmap is not None and bitmap[offset] != 0
+
+    def ranges(self):
+        """
+        Iterate over all changed bytes as contiguous ranges. Ranges that span several pages are merged.
+
+        :return:    A generator of (start, end) tuples, where end is exclusive.
+        """
+
+        start, end = None, None
+        for page_addr in self.pages:
+            bitmap = self._pages[page_addr]
+            pos = bitmap.find(1)
+            while pos != -1:
+                stop = bitmap.find(0, pos)
+                if stop == -1:
+                    stop = len(bitmap)
+                if end == page_addr + pos:
+                    # continues the range from the previous page
+                    end = page_addr + stop
+                else:
+                    if start is not None:
+                        yield start, end
+                    start, end = page_addr + pos, page_addr + stop
+                pos = bitmap.find(1, stop)
+
+        if start is not None:
+            yield start, end
+
+    def _bitmap(self, page_addr):
+        bitmap = self._pages.get(page_addr, None)
+        if bitmap is None:
+            bitmap = bytearray(self.page_size)
+            self._pages[page_addr] = bitmap
+        return bitmap
+
+
+def diff_memory(state_a, state_b):
+    """
+    Compute the bytes that differ between the memory of two states.
+
+    Pages are compared by identity first: pages that were not written to since the states were forked are shared, and
+    are skipped without looking at their content. The remaining pages are loaded from both states once. Concrete pages
+    are compared as bytes, and symbolic pages are bisected until the differing bytes are found. Symbolic bytes are
+    compared structurally, so two different expressions that always evaluate to the same value are reported as a change.
+
+    :param angr.SimState state_a:   The first state.
+    :param angr.SimState state_b:   The second state.
+    :return:                        The changed bytes.
+    :rtype:                         MemoryDiff
+    """
+
+    mem_a, mem_b = state_a.memory.mem, state_b.memory.mem
+    page_size = mem_a._page_size
+    pages_a, pages_b = mem_a._pages, mem_b._pages
+
+    diff = MemoryDiff(page_size)
+
+    page_nums = sorted(n for n in pages_a.keys() | pages_b.keys() if pages_a.get(n, None) is not pages_b.get(n, None))
+    if not page_nums:
+        return diff
+
+    # loading uninitialized memory stores new symbolic variables into the state. do not modify the states being
+    # compared.
+    state_a, state_b = state_a.copy(), state_b.copy()
+
+    for page_num in page_nums:
+        page_addr = page_num * page_size
+        data_a = state_a.memory.load(page_addr, page_size, inspect=False, disable_actions=True)
+        data_b = state_b.memory.load(page_addr, page_size, inspect=False, disable_actions=True)
+        _diff_data(state_a, state_b, data_a, data_b, page_addr, page_size, diff)
+
+    l.debug('%d of %d pages differ, %d bytes changed.', len(diff._pages), len(page_nums), len(diff))
+    return diff
+
+
+def _diff_data(state_a, state_b, data_a, data_b, addr, size, diff):
+
+    if data_a is data_b:
+        return
+
+    if not data_a.symbolic and not data_b.symbolic:
+        bytes_a = state_a.solver.eval(data_a, cast_to=bytes)
+        bytes_b = state_b.solver.eval(data_b, cast_to=bytes)
+        if bytes_a == bytes_b:
+            return
+        offset = addr % diff.page_size
+        bitmap = diff._bitmap(addr - offset)
+        for i, (a, b) in enumerate(zip(bytes_a, bytes_b)):
+            if a != b:
+                bitmap[offset + i] = 1
+        return
+
+    if size == 1:
+        offset = addr % diff.page_size
+        diff._bitmap(addr - offset)[offset] = 1
+        return
+
+    # memory is loaded in big endian, so the upper half holds the lower addresses
+    half = size // 2
+    hi_bits = size * 8 - 1
+    mid_bits = (size - half) * 8
+    _diff_data(state_a, state_b, data_a[hi_bits : mid_bits], data_b[hi_bits : mid_bits], addr, half, diff)
+    _diff_data(state_a, state_b, data_a[mid_bits - 1 : 0], data_b[mid_bits - 1 : 0], addr + half, size - half, diff)
@@ -0,0 +1,247 @@
+import heapq
+import itertools
+
+from .edge import Edge
+
+
+class TreeLayouter(object):
+    """
+    Lay out a forest top-down, where each node is centered above the span of its children.
+
+    Unlike GraphLayouter, the layout is maintained incrementally: nodes may be added, replaced, or removed at any time,
+    and layout() only recomputes subtree widths along the paths from changed nodes to their roots. Coordinates of each
+    node are relative to its parent node (roots are relative to the origin), so moving a subtree never requires
+    touching the nodes inside it. Edge coordinates are relative to the parent node as well.
+    """
+
+    ROW_MARGIN = 16
+    COL_MARGIN = 16
+
+    def __init__(self):
+        self._node_sizes = { }
+        self._parents = { }
+        self._children = { None: [ ] }  # None is the virtual parent of all roots
+        self._depths = { }
+        self._subtree_widths = { }
+        self._max_height = 0
+
+        # nodes whose subtree width or children have changed since the last layout
+        self._dirty = set()
+        self._full_layout = False
+        self._counter = itertools.count()
+
+        self.node_coordinates = { }
+        self.edges = { }  # maps each non-root node to the Edge from its parent
+
+    #
+    # Public methods
+    #
+
+    def clear(self):
+        self.__init__()
+
+    def parent_of(self, node):
+        return self._parents[node]
+
+    def children_of(self, node):
+        return self._children[node]
+
+    def add_node(self, node, size, parent=None):
+        """
+        Add a new node to the tree.
+
+        :param node:            The node to add.
+        :param tuple size:      Width and height of the node.
+        :param parent:          The parent node, or None if the new node is a root.
+        :return:                None
+        """
+
+        self._node_sizes[node] = size
+        self._parents[node] = parent
+        self._children[node] = [ ]
+        self._children[parent].append(node)
+        self._depths[node] = 0 if parent is None else self._depths[parent] + 1
+        self._update_max_height(size[1])
+
+        self._dirty.add(node)
+        self._dirty.add(parent)
+
+    def replace_node(self, old_node, new_node, size):
+        """
+        Replace a node in place. The new node inherits the parent, all children, and the coordinates of the old node.
+
+        :param old_node:        The node to replace.
+        :param new_node:        The node that takes its place.
+        :param tuple size:      Width and height of the new node.
+        :return:                None
+        """
+
+        parent = self._parents.pop(old_node)
+        siblings = self._children[parent]
+        siblings[siblings.index(old_node)] = new_node
+
+        children = self._children.pop(old_node)
+        for child in children:
+            self._parents[child] = new_node
+            if child in self.edges:
+                self.edges[child].src = new_node
+
+        # coordinates are kept. if the size of the new node is different, it and its children are placed again, and only
+        # then they are reported as moved.
+        if old_node in self.node_coordinates:
+            self.node_coordinates[new_node] = self.node_coordinates.pop(old_node)
+        if old_node in self.edges:
+            edge = self.edges.pop(old_node)
+            edge.dst = new_node
+            self.edges[new_node] = edge
+
+        self._node_sizes[new_node] = size
+        self._parents[new_node] = parent
+        self._children[new_node] = children
+        self._depths[new_node] = self._depths.pop(old_node)
+        self._subtree_widths[new_node] = self._subtree_widths.pop(old_node, None)
+        old_size = self._node_sizes.pop(old_node)
+        self._dirty.discard(old_node)
+        self._update_max_height(size[1])
+
+        if old_size != size:
+            self._dirty.add(new_node)
+            self._dirty.add(parent)
+            # the edge to the new node and the edges to all of its children must be updated
+            self.node_coordinates.pop(new_node, None)
+            for child in children:
+                self.node_coordinates.pop(child, None)
+
+    def remove_node(self, node):
+        """
+        Remove a node and all of its descendants from the tree.
+
+        :param node:    The node to remove.
+        :return:        A list of all removed nodes, starting with the given node.
+        :rtype:         list
+        """
+
+        parent = self._parents[node]
+        self._children[parent].remove(node)
+        self._dirty.add(parent)
+
+        removed = [ ]
+        stack = [ node ]
+        while stack:
+            n = stack.pop()
+            stack.extend(self._children.pop(n))
+            for d in (self._node_sizes, self._parents, self._depths, self._subtree_widths, self.node_coordinates,
+                      self.edges):
+                d.pop(n, None)
+            self._dirty.discard(n)
+            removed.append(n)
+
+        return removed
+
+    def layout(self):
+        """
+        Bring node coordinates and edges up to date.
+
+        :return:    The set of nodes whose coordinates (relative to their parents) have changed.
+        :rtype:     set
+        """
+
+        # recompute subtree widths bottom-up, but only continue towards the root while widths keep changing
+        to_place = set()
+        heap = [ ]
+        for node in self._dirty:
+            self._push(heap, to_place, node)
+        self._dirty.clear()
+
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            if node is None:
+                continue
+            old_width = self._subtree_widths.get(node, None)
+            new_width = self._compute_subtree_width(node)
+            self._subtree_widths[node] = new_width
+            if old_width != new_width:
+                self._push(heap, to_place, self._parents[node])
+
+        if self._full_layout:
+            self._full_layout = False
+            self.node_coordinates.clear()
+            to_place = self._children.keys()
+
+        # a node only positions its direct children. deeper nodes move along with their parents.
+        moved = set()
+        for node in to_place:
+            self._place_children(node, moved)
+
+        for node in moved:
+            self._update_edge(node)
+
+        return moved
+
+    #
+    # Private methods
+    #
+
+    def _push(self, heap, queued, node):
+        if node in queued:
+            return
+        queued.add(node)
+        # deepest nodes first, and the virtual root last
+        depth = -1 if node is None else self._depths[node]
+        heapq.heappush(heap, (-depth, next(self._counter), node))
+
+    def _update_max_height(self, height):
+        if height > self._max_height:
+            self._max_height = height
+            # the row pitch changes, which moves every node
+            self._full_layout = True
+
+    def _compute_subtree_width(self, node):
+        children = self._children[node]
+        children_width = sum(self._subtree_widths[child] for child in children) + \
+                         self.COL_MARGIN * max(0, len(children) - 1)
+        return max(self._node_sizes[node][0], children_width)
+
+    def _place_children(self, node, moved):
+        children = self._children[node]
+        if not children:
+            return
+
+        children_width = sum(self._subtree_widths[child] for child in children) + \
+                         self.COL_MARGIN * (len(children) - 1)
+        if node is None:
+            # roots are laid out next to each other, starting at the origin
+            left, y = 0, 0
+        else:
+            # the left edge of the span of all children, relative to the node itself
+            width, _ = self._node_sizes[node]
+            left = (width - children_width) // 2
+            y = self._max_height + self.ROW_MARGIN * 2
+
+        for child in children:
+            subtree_width = self._subtree_widths[child]
+            coordinates = (left + (subtree_width - self._node_sizes[child][0]) // 2, y)
+            if self.node_coordinates.get(child, None) != coordinates:
+                self.node_coordinates[child] = coordinates
+                moved.add(child)
+            left += subtree_width + self.COL_MARGIN
+
+    def _update_edge(self, node):
+        parent = self._parents[node]
+        if parent is None:
+            return
+
+        src_width, src_height = self._node_sizes[parent]
+        dst_x, dst_y = self.node_coordinates[node]
+        dst_width, _ = self._node_sizes[node]
+
+        start_x = src_width // 2
+        end_x = dst_x + dst_width // 2
+        mid_y = src_height + self.ROW_MARGIN
+
+        edge = Edge(parent, node)
+        edge.add_coordinate(start_x, src_height)
+        edge.add_coordinate(start_x, mid_y)
+        edge.add_coordinate(end_x, mid_y)
+        edge.add_coordinate(end_x, dst_y - 6)
+        self.edges[node] = edge
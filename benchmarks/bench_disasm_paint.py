@@ -0,0 +1,197 @@
+"""
+Measure how long it takes to paint a large number of instructions in the disassembly graph.
+
+A scene is filled with QInstruction items for synthetic instructions, and rendered at several zoom levels. The first
+frame at every zoom level includes laying out the text; later frames reuse the layout. For comparison, the benchmark
+also paints the same lines with QPainter.drawText, which is what instructions and operands used before they kept their
+texts as QStaticText.
+
+Run with:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_disasm_paint.py --instructions 3000
+"""
+
+import sys
+import time
+import random
+import argparse
+
+from PySide2.QtWidgets import QApplication, QGraphicsScene
+from PySide2.QtGui import QPainter, QImage, QColor
+from PySide2.QtCore import Qt, QRectF
+
+from angrmanagement.config import Conf
+from angrmanagement.logic.disassembly.info_dock import InfoDock
+from angrmanagement.ui.widgets.qinstruction import QInstruction
+
+MNEMONICS = [ 'mov', 'lea', 'add', 'sub', 'cmp', 'test', 'xor', 'push', 'pop', 'imul', 'movzx', 'and', 'shl' ]
+REGISTERS = [ 'rax', 'rbx', 'rcx', 'rdx', 'rsi', 'rdi', 'rbp', 'rsp', 'r8', 'r9', 'r12', 'r13', 'eax', 'ecx', 'edx' ]
+
+
+class Text:
+    def __init__(self, text):
+        self.text = text
+        self.children = [ ]
+
+    def render(self, formatting=None):  # pylint:disable=unused-argument
+        return [ self.text ]
+
+
+class Insn:
+    """
+    The parts of angr.analyses.disassembly.Instruction that QInstruction uses.
+    """
+
+    type = 'normal'
+    branch_type = None
+    branch_target_operand = None
+
+    def __init__(self, addr, mnemonic, operands):
+        self.addr = addr
+        self.mnemonic = Text(mnemonic)
+        self.operands = [ Text(op) for op in operands ]
+
+
+class CFG:
+    def __init__(self, comments):
+        self.kb = self
+        self.comments = comments
+        self.insn_addr_to_memory_data = { }
+
+
+class Instance:
+    def __init__(self, cfg):
+        self.cfg = cfg
+
+
+class Workspace:
+    def __init__(self, instance):
+        self.instance = instance
+
+
+class DisassemblyView:
+    show_address = True
+    show_variable = False
+    show_variable_identifier = False
+    insn_backcolor_callback = None
+    current_graph = None
+
+
+def random_operand(rng):
+    choice = rng.random()
+    if choice < 0.5:
+        return rng.choice(REGISTERS)
+    if choice < 0.8:
+        return "qword ptr [%s+0x%x]" % (rng.choice(REGISTERS), rng.randrange(0, 0x200, 8))
+    return "0x%x" % rng.randrange(0x10000)
+
+
+def build_scene(count, seed):
+    rng = random.Random(seed)
+    comments = { }
+    insns = [ ]
+    addr = 0x400000
+    for i in range(count):
+        operands = [ random_operand(rng) for _ in range(rng.choice((0, 1, 2, 2, 2))) ]
+        insns.append(Insn(addr, rng.choice(MNEMONICS), operands))
+        if i % 10 == 0:
+            comments[addr] = "comment at %#x" % addr
+        addr += rng.randrange(1, 8)
+
+    disasm_view = DisassemblyView()
+    infodock = InfoDock(disasm_view)
+    workspace = Workspace(Instance(CFG(comments)))
+
+    scene = QGraphicsScene()
+    # lay instructions out in columns, like blocks in a graph
+    per_column = 100
+    items = [ ]
+    for i, insn in enumerate(insns):
+        item = QInstruction(workspace, 0x400000, disasm_view, None, infodock, insn, None, Conf)
+        item.setPos((i // per_column) * 600, (i % per_column) * Conf.disasm_font_height)
+        scene.addItem(item)
+        items.append(item)
+
+    lines = [ ]
+    for item in items:
+        insn = item.insn
+        line = "%08x  %s %s" % (insn.addr, insn.mnemonic.text, ", ".join(op.text for op in insn.operands))
+        comment = comments.get(item.insn.addr, None)
+        if comment is not None:
+            line += "  // " + comment
+        lines.append(line)
+
+    return scene, lines
+
+
+def render_scene(scene, scale, image):
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform | QPainter.HighQualityAntialiasing)
+    rect = scene.itemsBoundingRect()
+    source = QRectF(rect.x(), rect.y(), image.width() / scale, image.height() / scale)
+    scene.render(painter, QRectF(0, 0, image.width(), image.height()), source, Qt.IgnoreAspectRatio)
+    painter.end()
+
+
+def render_draw_text(lines, scale, image):
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.scale(scale, scale)
+    painter.setFont(Conf.disasm_font)
+    ascent = Conf.disasm_font_ascent
+    height = Conf.disasm_font_height
+    per_column = 100
+    for i, line in enumerate(lines):
+        x, y = (i // per_column) * 600, (i % per_column) * height
+        if x * scale >= image.width() or y * scale >= image.height():
+            # the scene only paints visible items
+            continue
+        # every piece of an instruction was painted separately, with the render hints set each time
+        painter.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform |
+                               QPainter.HighQualityAntialiasing)
+        painter.setPen(QColor(0, 0, 0x80))
+        painter.drawText(x, y + ascent, line)
+    painter.end()
+
+
+def measure(render, frames):
+    start = time.perf_counter()
+    render()
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        render()
+    rest = (time.perf_counter() - start) / frames
+    return first, rest
+
+
+def main(instructions=3000, frames=20, width=1920, height=1080, seed=0):
+    app = QApplication.instance() or QApplication(sys.argv)  # pylint:disable=unused-variable
+    Conf.init_font_config()
+
+    start = time.perf_counter()
+    scene, lines = build_scene(instructions, seed)
+    print("%d instructions, created in %.1f ms" % (instructions, (time.perf_counter() - start) * 1000))
+
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    for scale in (1.0, 0.75, 1.5):
+        first, rest = measure(lambda: render_scene(scene, scale, image), frames)
+        print("zoom %.2f  QInstruction items:   first frame %8.2f ms, later frames %8.2f ms" % (scale, first * 1000,
+                                                                                             rest * 1000))
+        first, rest = measure(lambda: render_draw_text(lines, scale, image), frames)
+        print("zoom %.2f  drawText per line:   first frame %8.2f ms, later frames %8.2f ms" % (scale, first * 1000,
+                                                                                             rest * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Paint time of instructions in the disassembly graph.")
+    parser.add_argument("--instructions", type=int, default=3000, help="Number of instructions.")
+    parser.add_argument("--frames", type=int, default=20, help="Number of frames per measurement.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    main(instructions=args.instructions, frames=args.frames, width=args.width, height=args.height, seed=args.seed)
@@ -0,0 +1,129 @@
+"""
+Measure the cost of calling into the GUI thread from a worker thread.
+
+A worker thread makes a number of calls through angrmanagement.logic.threads while the main thread runs the Qt event
+loop, and the benchmark reports the time per call for:
+
+- blocking calls that post one event each and wait for it (how gui_thread_schedule used to work),
+- blocking calls through gui_thread_schedule,
+- calls through gui_thread_schedule_future, waiting for all of them at the end,
+- attribute writes and reads through GUIObjProxy.
+
+Run with:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_gui_bridge.py --calls 10000
+"""
+
+import sys
+import time
+import argparse
+import threading
+
+from PySide2.QtCore import QCoreApplication, QObject, QEvent
+
+from angrmanagement.logic import GlobalInfo
+from angrmanagement.logic.threads import ExecuteCodeEvent, GUIObjProxy, gui_thread_schedule, \
+    gui_thread_schedule_future, gui_thread_schedule_async
+
+
+class EventSink(QObject):
+    """
+    Executes code that is scheduled to run on the GUI thread, like MainWindow does.
+    """
+
+    def event(self, event):
+        if event.type() == QEvent.User:
+            try:
+                event.result = event.execute()
+            except Exception as e:  # pylint:disable=broad-except
+                event.exception = e
+            event.event.set()
+            return True
+        return super().event(event)
+
+
+class Target:
+    def __init__(self):
+        self.value = 0
+
+    def increase(self):
+        self.value += 1
+        return self.value
+
+
+def one_event_per_call(callable, args=None):
+    """
+    gui_thread_schedule before calls were batched.
+    """
+
+    event = ExecuteCodeEvent(callable, args)
+    QCoreApplication.postEvent(GlobalInfo.main_window, event)
+    event.event.wait()
+
+    if event.exception is not None:
+        raise event.exception
+
+    return event.result
+
+
+def run_blocking(schedule, calls):
+    target = Target()
+    for _ in range(calls):
+        schedule(target.increase)
+    assert target.value == calls
+
+
+def run_futures(calls):
+    target = Target()
+    futures = [ gui_thread_schedule_future(target.increase) for _ in range(calls) ]
+    for future in futures:
+        future.result()
+    assert target.value == calls
+
+
+def run_proxy(calls):
+    target = GUIObjProxy(Target())
+    for i in range(calls):
+        target.value = i
+    assert target.value == calls - 1
+
+
+def worker(calls, results):
+    cases = [
+        ("blocking, one event per call", lambda: run_blocking(one_event_per_call, calls)),
+        ("gui_thread_schedule", lambda: run_blocking(gui_thread_schedule, calls)),
+        ("gui_thread_schedule_future", lambda: run_futures(calls)),
+        ("GUIObjProxy attribute writes", lambda: run_proxy(calls)),
+    ]
+
+    try:
+        for name, case in cases:
+            start = time.perf_counter()
+            case()
+            results.append((name, time.perf_counter() - start))
+    finally:
+        gui_thread_schedule_async(QCoreApplication.instance().quit)
+
+
+def main(calls=10000):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    GlobalInfo.gui_thread = threading.get_ident()
+    GlobalInfo.main_window = EventSink()
+
+    results = [ ]
+    t = threading.Thread(target=worker, args=(calls, results), daemon=True)
+    t.start()
+    app.exec_()
+    t.join()
+
+    print("%d calls from a worker thread" % calls)
+    for name, elapsed in results:
+        print("%-32s %8.3f s total, %8.2f us per call" % (name, elapsed, elapsed / calls * 1000000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Round-trip cost of calls into the GUI thread.")
+    parser.add_argument("--calls", type=int, default=10000, help="Number of calls per case.")
+    args = parser.parse_args()
+
+    main(calls=args.calls)
@@ -0,0 +1,70 @@
+"""
+Compare serial CFG recovery with recover_cfg_parallel() on a corpus of binaries, e.g., stripped builds of coreutils.
+
+For each binary, the benchmark reports the time of a serial CFGFast with the arguments that CFGGenerationJob uses, the
+time of the parallel recovery, the speedup, and how many functions and nodes each of them found. Every run loads the
+binary into a new project, so that neither of them benefits from the knowledge base of the other.
+
+Run with:
+
+    python benchmarks/bench_parallel_cfg.py --workers 16 /path/to/stripped/bin/*
+"""
+
+import os
+import time
+import argparse
+
+import angr
+
+from angrmanagement.data.jobs.cfg_generation import CFGGenerationJob
+from angrmanagement.logic.parallel_cfg import recover_cfg_parallel
+
+
+LOAD_OPTIONS = {'auto_load_libs': False}
+
+
+def serial(binary_path, cfg_args):
+    project = angr.Project(binary_path, load_options=LOAD_OPTIONS)
+    start = time.perf_counter()
+    cfg = project.analyses.CFGFast(use_patches=True, **cfg_args)
+    return time.perf_counter() - start, cfg
+
+
+def parallel(binary_path, cfg_args, workers, chunks):
+    project = angr.Project(binary_path, load_options=LOAD_OPTIONS)
+    start = time.perf_counter()
+    cfg = recover_cfg_parallel(project, binary_path, load_options=LOAD_OPTIONS,
+                               cfg_args=dict(cfg_args, use_patches=True), workers=workers, chunks=chunks)
+    return time.perf_counter() - start, cfg
+
+
+def main(binaries, workers=None, chunks=None):
+    cfg_args = dict(CFGGenerationJob.DEFAULT_CFG_ARGS)
+    workers = workers if workers else (os.cpu_count() or 1)
+
+    print("%-24s %10s %10s %8s %18s %22s" % ("binary", "serial", "parallel", "speedup", "functions", "nodes"))
+    total_serial, total_parallel = 0.0, 0.0
+    for binary_path in binaries:
+        serial_time, serial_cfg = serial(binary_path, cfg_args)
+        parallel_time, parallel_cfg = parallel(binary_path, cfg_args, workers, chunks)
+        total_serial += serial_time
+        total_parallel += parallel_time
+
+        print("%-24s %9.2fs %9.2fs %7.2fx %8d / %-8d %10d / %-10d" % (
+            os.path.basename(binary_path)[:24], serial_time, parallel_time, serial_time / parallel_time,
+            len(serial_cfg.kb.functions), len(parallel_cfg.kb.functions),
+            len(serial_cfg.model.graph), len(parallel_cfg.model.graph)))
+
+    if total_parallel:
+        print("%-24s %9.2fs %9.2fs %7.2fx" % ("total", total_serial, total_parallel, total_serial / total_parallel))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serial and parallel CFG recovery on a corpus of binaries.")
+    parser.add_argument("binaries", nargs='+', help="Paths of the binaries.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes. Defaults to the "
+                                                                   "number of CPUs.")
+    parser.add_argument("--chunks", type=int, default=None, help="Number of chunks. Defaults to four per worker.")
+    args = parser.parse_args()
+
+    main(args.binaries, workers=args.workers, chunks=args.chunks)
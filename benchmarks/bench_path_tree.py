@@ -0,0 +1,132 @@
+"""
+Measure the per-step cost of updating the path tree in the symbolic execution view while the tree grows.
+
+Run with:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_path_tree.py
+"""
+
+import sys
+import time
+import random
+
+from PySide2.QtWidgets import QApplication, QGraphicsItem
+from PySide2.QtCore import QRectF
+
+from angrmanagement.ui.widgets import qpathtree
+from angrmanagement.ui.widgets.qpathtree import QPathTree
+
+
+class History:
+    def __init__(self, parent):
+        self.parent = parent
+        self.children = [ ]
+
+
+class Hierarchy:
+    """
+    A synthetic stand-in for angr.StateHierarchy.
+    """
+
+    def history_contains(self, history):  # pylint:disable=unused-argument,no-self-use
+        return True
+
+    def history_predecessors(self, history):  # pylint:disable=no-self-use
+        return [ history.parent ] if history.parent is not None else [ ]
+
+    def history_successors(self, history):  # pylint:disable=no-self-use
+        return history.children
+
+
+class State:
+    def __init__(self, history):
+        self.history = history
+
+
+class StateBlock(QGraphicsItem):
+    """
+    A state block that does not resolve addresses to functions, so that only the path tree itself is measured.
+    """
+
+    def __init__(self, is_selected, symexec_view, state=None, history=None):  # pylint:disable=unused-argument
+        super().__init__()
+        self.history = history
+        self.width = 100
+        self.height = 50
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.width, self.height)
+
+    def paint(self, painter, option, widget):  # pylint:disable=unused-argument
+        pass
+
+
+class SimgrContainer:
+    def __init__(self):
+        self.am_obj = self
+        self._hierarchy = Hierarchy()
+
+    def am_none(self):  # pylint:disable=no-self-use
+        return False
+
+    def am_subscribe(self, listener):
+        pass
+
+
+def main(steps=5000, actives=16, branch_rate=0.01, seed=0):
+    """
+    Step a synthetic simulation manager and update the path tree after every step. States that exceed the number of
+    active states are moved to the deadended stash, so the tree keeps growing.
+
+    Steps that only advance states are reported separately from steps where at least one state branches: the former
+    should cost the same regardless of the tree size, while the latter cost time proportional to the depth of the
+    branch point, since sibling subtrees on the way to the root are shifted.
+    """
+
+    random.seed(seed)
+    qpathtree.QStateBlock = StateBlock
+
+    simgr = SimgrContainer()
+    path_tree = QPathTree(simgr, simgr, None, None)
+
+    active = [ History(None) ]
+    deadended = [ ]
+    linear_times, branch_times = [ ], [ ]
+    report_every = steps // 10
+
+    for step in range(steps):
+        successors = [ ]
+        for history in active:
+            for _ in range(2 if random.random() < branch_rate else 1):
+                child = History(history)
+                history.children.append(child)
+                successors.append(child)
+        branched = len(successors) > len(active)
+        active = successors
+        while len(active) > actives:
+            deadended.append(active.pop(random.randrange(len(active))))
+        stashes = {
+            'active': [ State(h) for h in active ],
+            'deadended': [ State(h) for h in deadended ],
+        }
+
+        start = time.perf_counter()
+        path_tree.reload(stashes=stashes)
+        elapsed = time.perf_counter() - start
+        (branch_times if branched else linear_times).append(elapsed)
+
+        if (step + 1) % report_every == 0:
+            print("step %6d: %5d blocks, %.3f ms per linear step, %.3f ms per branching step" % (
+                step + 1, len(path_tree._graph.blocks), _average_ms(linear_times), _average_ms(branch_times)))
+            linear_times, branch_times = [ ], [ ]
+
+
+def _average_ms(times):
+    if not times:
+        return 0.
+    return sum(times) / len(times) * 1000
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    main()
@@ -0,0 +1,168 @@
+"""
+Measure how long it takes to convert transition graphs of large functions to super transition graphs.
+
+Transition graphs are generated with a mix of fall-through jumps, conditional branches, calls that return, and jumps to
+other functions. The benchmark reports the time of
+
+- a full conversion with to_supergraph(),
+- a call to get_supergraph() when the function has not changed,
+- growing the function a few blocks at a time, as a CFG that is still being generated does, either patching the
+  super graph with get_supergraph() or converting the whole transition graph again with to_supergraph() every time.
+
+Run with:
+
+    python benchmarks/bench_supergraph.py --blocks 50000
+"""
+
+import time
+import random
+import argparse
+
+import networkx
+from angr.knowledge_plugins import Function
+
+from angrmanagement.utils.graph import to_supergraph, get_supergraph
+
+
+class Block:
+    """
+    The parts of a CFG node that to_supergraph() uses.
+    """
+
+    __slots__ = ('addr', 'size', )
+
+    def __init__(self, addr, size):
+        self.addr = addr
+        self.size = size
+
+
+class Callee(Function):
+    """
+    A function that is only used as a call target.
+    """
+
+    def __init__(self, addr):  # pylint:disable=super-init-not-called
+        self.addr = addr
+
+    def __hash__(self):
+        return hash(('function', self.addr))
+
+    def __eq__(self, other):
+        return isinstance(other, Callee) and self.addr == other.addr
+
+
+class GeneratedFunction:
+    """
+    The parts of a Function that get_supergraph() uses.
+    """
+
+    def __init__(self):
+        self.transition_graph = networkx.DiGraph()
+
+
+def generate(count, seed):
+    """
+    Generate the nodes and edges of a transition graph, in the order a CFG would discover them.
+
+    :return:    A list of lists of (src, dst, data) tuples, one list per block.
+    """
+
+    rng = random.Random(seed)
+    callees = [ Callee(0x800000 + i * 0x40) for i in range(100) ]
+    outside = [ Block(0x900000 + i * 0x40, 8) for i in range(10) ]
+
+    blocks = [ ]
+    addr = 0x400000
+    for _ in range(count):
+        size = rng.randrange(2, 40)
+        blocks.append(Block(addr, size))
+        addr += size
+
+    edges = [ ]
+    for i, block in enumerate(blocks[:-1]):
+        next_block = blocks[i + 1]
+        ins_addr = block.addr + block.size - 1
+        r = rng.random()
+        if r < 0.2:
+            # fall-through
+            block_edges = [ (block, next_block, {'type': 'transition', 'ins_addr': ins_addr, 'stmt_idx': -2}) ]
+        elif r < 0.6:
+            # a call that returns
+            block_edges = [
+                (block, rng.choice(callees), {'type': 'call', 'ins_addr': ins_addr, 'stmt_idx': -2}),
+                (block, next_block, {'type': 'fake_return', 'ins_addr': ins_addr, 'stmt_idx': -2}),
+            ]
+        elif r < 0.95:
+            # a conditional branch
+            target = blocks[max(0, min(len(blocks) - 1, i + rng.randrange(-50, 50)))]
+            block_edges = [
+                (block, next_block, {'type': 'transition', 'ins_addr': ins_addr, 'stmt_idx': -2}),
+                (block, target, {'type': 'transition', 'ins_addr': ins_addr, 'stmt_idx': -2}),
+            ]
+        else:
+            # a jump to another function
+            block_edges = [ (block, rng.choice(outside), {'type': 'transition', 'outside': True,
+                                                          'ins_addr': ins_addr, 'stmt_idx': -2}) ]
+        edges.append(block_edges)
+    return edges
+
+
+def add_blocks(graph, edges):
+    for block_edges in edges:
+        for src, dst, data in block_edges:
+            graph.add_edge(src, dst, **data)
+
+
+def signature(supergraph):
+    return sorted((n.addr, len(n.cfg_nodes)) for n in supergraph.nodes()), supergraph.number_of_edges()
+
+
+def main(blocks=50000, growth=20, batch=100, seed=0):
+    edges = generate(blocks, seed)
+
+    function = GeneratedFunction()
+    add_blocks(function.transition_graph, edges)
+    print("%d blocks, %d edges" % (function.transition_graph.number_of_nodes(),
+                                   function.transition_graph.number_of_edges()))
+
+    start = time.perf_counter()
+    full = to_supergraph(function.transition_graph)
+    print("to_supergraph:                  %8.1f ms, %d super nodes" % ((time.perf_counter() - start) * 1000,
+                                                                       full.number_of_nodes()))
+
+    get_supergraph(function)
+    start = time.perf_counter()
+    get_supergraph(function)
+    print("get_supergraph, unchanged:      %8.3f ms" % ((time.perf_counter() - start) * 1000))
+
+    # grow a function from (100 - growth)% of its blocks to all of them
+    first = len(edges) * (100 - growth) // 100
+    batches = [ edges[i:i + batch] for i in range(first, len(edges), batch) ]
+
+    for name, convert in (("get_supergraph, growing", get_supergraph),
+                          ("to_supergraph, growing", lambda f: to_supergraph(f.transition_graph))):
+        function = GeneratedFunction()
+        add_blocks(function.transition_graph, edges[:first])
+        convert(function)
+
+        elapsed = 0.0
+        for block_edges in batches:
+            add_blocks(function.transition_graph, block_edges)
+            start = time.perf_counter()
+            supergraph = convert(function)
+            elapsed += time.perf_counter() - start
+
+        assert signature(supergraph) == signature(full)
+        print("%-31s %8.1f ms in total, %6.2f ms per batch of %d blocks" % (name + ":", elapsed * 1000,
+                                                                          elapsed * 1000 / len(batches), batch))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Conversion time of transition graphs to super transition graphs.")
+    parser.add_argument("--blocks", type=int, default=50000, help="Number of blocks in the function.")
+    parser.add_argument("--growth", type=int, default=20, help="Percentage of blocks that are added incrementally.")
+    parser.add_argument("--batch", type=int, default=100, help="Number of blocks that are added at a time.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    main(blocks=args.blocks, growth=args.growth, batch=args.batch, seed=args.seed)
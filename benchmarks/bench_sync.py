@@ -0,0 +1,248 @@
+"""
+Load test for SyncControl against a local stand-in for a binsync repo.
+
+A number of simulated remote users commit label and comment changes to a shared LocalSyncServer at random intervals,
+while a simulated local user edits the knowledge base of an angr management instance that is connected through
+SyncControl. The benchmark reports how long changes take to propagate in both directions, and how much CPU time the sync
+worker thread and the GUI thread spend on it.
+
+Run with:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_sync.py --users 20 --rate 0.5 --duration 30
+"""
+
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+
+from PySide2.QtCore import QCoreApplication, QObject, QEvent
+
+from angrmanagement.logic import GlobalInfo
+from angrmanagement.data.object_container import ObjectContainer
+from angrmanagement.data.sync_ctrl import SyncControl
+
+from local_sync import LocalSyncServer, LocalSyncClient, LocalSyncPlugin
+
+
+class EventSink(QObject):
+    """
+    Executes code that is scheduled to run on the GUI thread, like MainWindow does.
+    """
+
+    def event(self, event):
+        if event.type() == QEvent.User:
+            try:
+                event.result = event.execute()
+            except Exception as e:  # pylint:disable=broad-except
+                event.exception = e
+            event.event.set()
+            return True
+        return super().event(event)
+
+
+class Function:
+    def __init__(self, addr):
+        self.addr = addr
+        self.name = "sub_%x" % addr
+
+
+class FunctionManager:
+    def __init__(self, addrs):
+        self._functions = dict((addr, Function(addr)) for addr in addrs)
+
+    def function(self, addr=None):
+        return self._functions.get(addr, None)
+
+
+class KnowledgeBase:
+    def __init__(self, function_addrs, sync):
+        self.functions = FunctionManager(function_addrs)
+        self.sync = sync
+
+
+class Project:
+    def __init__(self, kb):
+        self.kb = kb
+
+
+class MeasuredSyncControl(SyncControl):
+    def __init__(self, instance, refresh_interval, push_delay):
+        super().__init__(instance)
+        self._refresh_interval = refresh_interval
+        self._push_delay = push_delay
+
+        self.worker_cpu = None
+        self._stopped = threading.Event()
+
+    def worker_routine(self):
+        try:
+            super().worker_routine()
+        finally:
+            self.worker_cpu = time.thread_time()
+            self._stopped.set()
+
+    def stop(self):
+        self.project.kb.sync.disconnect()
+        self._wakeup.set()
+        self._stopped.wait()
+
+
+class Instance:
+    """
+    The parts of angrmanagement.data.instance.Instance that SyncControl uses.
+    """
+
+    def __init__(self, project, refresh_interval, push_delay):
+        self.project_container = ObjectContainer(None, name="the current angr project")
+        self.kb_changes = ObjectContainer(None, name='Knowledge base update notifier')
+        self.sync = MeasuredSyncControl(self, refresh_interval, push_delay)
+
+        self.project_container.am_obj = project
+        self.project_container.am_event()
+
+    @property
+    def project(self):
+        return self.project_container.am_obj
+
+
+def remote_user(server, name, function_addrs, rate, end, seed):
+    rng = random.Random(seed)
+    server.join(name)
+
+    while True:
+        time.sleep(rng.expovariate(rate))
+        if time.time() >= end:
+            break
+        addr = rng.choice(function_addrs)
+        if rng.random() < 0.5:
+            server.commit(name, { addr: "%s_func_%x" % (name, rng.getrandbits(16)) }, { })
+        else:
+            server.commit(name, { }, { addr: "%s was here" % name })
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000
+    return "p50 %7.1f ms, p95 %7.1f ms, max %7.1f ms (%d samples)" % (pick(0.5), pick(0.95), values[-1] * 1000,
+                                                                        len(values))
+
+
+def local_latencies(server, local_user, local_edits):
+    """
+    For every change that the local user has committed, the time between the last edit before the commit and the
+    commit itself.
+    """
+
+    latencies = [ ]
+    for commit in server.commits:
+        if commit.user != local_user:
+            continue
+        keys = [ ('label', addr) for addr in commit.functions ] + [ ('comment', addr) for addr in commit.comments ]
+        for key in keys:
+            edits = [ ts for ts in local_edits[key] if ts <= commit.timestamp ]
+            if edits:
+                latencies.append(commit.timestamp - edits[-1])
+    return latencies
+
+
+def main(users=20, rate=0.5, local_rate=1.0, functions=1000, duration=30.0, refresh_interval=10.0, push_delay=0.5,
+         delay=0.0, seed=0):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    GlobalInfo.gui_thread = threading.get_ident()
+    GlobalInfo.main_window = EventSink()
+
+    rng = random.Random(seed)
+    function_addrs = [ 0x400000 + i * 0x40 for i in range(functions) ]
+    server = LocalSyncServer(delay=delay)
+
+    # remote -> local latency is measured when the team table would be notified
+    pulled = [ ]
+    pulled_lock = threading.Lock()
+    remote_latencies = [ ]
+    notifications = [ 0 ]
+
+    def on_pull(commits):
+        with pulled_lock:
+            pulled.extend(commits)
+
+    def on_users_changed(**kwargs):
+        now = time.time()
+        notifications[0] += 1
+        with pulled_lock:
+            remote_latencies.extend(now - c.timestamp for c in pulled)
+            del pulled[:]
+
+    plugin = LocalSyncPlugin(on_pull=on_pull)
+    project = Project(KnowledgeBase(function_addrs, plugin))
+    instance = Instance(project, refresh_interval, push_delay)
+    instance.sync.users_container.am_subscribe(on_users_changed)
+
+    start = time.time()
+    end = start + duration
+    threads = [ threading.Thread(target=remote_user, args=(server, "user%d" % i, function_addrs, rate, end, seed + i),
+                                 daemon=True)
+                for i in range(users) ]
+    for t in threads:
+        t.start()
+
+    instance.sync.connect_client(LocalSyncClient(server, "local"))
+
+    local_edits = defaultdict(list)
+    next_local_edit = start + rng.expovariate(local_rate)
+    gui_cpu_start = time.thread_time()
+
+    while time.time() < end:
+        now = time.time()
+        if now >= next_local_edit:
+            addr = rng.choice(function_addrs)
+            if rng.random() < 0.5:
+                func = project.kb.functions.function(addr=addr)
+                func.name = "local_func_%x" % rng.getrandbits(16)
+                local_edits[('label', addr)].append(time.time())
+                instance.kb_changes.am_event(kind='label', addr=addr, value=func.name)
+            else:
+                local_edits[('comment', addr)].append(time.time())
+                instance.kb_changes.am_event(kind='comment', addr=addr, value="local comment %x" % rng.getrandbits(16))
+            next_local_edit = now + rng.expovariate(local_rate)
+
+        app.processEvents()
+        time.sleep(0.005)
+
+    gui_cpu = time.thread_time() - gui_cpu_start
+    elapsed = time.time() - start
+
+    instance.sync.stop()
+    app.processEvents()
+
+    print("%d remote users at %.2f edits/s each, local user at %.2f edits/s, %.0f seconds" % (users, rate, local_rate,
+                                                                                             elapsed))
+    print("commits on the server:        %d" % len(server.commits))
+    print("team table notifications:     %d" % notifications[0])
+    print("remote -> local latency:      %s" % percentiles(remote_latencies))
+    print("local -> remote latency:      %s" % percentiles(local_latencies(server, "local", local_edits)))
+    print("sync worker CPU time:         %.3f s (%.2f%% of wall time)" % (instance.sync.worker_cpu,
+                                                                          instance.sync.worker_cpu / elapsed * 100))
+    print("GUI thread CPU time:          %.3f s (%.2f%% of wall time)" % (gui_cpu, gui_cpu / elapsed * 100))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test for binsync synchronization.")
+    parser.add_argument("--users", type=int, default=20, help="Number of simulated remote users.")
+    parser.add_argument("--rate", type=float, default=0.5, help="Edits per second of each remote user.")
+    parser.add_argument("--local-rate", type=float, default=1.0, help="Edits per second of the local user.")
+    parser.add_argument("--functions", type=int, default=1000, help="Number of functions that are edited.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duration of the test, in seconds.")
+    parser.add_argument("--refresh-interval", type=float, default=10.0, help="How often SyncControl pulls.")
+    parser.add_argument("--push-delay", type=float, default=0.5, help="How long SyncControl coalesces local edits.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated round-trip time of the sync repo.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    main(users=args.users, rate=args.rate, local_rate=args.local_rate, functions=args.functions,
+         duration=args.duration, refresh_interval=args.refresh_interval, push_delay=args.push_delay, delay=args.delay,
+         seed=args.seed)
@@ -0,0 +1,277 @@
+"""
+Check that SupergraphBuilder produces the same super graphs as the conversion it replaced, on many small random
+transition graphs.
+
+For every graph, the blocks that the super graph keeps must match those of the old conversion: blocks that are only
+reachable from outside the function, directly or through other such blocks, are left out by both. Graphs that the old
+conversion fails on, or whose blocks are merged in a cycle, which makes the old conversion drop them, are skipped.
+Every graph is also grown one edge at a time, and the patched super graph must match a fresh conversion.
+
+Run with:
+
+    python benchmarks/check_supergraph.py --graphs 3000
+"""
+
+import sys
+import random
+import argparse
+
+import networkx
+from angr.knowledge_plugins import Function
+
+from angrmanagement.utils.graph import SupergraphBuilder, SuperCFGNode, to_supergraph
+
+from bench_supergraph import Block, Callee
+
+
+def legacy_to_supergraph(transition_graph):
+    """
+    The conversion that SupergraphBuilder replaced, unchanged except for its name.
+
+    :param networkx.DiGraph transition_graph: The transition graph.
+    :return: A converted super transition graph
+    :rtype networkx.DiGraph
+    """
+
+    # make a copy of the graph
+    transition_graph = networkx.DiGraph(transition_graph)
+
+    # remove all edges that transitions to outside
+    for src, dst, data in list(transition_graph.edges(data=True)):
+        if data['type'] == 'transition' and data.get('outside', False) is True:
+            transition_graph.remove_edge(src, dst)
+        if transition_graph.in_degree(dst) == 0:
+            transition_graph.remove_node(dst)
+
+    edges_to_shrink = set()
+
+    # Find all edges to remove in the super graph
+    for src in transition_graph.nodes():
+        edges = transition_graph[src]
+
+        # there are two types of edges we want to remove:
+        # - call or fakerets, since we do not want blocks to break at calls
+        # - boring jumps that directly transfer the control to the block immediately after the current block. this is
+        #   usually caused by how VEX breaks down basic blocks, which happens very often in MIPS
+
+
+
+        if len(edges) == 1 and src.addr + src.size == next(iter(edges.keys())).addr:
+            dst = next(iter(edges.keys()))
+            dst_in_edges = transition_graph.in_edges(dst)
+            if len(dst_in_edges) == 1:
+                edges_to_shrink.add((src, dst))
+                continue
+
+        if any(iter('type' in data and data['type'] not in ('fake_return', 'call') for data in edges.values())):
+            continue
+
+        for dst, data in edges.items():
+            if isinstance(dst, Function):
+                continue
+            if 'type' in data and data['type'] == 'fake_return':
+                if all(iter('type' in data and data['type'] in ('fake_return', 'return_from_call')
+                            for _, _, data in transition_graph.in_edges(dst, data=True))):
+                    edges_to_shrink.add((src, dst))
+                break
+
+    # Create the super graph
+    super_graph = networkx.DiGraph()
+
+    supernodes_map = {}
+
+    function_nodes = set()  # it will be traversed after all other nodes are added into the supergraph
+
+    for node in transition_graph.nodes():
+
+        if isinstance(node, Function):
+            function_nodes.add(node)
+            # don't put functions into the supergraph
+            continue
+
+        dests_and_data = transition_graph[node]
+
+        # make a super node
+        if node in supernodes_map:
+            src_supernode = supernodes_map[node]
+        else:
+            src_supernode = SuperCFGNode.from_cfgnode(node)
+            supernodes_map[node] = src_supernode
+            # insert it into the graph
+            super_graph.add_node(src_supernode)
+
+        if not dests_and_data:
+            # might be an isolated node
+            continue
+
+        for dst, data in dests_and_data.items():
+
+            edge = (node, dst)
+
+            if edge in edges_to_shrink:
+
+                if dst in supernodes_map:
+                    dst_supernode = supernodes_map[dst]
+                else:
+                    dst_supernode = None
+
+                src_supernode.insert_cfgnode(dst)
+
+                # update supernodes map
+                supernodes_map[dst] = src_supernode
+
+                # merge the other supernode
+                if dst_supernode is not None:
+                    src_supernode.merge(dst_supernode)
+
+                    for src in dst_supernode.cfg_nodes:
+                        supernodes_map[src] = src_supernode
+
+                    # link all out edges of dst_supernode to src_supernode
+                    for dst_, data_ in super_graph[dst_supernode].items():
+                        super_graph.add_edge(src_supernode, dst_, **data_)
+
+                    # link all in edges of dst_supernode to src_supernode
+                    for src_, _, data_ in super_graph.in_edges([dst_supernode], data=True):
+                        super_graph.add_edge(src_, src_supernode, **data_)
+
+                        if 'type' in data_ and data_['type'] == 'transition':
+                            if not ('ins_addr' in data_ and 'stmt_idx' in data_):
+                                # this is a hack to work around the issue in Function.normalize() where ins_addr and
+                                # stmt_idx weren't properly set onto edges
+                                continue
+                            src_supernode.register_out_branch(data_['ins_addr'], data_['stmt_idx'], data_['type'],
+                                                              dst_supernode.addr
+                                                              )
+
+                    super_graph.remove_node(dst_supernode)
+
+            else:
+                if isinstance(dst, Function):
+                    # skip all functions
+                    continue
+
+                # make a super node
+                if dst in supernodes_map:
+                    dst_supernode = supernodes_map[dst]
+                else:
+                    dst_supernode = SuperCFGNode.from_cfgnode(dst)
+                    supernodes_map[dst] = dst_supernode
+
+                super_graph.add_edge(src_supernode, dst_supernode, **data)
+
+                if 'type' in data and data['type'] == 'transition':
+                    if not ('ins_addr' in data and 'stmt_idx' in data):
+                        # this is a hack to work around the issue in Function.normalize() where ins_addr and
+                        # stmt_idx weren't properly set onto edges
+                        continue
+                    src_supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'],
+                                                      dst_supernode.addr
+                                                      )
+
+    for node in function_nodes:
+        in_edges = transition_graph.in_edges(node, data=True)
+
+        for src, _, data in in_edges:
+            if not ('ins_addr' in data and 'stmt_idx' in data):
+                # this is a hack to work around the issue in Function.normalize() where ins_addr and
+                # stmt_idx weren't properly set onto edges
+                continue
+            supernode = supernodes_map[src]
+            supernode.register_out_branch(data['ins_addr'], data['stmt_idx'], data['type'], node.addr)
+
+    return super_graph
+
+
+def generate(seed):
+    """
+    Generate a small transition graph, with all types of edges that matter to the conversion.
+
+    :return:    A list of (src, dst, data) tuples, in the order they are added.
+    """
+
+    rng = random.Random(seed)
+    count = rng.randint(2, 12)
+    blocks = [ ]
+    addr = 0x400000
+    for _ in range(count):
+        size = rng.choice([ 4, 8 ])
+        blocks.append(Block(addr, size))
+        # some blocks are adjacent, so that fall-through jumps are merged
+        addr += size + rng.choice([ 0, 0, 4 ])
+    callees = [ Callee(0x800000 + i * 0x40) for i in range(2) ]
+
+    edges = [ ]
+    for _ in range(rng.randint(1, 2 * count)):
+        src = rng.choice(blocks)
+        kind = rng.choice([ 'transition', 'transition', 'fake_return', 'call' ])
+        dst = rng.choice(callees) if kind == 'call' and rng.random() < 0.5 else rng.choice(blocks)
+        if src is dst:
+            continue
+        data = {'type': kind, 'ins_addr': src.addr, 'stmt_idx': 0}
+        if kind == 'transition' and rng.random() < 0.25:
+            data['outside'] = True
+        edges.append((src, dst, data))
+    return blocks[0], edges
+
+
+def kept_blocks(supergraph):
+    return sorted(set(node.addr for supernode in supergraph.nodes() for node in supernode.cfg_nodes))
+
+
+def signature(supergraph):
+    nodes = sorted(tuple(node.addr for node in supernode.cfg_nodes) for supernode in supergraph.nodes())
+    edges = sorted((src.addr, dst.addr) for src, dst in supergraph.edges())
+    return nodes, edges
+
+
+def merged_in_cycle(builder):
+    shrink = builder._shrink  # pylint:disable=protected-access
+    for start in shrink:
+        seen = set()
+        node = start
+        while node in shrink:
+            if node in seen:
+                return True
+            seen.add(node)
+            node = shrink[node]
+    return False
+
+
+def main(graphs=3000):
+    mismatches = [ ]
+    skipped = 0
+    for seed in range(graphs):
+        entry, edges = generate(seed)
+        tg = networkx.DiGraph()
+        tg.add_node(entry)
+        builder = SupergraphBuilder()
+        for src, dst, data in edges:
+            tg.add_edge(src, dst, **data)
+            if signature(builder.update(tg)) != signature(to_supergraph(tg)):
+                mismatches.append((seed, "the patched super graph differs from a fresh conversion"))
+                break
+
+        try:
+            legacy = legacy_to_supergraph(tg)
+        except (networkx.NetworkXError, KeyError):
+            skipped += 1
+            continue
+        if merged_in_cycle(builder):
+            skipped += 1
+            continue
+        if kept_blocks(builder.update(tg)) != kept_blocks(legacy):
+            mismatches.append((seed, "the kept blocks differ from those of the old conversion"))
+
+    print("%d graphs, %d skipped, %d mismatches" % (graphs, skipped, len(mismatches)))
+    for seed, reason in mismatches[:20]:
+        print("  seed %d: %s" % (seed, reason))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare SupergraphBuilder with the conversion it replaced.")
+    parser.add_argument("--graphs", type=int, default=3000, help="Number of random transition graphs.")
+    args = parser.parse_args()
+
+    sys.exit(main(graphs=args.graphs))
@@ -0,0 +1,172 @@
+"""
+An in-process stand-in for a shared binsync repo, for exercising SyncControl without git or a team of people.
+
+LocalSyncServer plays the shared repo. Each participant gets a LocalSyncPlugin, which implements the parts of
+project.kb.sync that angr management uses, and connects to the server through a LocalSyncClient:
+
+    server = LocalSyncServer()
+    project.kb.sync = LocalSyncPlugin()
+    instance.sync.connect_client(LocalSyncClient(server, "alice"))
+"""
+
+import time
+import threading
+from collections import namedtuple
+
+
+Commit = namedtuple('Commit', ('revision', 'user', 'timestamp', 'functions', 'comments', ))
+
+
+class LocalSyncUser:
+    __slots__ = ('name', )
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "<LocalSyncUser %s>" % self.name
+
+
+class LocalSyncServer:
+    """
+    The shared repo. Every commit gets a new, globally increasing revision.
+
+    :ivar float delay:  Simulated network round-trip time of every request, in seconds.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+        self._lock = threading.Lock()
+        self._commits = [ ]
+        self._users = { }  # user name -> revision of their latest commit
+
+    @property
+    def commits(self):
+        with self._lock:
+            return list(self._commits)
+
+    def join(self, user):
+        self._request()
+        with self._lock:
+            self._users.setdefault(user, 0)
+
+    def commit(self, user, functions, comments, timestamp=None):
+        self._request()
+        with self._lock:
+            revision = len(self._commits) + 1
+            self._commits.append(Commit(revision, user, time.time() if timestamp is None else timestamp,
+                                        dict(functions), dict(comments)))
+            self._users[user] = revision
+            return revision
+
+    def commits_since(self, revision):
+        self._request()
+        with self._lock:
+            return self._commits[revision:]
+
+    def users(self):
+        self._request()
+        with self._lock:
+            return dict(self._users)
+
+    def _request(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+
+class LocalSyncClient:
+    def __init__(self, server, user):
+        self.server = server
+        self.user = user
+
+
+class LocalSyncPlugin:
+    """
+    Implements connect, connected, users, tally, commit, update, pull, push_function, push_comments, fill_function, and
+    pull_patches like project.kb.sync does, but against a LocalSyncServer.
+
+    :ivar callable on_pull:     Called with every list of new commits from other users that has been pulled.
+    """
+
+    def __init__(self, on_pull=None):
+        self.on_pull = on_pull
+
+        self.client = None
+        self._connected = False
+        self._staged_functions = { }
+        self._staged_comments = { }
+        self._revision = 0  # the latest revision that has been pulled
+
+        # everything that has been pulled from other users
+        self.revisions = { }  # user -> revision of their latest commit
+        self.functions = { }  # user -> {addr: name}
+        self.comments = { }  # user -> {addr: comment}
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def connect(self, client):
+        client.server.join(client.user)
+        self.client = client
+        self._connected = True
+
+    def disconnect(self):
+        self._connected = False
+
+    def users(self):
+        return [ LocalSyncUser(name) for name in sorted(self.client.server.users()) ]
+
+    def tally(self, users=None):
+        # like a git-backed repo, only report what has been pulled
+        revisions = self.revisions
+        if users is not None:
+            revisions = dict((u, revisions[u]) for u in users if u in revisions)
+        return dict((user, { 'revision': revision,
+                             'functions': len(self.functions.get(user, ())),
+                             'comments': len(self.comments.get(user, ())),
+                             })
+                    for user, revision in revisions.items())
+
+    def push_function(self, func):
+        self._staged_functions[func.addr] = func.name
+
+    def push_comments(self, comments):
+        self._staged_comments.update(comments)
+
+    def commit(self):
+        if not self._staged_functions and not self._staged_comments:
+            return
+        self.client.server.commit(self.client.user, self._staged_functions, self._staged_comments)
+        self._staged_functions = { }
+        self._staged_comments = { }
+
+    def update(self):
+        self.commit()
+        self.pull()
+
+    def pull(self):
+        new_commits = self.client.server.commits_since(self._revision)
+        if not new_commits:
+            return
+        self._revision = new_commits[-1].revision
+        for c in new_commits:
+            self.revisions[c.user] = c.revision
+
+        commits = [ c for c in new_commits if c.user != self.client.user ]
+
+        for c in commits:
+            self.functions.setdefault(c.user, { }).update(c.functions)
+            self.comments.setdefault(c.user, { }).update(c.comments)
+
+        if commits and self.on_pull is not None:
+            self.on_pull(commits)
+
+    def fill_function(self, func, user=None):
+        name = self.functions.get(user, { }).get(func.addr, None)
+        if name is not None:
+            func.name = name
+
+    def pull_patches(self, user=None):  # pylint:disable=unused-argument,no-self-use
+        return [ ]
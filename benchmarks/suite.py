@@ -0,0 +1,532 @@
+"""
+A reproducible benchmark suite for the operations whose speed users notice, with results stored as JSON so that commits
+can be compared.
+
+Generated cases work on synthetic inputs of a fixed size and seed:
+
+- to_supergraph() on a large transition graph,
+- GraphLayouter on the super graph of a function,
+- filtering a function table.
+
+Binary cases load a binary into a headless main window, and time
+
+- QDisassemblyGraph.reload() on the largest function,
+- scrolling through the linear disassembly with QLinearDisassembly.prepare_objects(),
+- filtering the function table of the binary,
+- reloading the string table,
+- locate_function() on addresses throughout the binary,
+- saving and loading a database, i.e., pickling the (project, cfg, cfb) tuple that MainWindow stores.
+
+Binary cases run against a binary that is compiled from generated C code, if a C compiler is available, against every
+binary in benchmarks/binaries/, and against every binary that is passed with --binary. No binaries are shipped in
+benchmarks/binaries/, since they would only run on some platforms; create the directory and put binaries there to run
+against them on every run. Cases whose inputs are unavailable are skipped and listed with the reason in the results.
+
+Every case runs once to warm up, and then --repeat times. The median, minimum, and maximum are stored. With
+--baseline, medians are compared with those of an earlier run, and the suite exits with status 1 if any case got slower
+than --tolerance allows, or if a case of the baseline is missing or skipped now.
+
+Run with:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/suite.py --output new.json --baseline old.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import pickle
+import random
+import fnmatch
+import platform
+import argparse
+import datetime
+import tempfile
+import statistics
+import subprocess
+import threading
+
+import networkx
+
+from bench_supergraph import generate, add_blocks
+
+from angrmanagement.utils.graph import to_supergraph
+from angrmanagement.utils.graph_layouter import GraphLayouter
+
+LOCAL_BINARIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'binaries')
+
+SUPERGRAPH_BLOCKS = 20000
+LAYOUT_BLOCKS = 1000
+TABLE_FUNCTIONS = 50000
+FILTER_KEYWORDS = [ 'sub_4', 'main', '4010', 'crypto', 'no such function' ]
+GENERATED_FUNCTIONS = 400
+SCROLL_STEPS = 200
+LOCATE_ADDRESSES = 200
+
+# regressions of less than this many seconds are noise, however large they are relative to the baseline
+MIN_REGRESSION = 0.005
+
+
+class Case:
+    """
+    A benchmark case.
+
+    :ivar str name:     Name of the case.
+    :ivar setup:        Called with the BinaryContext for binary cases, and with no arguments otherwise. Returns the
+                        callable to time, or a string that says why the case is skipped.
+    :ivar bool binary:  Whether the case runs against binaries.
+    """
+
+    def __init__(self, name, setup, binary):
+        self.name = name
+        self.setup = setup
+        self.binary = binary
+
+
+CASES = [ ]
+
+
+def case(name, binary=False):
+    def decorator(setup):
+        CASES.append(Case(name, setup, binary))
+        return setup
+    return decorator
+
+
+#
+# Generated cases
+#
+
+class TableFunction:
+    """
+    The parts of a Function that QFunctionTableModel filters on.
+    """
+
+    __slots__ = ('name', 'addr', 'tags', 'binary', )
+
+    def __init__(self, name, addr, tags):
+        self.name = name
+        self.addr = addr
+        self.tags = tags
+        self.binary = None
+
+
+def generated_graph(blocks, seed=0):
+    graph = networkx.DiGraph()
+    add_blocks(graph, generate(blocks, seed))
+    return graph
+
+
+@case('to_supergraph')
+def setup_to_supergraph():
+    graph = generated_graph(SUPERGRAPH_BLOCKS)
+    return lambda: to_supergraph(graph)
+
+
+@case('GraphLayouter')
+def setup_graph_layouter():
+    supergraph = to_supergraph(generated_graph(LAYOUT_BLOCKS))
+    rng = random.Random(0)
+    # about the sizes of QGraphBlocks with a few instructions each
+    node_sizes = dict((node, (rng.randrange(150, 500), 20 * (len(node.cfg_nodes) + rng.randrange(1, 8))))
+                      for node in supergraph.nodes())
+    return lambda: GraphLayouter(supergraph, node_sizes)
+
+
+@case('function table filter')
+def setup_function_table_filter():
+    from angrmanagement.ui.widgets.qfunction_table import QFunctionTableModel  # pylint:disable=import-outside-toplevel
+
+    rng = random.Random(0)
+    tags = [ (), (), (), ('CRYPTO', ), ('HAS_XOR', 'CRYPTO'), ('LARGE_SWITCH', ) ]
+    functions = [ TableFunction('main' if i == 0 else 'sub_%x' % (0x400000 + i * 0x30), 0x400000 + i * 0x30,
+                                rng.choice(tags))
+                  for i in range(TABLE_FUNCTIONS) ]
+    return _filter_function_table(QFunctionTableModel(func_list=functions))
+
+
+def _filter_function_table(model):
+    def run():
+        for keyword in FILTER_KEYWORDS:
+            model.filter(keyword)
+        model.filter(None)
+    return run
+
+
+#
+# Binary cases
+#
+
+class BinaryContext:
+    """
+    A binary that is loaded into a headless main window, with its CFG and CFB, which binary cases share.
+    """
+
+    def __init__(self, path):
+        import angr  # pylint:disable=import-outside-toplevel
+        from angrmanagement.data.jobs.cfg_generation import CFGGenerationJob  # pylint:disable=import-outside-toplevel
+        from angrmanagement.ui.main_window import MainWindow  # pylint:disable=import-outside-toplevel
+
+        self.path = path
+        self.name = os.path.basename(path)
+        self.project = angr.Project(path, auto_load_libs=False)
+        self.cfg = self.project.analyses.CFGFast(**CFGGenerationJob.DEFAULT_CFG_ARGS)
+        self.cfb = self.project.analyses.CFB(kb=self.cfg.kb)
+
+        self.main_window = MainWindow()
+        self.workspace = self.main_window.workspace
+        instance = self.workspace.instance
+        instance.project_container.am_obj = self.project
+        instance.cfb = self.cfb
+        # reloads every view
+        instance.cfg = self.cfg
+
+    @property
+    def functions(self):
+        return [ func for func in self.cfg.kb.functions.values() if not func.is_simprocedure and not func.is_plt ]
+
+    def close(self):
+        self.main_window.close()
+
+
+@case('QDisassemblyGraph.reload', binary=True)
+def setup_disasm_graph_reload(ctx):
+    functions = ctx.functions
+    if not functions:
+        return "no functions"
+    func = max(functions, key=lambda f: len(f.block_addrs_set))
+
+    view = ctx.workspace.view_manager.first_view_in_category('disassembly')
+    view.display_disasm_graph()
+    view.display_function(func)
+    graph = view.current_graph
+    return graph.reload
+
+
+@case('QLinearDisassembly.prepare_objects', binary=True)
+def setup_linear_scroll(ctx):
+    view = ctx.workspace.view_manager.first_view_in_category('disassembly')
+    view.display_linear_viewer()
+    viewer = view.current_graph
+    viewer.initialize()
+    if not viewer.max_offset:
+        return "nothing to disassemble"
+    step = max(1, viewer.max_offset // SCROLL_STEPS)
+
+    def run():
+        # start over with an empty cache of disassembled functions, as after loading the binary
+        viewer.initialize()
+        for offset in range(0, viewer.max_offset, step):
+            viewer.prepare_objects(offset)
+    return run
+
+
+@case('function table filter', binary=True)
+def setup_binary_function_table_filter(ctx):
+    from angrmanagement.ui.widgets.qfunction_table import QFunctionTableModel  # pylint:disable=import-outside-toplevel
+
+    return _filter_function_table(QFunctionTableModel(func_list=list(ctx.cfg.kb.functions.values())))
+
+
+@case('QStringTable.reload', binary=True)
+def setup_string_table_reload(ctx):
+    from angrmanagement.ui.widgets.qstring_table import QStringTable  # pylint:disable=import-outside-toplevel
+
+    table = QStringTable(ctx.main_window)
+    table.cfg = ctx.cfg
+    return table.reload
+
+
+@case('locate_function', binary=True)
+def setup_locate_function(ctx):
+    from angrmanagement.utils import locate_function  # pylint:disable=import-outside-toplevel
+
+    block_addrs = sorted(addr for func in ctx.functions for addr in func.block_addrs_set)
+    if not block_addrs:
+        return "no blocks"
+    rng = random.Random(0)
+    addrs = [ rng.choice(block_addrs) for _ in range(LOCATE_ADDRESSES) ]
+    instance = ctx.workspace.instance
+
+    def run():
+        for addr in addrs:
+            locate_function(instance, addr)
+    return run
+
+
+@case('database save', binary=True)
+def setup_database_save(ctx):
+    data = (ctx.project, ctx.cfg, ctx.cfb)
+    return lambda: pickle.dumps(data)
+
+
+@case('database load', binary=True)
+def setup_database_load(ctx):
+    blob = pickle.dumps((ctx.project, ctx.cfg, ctx.cfb))
+    return lambda: pickle.loads(blob)
+
+
+#
+# Binaries
+#
+
+def generate_c_source(functions, seed=0):
+    """
+    Generate a C program with loops, switches, calls between functions, and string constants.
+    """
+
+    rng = random.Random(seed)
+    lines = [ '#include <stdio.h>', '#include <string.h>', '' ]
+    for i in range(functions):
+        lines.append('int f%d(int x);' % i)
+    lines.append('')
+
+    for i in range(functions):
+        lines += [
+            'int f%d(int x) {' % i,
+            '    int acc = %d;' % rng.randrange(1000),
+            '    for (int i = 0; i < x; i++) {',
+            '        switch ((acc ^ i) %% %d) {' % rng.randrange(3, 9),
+        ]
+        for label in range(rng.randrange(2, 6)):
+            lines.append('        case %d: acc += i * %d; break;' % (label, rng.randrange(1, 100)))
+        lines += [
+            '        default: acc ^= (int)strlen("generated string %d-%d");' % (i, rng.randrange(1 << 16)),
+            '        }',
+            '    }',
+        ]
+        callees = [ rng.randrange(i + 1, functions) for _ in range(2) ] if i + 1 < functions else [ ]
+        for callee in callees:
+            lines.append('    if (acc & %d) acc += f%d(x - 1);' % (1 << rng.randrange(8), callee))
+        lines += [ '    return acc;', '}', '' ]
+
+    lines += [
+        'int main(int argc, char **argv) {',
+        '    printf("%d\\n", f0(argc));',
+        '    return 0;',
+        '}',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def compile_generated_binary(directory):
+    """
+    Compile the generated C program.
+
+    :return:    The path of the binary, or a string that says why it could not be compiled.
+    """
+
+    compiler = shutil.which(os.environ.get('CC', 'cc'))
+    if compiler is None:
+        return "no C compiler"
+    source = os.path.join(directory, 'generated.c')
+    binary = os.path.join(directory, 'generated')
+    with open(source, 'w') as f:
+        f.write(generate_c_source(GENERATED_FUNCTIONS))
+    try:
+        subprocess.run([ compiler, '-O1', '-o', binary, source ], check=True, capture_output=True)
+    except subprocess.CalledProcessError as ex:
+        return "failed to compile: %s" % ex.stderr.decode(errors='replace').strip()
+    return binary
+
+
+def find_binaries(extra, directory):
+    """
+    :return:    A list of paths of binaries, and a dict of skipped binaries to reasons.
+    """
+
+    binaries, skipped = [ ], { }
+    generated = compile_generated_binary(directory)
+    if os.path.isfile(generated):
+        binaries.append(generated)
+    else:
+        skipped['generated'] = generated
+
+    if os.path.isdir(LOCAL_BINARIES):
+        for name in sorted(os.listdir(LOCAL_BINARIES)):
+            path = os.path.join(LOCAL_BINARIES, name)
+            if os.path.isfile(path) and not name.startswith('.'):
+                binaries.append(path)
+
+    binaries += extra
+    return binaries, skipped
+
+
+#
+# Running and comparing
+#
+
+def measure(run, repeat):
+    run()
+    times = [ ]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {
+        'median': statistics.median(times),
+        'min': min(times),
+        'max': max(times),
+        'runs': repeat,
+    }
+
+
+def run_case(name, setup, args, repeat, results, skipped):
+    try:
+        run = setup(*args)
+    except Exception as ex:  # pylint:disable=broad-except
+        run = "setup failed: %r" % ex
+    if isinstance(run, str):
+        skipped[name] = run
+        print("%-60s skipped: %s" % (name, run))
+        return
+    results[name] = measure(run, repeat)
+    print("%-60s %10.2f ms" % (name, results[name]['median'] * 1000))
+
+
+def git_commit():
+    try:
+        return subprocess.run([ 'git', 'rev-parse', 'HEAD' ], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True, capture_output=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(binaries=None, only=None, repeat=5):
+    """
+    Run the benchmark suite.
+
+    :param list binaries:   Paths of binaries to run binary cases against, in addition to the generated and local ones.
+    :param str only:        A glob pattern. Only cases whose names match are run.
+    :param int repeat:      How often each case is timed.
+    :return:                The results, which can be stored as JSON.
+    :rtype:                 dict
+    """
+
+    from PySide2.QtWidgets import QApplication  # pylint:disable=import-outside-toplevel
+    from angrmanagement.logic import GlobalInfo  # pylint:disable=import-outside-toplevel
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    GlobalInfo.gui_thread = threading.get_ident()
+
+    def selected(name):
+        return only is None or fnmatch.fnmatch(name, only)
+
+    results, skipped = { }, { }
+    for c in CASES:
+        if not c.binary and selected(c.name):
+            run_case(c.name, c.setup, (), repeat, results, skipped)
+
+    binary_cases = [ c for c in CASES if c.binary ]
+    with tempfile.TemporaryDirectory() as directory:
+        paths, skipped_binaries = find_binaries(binaries or [ ], directory)
+        for name, reason in skipped_binaries.items():
+            skipped['[%s]' % name] = reason
+            print("%-60s skipped: %s" % ('[%s]' % name, reason))
+
+        for path in paths:
+            names = [ "%s[%s]" % (c.name, os.path.basename(path)) for c in binary_cases ]
+            if not any(selected(name) for name in names):
+                continue
+            try:
+                ctx = BinaryContext(path)
+            except Exception as ex:  # pylint:disable=broad-except
+                skipped['[%s]' % os.path.basename(path)] = "failed to load: %r" % ex
+                continue
+            for c, name in zip(binary_cases, names):
+                if selected(name):
+                    run_case(name, c.setup, (ctx, ), repeat, results, skipped)
+                    app.processEvents()
+            ctx.close()
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(results, baseline, tolerance, only=None):
+    """
+    Compare the medians of two runs of the suite. Cases of the baseline that are missing from the new results, e.g.,
+    because their setup failed, count as regressions, since a case that no longer runs could have become arbitrarily
+    slow.
+
+    :param dict results:        The new results.
+    :param dict baseline:       The results to compare against.
+    :param float tolerance:     How much slower, relative to the baseline, a case may get before it counts as a
+                                regression.
+    :param str only:            The glob pattern that the new results have been limited to, if any. Cases of the
+                                baseline that do not match it are not expected in the new results.
+    :return:                    Names of the cases that regressed.
+    :rtype:                     list
+    """
+
+    regressions = [ ]
+    print()
+    print("%-60s %12s %12s %8s" % ("Case", "Baseline", "New", "Change"))
+    for name, new in sorted(results['results'].items()):
+        old = baseline['results'].get(name, None)
+        if old is None:
+            print("%-60s %12s %9.2f ms %8s" % (name, "-", new['median'] * 1000, "new"))
+            continue
+        change = new['median'] / old['median'] - 1 if old['median'] else 0.0
+        regressed = change > tolerance and new['median'] - old['median'] > MIN_REGRESSION
+        if regressed:
+            regressions.append(name)
+        print("%-60s %9.2f ms %9.2f ms %+7.1f%%%s" % (name, old['median'] * 1000, new['median'] * 1000, change * 100,
+                                                    "  REGRESSION" if regressed else ""))
+    skipped = results.get('skipped', { })
+    for name in sorted(set(baseline['results']) - set(results['results'])):
+        if only is not None and not fnmatch.fnmatch(name, only):
+            continue
+        regressions.append(name)
+        # binary cases are also skipped if their binary is
+        reason = skipped.get(name, None)
+        if reason is None and '[' in name:
+            reason = skipped.get(name[name.index('['):], None)
+        print("%-60s %9.2f ms %12s %8s  REGRESSION%s" % (name, baseline['results'][name]['median'] * 1000, "-",
+                                                        "missing" if reason is None else "skipped",
+                                                        "" if reason is None else ": %s" % reason))
+    return regressions
+
+
+def main(output=None, baseline=None, tolerance=0.25, binaries=None, only=None, repeat=5):
+    results = run_suite(binaries=binaries, only=only, repeat=repeat)
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        with open(baseline, 'r') as f:
+            regressions = compare(results, json.load(f), tolerance, only=only)
+        if regressions:
+            print("\n%d case(s) regressed by more than %d%%, or no longer ran." % (len(regressions), tolerance * 100))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark suite with JSON results and regression checks.")
+    parser.add_argument("--output", default=None, help="Store the results as JSON in this file.")
+    parser.add_argument("--baseline", default=None, help="Compare with the results in this JSON file, and exit with "
+                                                         "status 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="How much slower than the baseline a case may "
+                                                                      "get, e.g., 0.25 for 25%%.")
+    parser.add_argument("--binary", action='append', default=[ ], help="A binary to run binary cases against. May be "
+                                                                       "given more than once.")
+    parser.add_argument("--only", default=None, help="Only run cases whose names match this glob pattern.")
+    parser.add_argument("--repeat", type=int, default=5, help="How often each case is timed.")
+    args = parser.parse_args()
+
+    sys.exit(main(output=args.output, baseline=args.baseline, tolerance=args.tolerance, binaries=args.binary,
+                  only=args.only, repeat=args.repeat))